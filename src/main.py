@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import argparse
+import multiprocessing
 
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 from types import SimpleNamespace
 
 import uvicorn
@@ -15,20 +18,44 @@ from routers import goal
 from routers import montecarlo
 from routers import mortgage
 from routers import savings
+from services.v1 import BatchCalculator
 from services.v1 import CompareService
 from services.v1 import FinancialCalculator
+from services.v1 import MonteCarloExecutor
+from services.v1 import MonteCarloJobManager
 from services.v1 import MonteCarloService
+from settings import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
+    montecarlo_executor: MonteCarloExecutor = app.state.services.montecarlo_executor
+    montecarlo_jobs: MonteCarloJobManager = app.state.services.montecarlo_jobs
+    montecarlo_executor.start()
+    montecarlo_jobs.start()
+    try:
+        yield
+    finally:
+        await montecarlo_jobs.shutdown()
+        montecarlo_executor.shutdown()
 
 
 app = FastAPI(
     title="FinSimulator API",
     description="Финансовый калькулятор для расчетов кредитов, вкладов и инвестиций",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+montecarlo_executor = MonteCarloExecutor.from_settings(settings)
+montecarlo_service = MonteCarloService(montecarlo_executor)
+
 app.state.services = SimpleNamespace(
     fin_calc=FinancialCalculator(),
-    montecarlo_service=MonteCarloService(),
+    batch_calc=BatchCalculator(),
+    montecarlo_executor=montecarlo_executor,
+    montecarlo_service=montecarlo_service,
+    montecarlo_jobs=MonteCarloJobManager.from_settings(montecarlo_service, settings),
     cmp_service=CompareService(),
 )
 
@@ -105,6 +132,8 @@ async def health_check() -> dict[str, any]:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
     parser = argparse.ArgumentParser(description="FinSimulator API Server")
     parser.add_argument("--port", "-p", type=int, default=9887, help="Port of the API server")
     parser.add_argument("--host", "-H", type=str, default="0.0.0.0", help="Host of the API server")
@@ -8,6 +8,21 @@ class PaymentType(StrEnum):
     DIFFERENTIATED = "differentiated"
 
 
+class EarlyPaymentType(StrEnum):
+    REDUCE_TERM = "reduce_term"
+    REDUCE_PAYMENT = "reduce_payment"
+
+
+class ScheduleFormat(StrEnum):
+    ROWS = "rows"
+    COLUMNS = "columns"
+
+
+class DetailLevel(StrEnum):
+    SUMMARY = "summary"
+    FULL = "full"
+
+
 class CapitalizationType(StrEnum):
     DAILY = "daily"
     MONTHLY = "monthly"
@@ -21,3 +36,61 @@ class ComparisonType(StrEnum):
     SAVINGS = "savings"
     CREDIT = "credit"
     GOAL = "goal"
+
+
+class PathsOutput(StrEnum):
+    NONE = "none"
+    BANDS = "bands"
+    RAW = "raw"
+
+
+class PathDtype(StrEnum):
+    FLOAT64 = "float64"
+    FLOAT32 = "float32"
+
+
+class MemoryPolicy(StrEnum):
+    REJECT = "reject"
+    DOWNGRADE = "downgrade"
+
+
+class StatisticsMode(StrEnum):
+    EXACT = "exact"
+    STREAMING = "streaming"
+
+
+class SamplingScheme(StrEnum):
+    PSEUDO = "pseudo"
+    ANTITHETIC = "antithetic"
+    SOBOL = "sobol"
+
+
+class PrecisionMetric(StrEnum):
+    MEAN = "mean"
+    MEDIAN = "median"
+    REACH_GOAL = "reach_goal"
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class RebalancingFrequency(StrEnum):
+    NONE = "none"
+    MONTHLY = "monthly"
+    QUARTERLY = "quarterly"
+    YEARLY = "yearly"
+
+
+class ReturnModel(StrEnum):
+    NORMAL = "normal"
+    BOOTSTRAP = "bootstrap"
+
+
+class ExecutorType(StrEnum):
+    PROCESS = "process"
+    THREAD = "thread"
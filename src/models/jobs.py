@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+
+from models.enums import JobStatus
+from models.schemas import MonteCarloBaseRequest
+from models.schemas import MonteCarloResponse
+
+
+class JobCancelledError(Exception):
+    """Задача отменена между чанками"""
+
+
+class JobProgress:
+    """Счетчик готовых чанков и флаг кооперативной отмены
+
+    Сервис увеличивает общее число чанков по мере планирования пачек
+    и проверяет флаг отмены после каждого готового чанка.
+    """
+
+    def __init__(self):
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.cancel_requested = False
+
+    @property
+    def fraction(self) -> float:
+        return self.chunks_done / self.chunks_total if self.chunks_total else 0.0
+
+    def add_chunks(self, count: int) -> None:
+        self.chunks_total += count
+
+    def chunk_done(self) -> None:
+        self.chunks_done += 1
+
+    def cancel(self) -> None:
+        self.cancel_requested = True
+
+    def check_cancelled(self) -> None:
+        if self.cancel_requested:
+            raise JobCancelledError("Задача отменена")
+
+
+@dataclass
+class MonteCarloJob:
+    """Фоновая задача симуляции Монте-Карло"""
+
+    job_id: str
+    request: MonteCarloBaseRequest
+    created_at: datetime
+    status: JobStatus = JobStatus.QUEUED
+    progress: JobProgress = field(default_factory=JobProgress)
+    finished_at: datetime | None = None
+    result: MonteCarloResponse | None = None
+    error: str | None = None
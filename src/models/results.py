@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+
+from models.schemas import MonteCarloRequest
+
+
+@dataclass
+class AmortizationSchedule:
+    """Столбцы графика платежей по месяцам"""
+
+    month: np.ndarray
+    payment: np.ndarray
+    principal: np.ndarray
+    interest: np.ndarray
+    balance: np.ndarray
+
+
+@dataclass
+class ScheduleSegment:
+    """Отрезок графика между досрочными погашениями с постоянным платежом
+
+    level — аннуитетный платеж или часть тела дифференцированного
+    платежа, balance — остаток перед first_month, prepayment — досрочное
+    погашение после платежа last_month.
+    """
+
+    first_month: int
+    last_month: int
+    balance: float
+    level: float
+    prepayment: float = 0.0
+
+
+@dataclass
+class MonteCarloResult:
+    """Результат симуляции до сериализации: сводка и матрицы NumPy"""
+
+    seed: int
+    summary: dict[str, Any]
+    band_percentiles: list[float]
+    bands: np.ndarray | None = None
+    sample_paths: np.ndarray | None = None
+    paths: np.ndarray | None = None
+
+
+@dataclass
+class MonteCarloRun:
+    """Сохраненный прогон: итоговые суммы путей и состояния ГСЧ блоков после последнего месяца"""
+
+    run_id: str
+    request: MonteCarloRequest
+    seed: int
+    finals: np.ndarray
+    states: list[dict[str, Any]]
+    created_at: datetime
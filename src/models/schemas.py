@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from datetime import datetime
+from typing import Annotated
 from typing import Any
 from typing import Self
 
@@ -9,7 +11,35 @@ from pydantic import model_validator
 
 from models.enums import CapitalizationType
 from models.enums import ComparisonType
+from models.enums import DetailLevel
+from models.enums import EarlyPaymentType
+from models.enums import JobStatus
+from models.enums import PathDtype
+from models.enums import PathsOutput
 from models.enums import PaymentType
+from models.enums import PrecisionMetric
+from models.enums import RebalancingFrequency
+from models.enums import ReturnModel
+from models.enums import SamplingScheme
+from models.enums import ScheduleFormat
+from models.enums import StatisticsMode
+
+
+class EarlyPayment(BaseModel):
+    """Досрочное погашение ипотеки"""
+
+    month: int = Field(
+        ge=1,
+        description="Месяц, после платежа которого вносится досрочное погашение",
+    )
+    amount: float = Field(
+        gt=0,
+        description="Сумма досрочного погашения в рублях",
+    )
+    type: EarlyPaymentType = Field(
+        default=EarlyPaymentType.REDUCE_TERM,
+        description="Что уменьшается после погашения: срок (reduce_term) или платеж (reduce_payment)",
+    )
 
 
 class MortgageRequest(BaseModel):
@@ -37,6 +67,28 @@ class MortgageRequest(BaseModel):
         default=PaymentType.ANNUITY,
         description="Тип графика платежей",
     )
+    detail: DetailLevel = Field(
+        default=DetailLevel.FULL,
+        description="Детализация ответа: summary — только итоги без графика, full — итоги и график",
+    )
+    schedule_format: ScheduleFormat = Field(
+        default=ScheduleFormat.ROWS,
+        description="Формат графика: rows — список месяцев, columns — столбцы-массивы по полям",
+    )
+    from_month: int | None = Field(
+        default=None,
+        ge=1,
+        description="Первый месяц возвращаемого окна графика; по умолчанию с первого месяца",
+    )
+    to_month: int | None = Field(
+        default=None,
+        ge=1,
+        description="Последний месяц возвращаемого окна графика; по умолчанию до конца срока",
+    )
+    early_payments: list[EarlyPayment] = Field(
+        default_factory=list,
+        description="Досрочные погашения; в одном месяце применяются в порядке перечисления",
+    )
 
     @model_validator(mode="after")
     def down_payment_less_than_price(self) -> Self:
@@ -46,6 +98,24 @@ class MortgageRequest(BaseModel):
             )
         return self
 
+    @model_validator(mode="after")
+    def schedule_window_within_term(self) -> Self:
+        months = self.years * 12
+        first_month = self.from_month or 1
+        last_month = self.to_month or months
+        if first_month > last_month:
+            raise ValueError("from_month не может быть больше to_month")
+        if last_month > months:
+            raise ValueError(f"Окно графика выходит за срок кредита: {months} мес.")
+        return self
+
+    @model_validator(mode="after")
+    def early_payments_within_term(self) -> Self:
+        months = self.years * 12
+        if any(early_payment.month > months for early_payment in self.early_payments):
+            raise ValueError(f"Досрочное погашение выходит за срок кредита: {months} мес.")
+        return self
+
 
 class MortgageMonthPayment(BaseModel):
     """Месячные данные платежей по ипотеке"""
@@ -67,6 +137,46 @@ class MortgageMonthPayment(BaseModel):
     )
 
 
+class MortgageScheduleColumns(BaseModel):
+    """График платежей по ипотеке в столбцах: i-е элементы списков — один месяц"""
+
+    month: list[int] = Field(
+        description="Месяцы оплаты",
+    )
+    payment: list[float] = Field(
+        description="Суммы платежей",
+    )
+    principal: list[float] = Field(
+        description="Части платежей на погашение тела кредита",
+    )
+    interest: list[float] = Field(
+        description="Части платежей на проценты",
+    )
+    balance: list[float] = Field(
+        description="Остатки долга после платежей",
+    )
+
+
+class PeriodTotals(BaseModel):
+    """Итоги платежей за диапазон месяцев, посчитанные без построения графика"""
+
+    from_month: int = Field(
+        description="Первый месяц периода",
+    )
+    to_month: int = Field(
+        description="Последний месяц периода",
+    )
+    payment: float = Field(
+        description="Сумма платежей за период",
+    )
+    principal: float = Field(
+        description="Погашенное за период тело кредита",
+    )
+    interest: float = Field(
+        description="Выплаченные за период проценты",
+    )
+
+
 class MortgageResponse(BaseModel):
     """Ответ с результатами расчета ипотеки"""
 
@@ -82,8 +192,17 @@ class MortgageResponse(BaseModel):
     total_interest: float = Field(
         description="Общая сумма переплаты по процентам в рублях",
     )
-    payment_schedule: list[MortgageMonthPayment] = Field(
-        description="Детальный график платежей по месяцам",
+    term_months: int | None = Field(
+        default=None,
+        description="Фактический срок кредита в месяцах с учетом досрочных погашений",
+    )
+    payment_schedule: list[MortgageMonthPayment] | MortgageScheduleColumns | None = Field(
+        default=None,
+        description="Детальный график платежей по месяцам; None при detail=summary",
+    )
+    period_totals: PeriodTotals | None = Field(
+        default=None,
+        description="Итоги за окно from_month..to_month; заполняется, если окно задано",
     )
 
 
@@ -124,6 +243,10 @@ class SavingsRequest(BaseModel):
         le=99,
         description="Ожидаемая годовая инфляция",
     )
+    detail: DetailLevel = Field(
+        default=DetailLevel.FULL,
+        description="Детализация ответа: summary — только итоги без графика, full — итоги и график",
+    )
 
 
 class SavingsYear(BaseModel):
@@ -161,8 +284,9 @@ class SavingsResponse(BaseModel):
     total_tax: float = Field(
         description="Сумма уплаченного налога на доход",
     )
-    yearly_breakdown: list[SavingsYear] = Field(
-        description="Годовой отчет о накоплениях",
+    yearly_breakdown: list[SavingsYear] | None = Field(
+        default=None,
+        description="Годовой отчет о накоплениях; None при detail=summary",
     )
 
 
@@ -205,6 +329,35 @@ class CreditRequest(BaseModel):
         le=31,
         description="Число месяца, когда производится платеж",
     )
+    detail: DetailLevel = Field(
+        default=DetailLevel.FULL,
+        description="Детализация ответа: summary — только итоги без графика, full — итоги и график",
+    )
+    schedule_format: ScheduleFormat = Field(
+        default=ScheduleFormat.ROWS,
+        description="Формат графика: rows — список месяцев, columns — столбцы-массивы по полям",
+    )
+    from_month: int | None = Field(
+        default=None,
+        ge=1,
+        description="Первый месяц возвращаемого окна графика; по умолчанию с первого месяца",
+    )
+    to_month: int | None = Field(
+        default=None,
+        ge=1,
+        description="Последний месяц возвращаемого окна графика; по умолчанию до конца срока",
+    )
+
+    @model_validator(mode="after")
+    def schedule_window_within_term(self) -> Self:
+        months = int(self.years * 12)
+        first_month = self.from_month or 1
+        last_month = self.to_month or months
+        if first_month > last_month:
+            raise ValueError("from_month не может быть больше to_month")
+        if last_month > months:
+            raise ValueError(f"Окно графика выходит за срок кредита: {months} мес.")
+        return self
 
 
 class CreditMonthPayment(MortgageMonthPayment):
@@ -215,6 +368,22 @@ class CreditMonthPayment(MortgageMonthPayment):
     )
 
 
+class CreditScheduleColumns(MortgageScheduleColumns):
+    """График платежей по кредиту в столбцах"""
+
+    fees: list[float] = Field(
+        description="Дополнительные сборы по месяцам",
+    )
+
+
+class CreditPeriodTotals(PeriodTotals):
+    """Итоги платежей по кредиту за диапазон месяцев"""
+
+    fees: float = Field(
+        description="Комиссия и страховка за период",
+    )
+
+
 class CreditResponse(BaseModel):
     """Ответ с результатами расчета кредита"""
 
@@ -233,8 +402,13 @@ class CreditResponse(BaseModel):
     commission_amount: float = Field(
         description="Сумма единовременной комиссии",
     )
-    payment_schedule: list[CreditMonthPayment] = Field(
-        description="График платежей",
+    payment_schedule: list[CreditMonthPayment] | CreditScheduleColumns | None = Field(
+        default=None,
+        description="График платежей; None при detail=summary",
+    )
+    period_totals: CreditPeriodTotals | None = Field(
+        default=None,
+        description="Итоги за окно from_month..to_month; заполняется, если окно задано",
     )
 
 
@@ -264,6 +438,14 @@ class GoalRequest(BaseModel):
         ge=0,
         description="Фиксированная сумма ежемесячного пополнения в рублях",
     )
+    detail: DetailLevel = Field(
+        default=DetailLevel.FULL,
+        description="Детализация ответа: summary — только итоги без графика, full — итоги и график",
+    )
+    schedule_format: ScheduleFormat = Field(
+        default=ScheduleFormat.ROWS,
+        description="Формат графика: rows — список месяцев, columns — столбцы-массивы по полям",
+    )
 
 
 class GoalMonth(BaseModel):
@@ -283,6 +465,23 @@ class GoalMonth(BaseModel):
     )
 
 
+class GoalMonthColumns(BaseModel):
+    """Помесячный график накоплений в столбцах"""
+
+    month: list[int] = Field(
+        description="Месяцы",
+    )
+    amount: list[float] = Field(
+        description="Суммы на счете к концу месяцев",
+    )
+    contributions: list[float] = Field(
+        description="Накопленные суммы взносов",
+    )
+    interest: list[float] = Field(
+        description="Проценты, начисленные за месяцы",
+    )
+
+
 class GoalResponse(BaseModel):
     """Ответ с результатами расчета финансовой цели"""
 
@@ -292,8 +491,9 @@ class GoalResponse(BaseModel):
     expected_final_amount: float | None = Field(
         description="Ожидаемая итоговая сумма при заданном взносе",
     )
-    monthly_breakdown: list[GoalMonth] = Field(
-        description="Помесячный график накоплений",
+    monthly_breakdown: list[GoalMonth] | GoalMonthColumns | None = Field(
+        default=None,
+        description="Помесячный график накоплений; None при detail=summary",
     )
     is_achievable: bool = Field(
         default=True,
@@ -301,8 +501,73 @@ class GoalResponse(BaseModel):
     )
 
 
-class MonteCarloRequest(BaseModel):
-    """Запрос для симуляции Монте-Карло"""
+MAX_BATCH_ITEMS = 10_000
+
+
+class BatchRequest(BaseModel):
+    """Пакет запросов к одному калькулятору"""
+
+    items: list[Any] = Field(
+        min_length=1,
+        max_length=MAX_BATCH_ITEMS,
+        description="Запросы в формате одиночного эндпоинта; ошибка в одном запросе не прерывает пакет",
+    )
+
+
+class BatchItem[Result](BaseModel):
+    """Результат одного запроса пакета: итоги расчета или текст ошибки"""
+
+    index: int = Field(
+        description="Позиция запроса в пакете",
+    )
+    result: Result | None = Field(
+        default=None,
+        description="Итоги расчета без графика; None, если запрос не прошел проверку",
+    )
+    error: str | None = Field(
+        default=None,
+        description="Ошибки проверки запроса",
+    )
+
+
+class BatchResponse[Result](BaseModel):
+    """Результаты пакета в порядке запросов"""
+
+    items: list[BatchItem[Result]] = Field(
+        description="Результаты по запросам пакета",
+    )
+
+
+MAX_EXACT_SIMULATIONS = 10_000
+MAX_PORTFOLIO_ASSETS = 10
+MAX_SWEEP_VALUES = 50
+MAX_SWEEP_CELLS = 400
+WEIGHTS_TOLERANCE = 1e-6
+
+
+class MonteCarloPrecision(BaseModel):
+    """Целевая точность адаптивной симуляции Монте-Карло"""
+
+    metric: PrecisionMetric = Field(
+        description="Оценка, по которой останавливается симуляция: mean, median или reach_goal",
+    )
+    tolerance: float = Field(
+        gt=0,
+        description=(
+            "Допуск: для mean — стандартная ошибка среднего в процентах от среднего, "
+            "для median — ширина 95% доверительного интервала медианы в процентах от медианы, "
+            "для reach_goal — стандартная ошибка вероятности цели в процентных пунктах"
+        ),
+    )
+    max_seconds: float | None = Field(
+        default=None,
+        gt=0,
+        description="Ограничение по времени в секундах; бюджет путей задается полем simulations",
+    )
+
+
+class MonteCarloBaseRequest(BaseModel):
+    """Общие параметры симуляций Монте-Карло: взносы, срок и настройки прогона"""
 
     initial: float = Field(
         ge=0,
@@ -317,6 +582,100 @@ class MonteCarloRequest(BaseModel):
         le=50,
         description="Срок моделирования в полных годах",
     )
+    simulations: int = Field(
+        default=1000,
+        ge=10,
+        le=10_000_000,
+        description="Количество случайных сценариев для симуляции",
+    )
+    goal_amount: float | None = Field(
+        default=None,
+        gt=0,
+        description="Целевая сумма в рублях для расчета вероятности достижения",
+    )
+    seed: int | None = Field(
+        default=None,
+        ge=0,
+        description="Сид генератора для воспроизводимых результатов",
+    )
+    paths_output: PathsOutput = Field(
+        default=PathsOutput.BANDS,
+        description="Что вернуть по траекториям: ничего, перцентильные полосы или все пути целиком",
+    )
+    band_percentiles: list[Annotated[float, Field(ge=0, le=100)]] = Field(
+        default=[5, 25, 50, 75, 95],
+        min_length=1,
+        max_length=20,
+        description="Перцентили помесячных полос",
+    )
+    sample_paths: int = Field(
+        default=0,
+        ge=0,
+        le=50,
+        description="Количество репрезентативных траекторий в ответе",
+    )
+    path_dtype: PathDtype = Field(
+        default=PathDtype.FLOAT64,
+        description="Точность хранения траекторий; float32 вдвое экономит память, расчет идет во float64",
+    )
+    sampling: SamplingScheme = Field(
+        default=SamplingScheme.PSEUDO,
+        description="Схема выборки: псевдослучайная, антитетические пары или Sobol (нужен scipy)",
+    )
+    statistics_mode: StatisticsMode = Field(
+        default=StatisticsMode.EXACT,
+        description="Точные статистики по всем путям или потоковые сводки в постоянной памяти",
+    )
+    precision: MonteCarloPrecision | None = Field(
+        default=None,
+        description="Целевая точность: пути добавляются пачками, пока она не достигнута или не исчерпан бюджет",
+    )
+    path_metrics: bool = Field(
+        default=False,
+        description="Посчитать распределение месяца первого достижения goal_amount и максимальной просадки путей",
+    )
+
+    @property
+    def assets(self) -> int:
+        return 1
+
+    @property
+    def is_portfolio(self) -> bool:
+        return False
+
+    @model_validator(mode="after")
+    def streaming_statistics_for_large_runs(self) -> Self:
+        if self.statistics_mode == StatisticsMode.EXACT:
+            if self.simulations > MAX_EXACT_SIMULATIONS:
+                raise ValueError(
+                    f"Больше {MAX_EXACT_SIMULATIONS} симуляций доступно только в потоковом режиме статистики",
+                )
+            return self
+
+        if "paths_output" not in self.model_fields_set:
+            self.paths_output = PathsOutput.NONE
+        if self.paths_output != PathsOutput.NONE or self.sample_paths:
+            raise ValueError(
+                "Потоковый режим статистики не хранит траектории: нужны paths_output=none и sample_paths=0",
+            )
+        return self
+
+    @model_validator(mode="after")
+    def goal_for_reach_goal_precision(self) -> Self:
+        if self.precision and self.precision.metric == PrecisionMetric.REACH_GOAL and not self.goal_amount:
+            raise ValueError("Точность по reach_goal требует goal_amount")
+        return self
+
+    @model_validator(mode="after")
+    def path_metrics_without_precision(self) -> Self:
+        if self.path_metrics and self.precision is not None:
+            raise ValueError("Метрики путей не считаются в адаптивном режиме precision")
+        return self
+
+
+class MonteCarloRequest(MonteCarloBaseRequest):
+    """Запрос для симуляции Монте-Карло"""
+
     avg_return: float = Field(
         ge=-50,
         le=99,
@@ -327,17 +686,160 @@ class MonteCarloRequest(BaseModel):
         le=99,
         description="Стандартное отклонение доходности (риск) в процентах",
     )
+    return_model: ReturnModel = Field(
+        default=ReturnModel.NORMAL,
+        description="Модель доходностей: нормальная по avg_return и risk или бутстрэп исторических месяцев",
+    )
+    bootstrap_block_months: float = Field(
+        default=12,
+        ge=1,
+        le=120,
+        description="Средняя длина блока стационарного бутстрэпа в месяцах",
+    )
+
+    @model_validator(mode="after")
+    def pseudo_sampling_for_bootstrap(self) -> Self:
+        if self.return_model == ReturnModel.BOOTSTRAP and self.sampling != SamplingScheme.PSEUDO:
+            raise ValueError("Бутстрэп исторических доходностей поддерживает только sampling=pseudo")
+        return self
+
+
+class PortfolioMonteCarloRequest(MonteCarloBaseRequest):
+    """Запрос для симуляции Монте-Карло портфеля из нескольких коррелированных активов"""
+
+    weights: list[Annotated[float, Field(ge=0, le=1)]] = Field(
+        min_length=1,
+        max_length=MAX_PORTFOLIO_ASSETS,
+        description="Целевые доли активов, в сумме 1; по ним распределяются взносы",
+    )
+    expected_returns: list[Annotated[float, Field(ge=-50, le=99)]] = Field(
+        description="Средние годовые доходности активов в процентах",
+    )
+    covariance: list[list[float]] = Field(
+        description="Годовая ковариационная матрица доходностей в квадратах процентов (риск 15% — 225 на диагонали)",
+    )
+    rebalancing: RebalancingFrequency = Field(
+        default=RebalancingFrequency.MONTHLY,
+        description="Частота ребалансировки к целевым долям: none, monthly, quarterly или yearly",
+    )
+
+    @property
+    def assets(self) -> int:
+        return len(self.weights)
+
+    @property
+    def is_portfolio(self) -> bool:
+        return True
+
+    @model_validator(mode="after")
+    def consistent_portfolio(self) -> Self:
+        assets = len(self.weights)
+        if abs(sum(self.weights) - 1) > WEIGHTS_TOLERANCE:
+            raise ValueError("Сумма долей активов должна быть равна 1")
+        if len(self.expected_returns) != assets:
+            raise ValueError("Число доходностей должно совпадать с числом активов")
+        if len(self.covariance) != assets or any(len(row) != assets for row in self.covariance):
+            raise ValueError("Ковариационная матрица должна быть квадратной по числу активов")
+        for i in range(assets):
+            if self.covariance[i][i] < 0:
+                raise ValueError("Дисперсии на диагонали ковариационной матрицы не могут быть отрицательными")
+            for j in range(i):
+                if abs(self.covariance[i][j] - self.covariance[j][i]) > WEIGHTS_TOLERANCE:
+                    raise ValueError("Ковариационная матрица должна быть симметричной")
+        return self
+
+
+class MonteCarloSweepRequest(BaseModel):
+    """Запрос для сетки симуляций Монте-Карло на общих случайных числах"""
+
+    initial: float = Field(
+        ge=0,
+        description="Начальный капитал в рублях",
+    )
+    monthly: list[Annotated[float, Field(ge=0)]] = Field(
+        min_length=1,
+        max_length=MAX_SWEEP_VALUES,
+        description="Значения ежемесячного пополнения в рублях",
+    )
+    years: int = Field(
+        ge=1,
+        le=50,
+        description="Срок моделирования в полных годах",
+    )
+    avg_return: list[Annotated[float, Field(ge=-50, le=99)]] = Field(
+        min_length=1,
+        max_length=MAX_SWEEP_VALUES,
+        description="Значения средней годовой доходности в процентах",
+    )
+    risk: list[Annotated[float, Field(ge=0, le=99)]] = Field(
+        min_length=1,
+        max_length=MAX_SWEEP_VALUES,
+        description="Значения стандартного отклонения доходности (риска) в процентах",
+    )
     simulations: int = Field(
         default=1000,
         ge=10,
-        le=10000,
-        description="Количество случайных сценариев для симуляции",
+        le=MAX_EXACT_SIMULATIONS,
+        description="Количество случайных сценариев, общих для всех ячеек сетки",
     )
     goal_amount: float | None = Field(
         default=None,
         gt=0,
         description="Целевая сумма в рублях для расчета вероятности достижения",
     )
+    seed: int | None = Field(
+        default=None,
+        ge=0,
+        description="Сид генератора для воспроизводимых результатов",
+    )
+    sampling: SamplingScheme = Field(
+        default=SamplingScheme.PSEUDO,
+        description="Схема выборки: псевдослучайная, антитетические пары или Sobol (нужен scipy)",
+    )
+
+    @property
+    def cells(self) -> int:
+        return len(self.avg_return) * len(self.risk) * len(self.monthly)
+
+    @model_validator(mode="after")
+    def limited_grid(self) -> Self:
+        if self.cells > MAX_SWEEP_CELLS:
+            raise ValueError(f"Сетка не может содержать больше {MAX_SWEEP_CELLS} ячеек")
+        return self
+
+
+class MonteCarloSweepCell(BaseModel):
+    """Результаты одной ячейки сетки симуляций"""
+
+    avg_return: float = Field(
+        description="Средняя годовая доходность в процентах",
+    )
+    risk: float = Field(
+        description="Стандартное отклонение доходности в процентах",
+    )
+    monthly: float = Field(
+        description="Ежемесячное пополнение в рублях",
+    )
+    statistics: dict[str, float] = Field(
+        description="Основные статистики результатов",
+    )
+    percentiles: dict[str, float] = Field(
+        description="Процентили распределения результатов",
+    )
+    probabilities: dict[str, float] = Field(
+        description="Вероятности различных событий в процентах",
+    )
+
+
+class MonteCarloSweepResponse(BaseModel):
+    """Ответ с результатами сетки симуляций Монте-Карло"""
+
+    cells: list[MonteCarloSweepCell] = Field(
+        description="Ячейки в порядке avg_return, затем risk, затем monthly",
+    )
+    seed: int = Field(
+        description="Сид, с которым воспроизводится этот результат",
+    )
 
 
 class MonteCarloResponse(BaseModel):
@@ -355,10 +857,120 @@ class MonteCarloResponse(BaseModel):
     distribution: list[dict] = Field(
         description="Распределение результатов по диапазонам",
     )
+    standard_error: dict[str, float | None] = Field(
+        description="Стандартная ошибка оценок среднего и вероятности цели (п.п.) при выбранной схеме выборки",
+    )
+    downgrades: list[str] | None = Field(
+        default=None,
+        description="Понижения вывода, примененные, чтобы запрос уложился в бюджет памяти",
+    )
+    convergence: dict[str, Any] | None = Field(
+        default=None,
+        description="Адаптивный режим: достигнутая ошибка, число путей и ход сходимости по пачкам",
+    )
+    time_to_goal: dict[str, Any] | None = Field(
+        default=None,
+        description="Месяц первого достижения цели: доля достигших, перцентили по всем путям и гистограмма по годам",
+    )
+    max_drawdown: dict[str, Any] | None = Field(
+        default=None,
+        description="Максимальная просадка путей от пика в процентах: среднее, медиана, максимум и перцентили",
+    )
+    bands: dict[str, list[float]] | None = Field(
+        default=None,
+        description="Помесячные перцентильные полосы по всем траекториям",
+    )
+    sample_paths: list[list[float]] | None = Field(
+        default=None,
+        description="Репрезентативные траектории, равномерно по рангу итоговой суммы",
+    )
     simulations_data: list[list[float]] | None = Field(
         default=None,
         description="Сырые данные симуляций для построения графиков",
     )
+    seed: int = Field(
+        description="Сид, с которым воспроизводится этот результат",
+    )
+
+
+class MonteCarloRunExtension(BaseModel):
+    """Продолжение сохраненного прогона: дополнительные годы и пути"""
+
+    extra_years: int = Field(
+        default=0,
+        ge=0,
+        le=49,
+        description="Сколько лет добавить к горизонту, начиная с сохраненных итоговых сумм",
+    )
+    extra_simulations: int = Field(
+        default=0,
+        ge=0,
+        le=MAX_EXACT_SIMULATIONS,
+        description="Сколько путей добавить из следующих потоков ГСЧ",
+    )
+
+    @model_validator(mode="after")
+    def something_to_extend(self) -> Self:
+        if not self.extra_years and not self.extra_simulations:
+            raise ValueError("Нужно добавить годы или пути")
+        return self
+
+
+class MonteCarloRunResponse(BaseModel):
+    """Сохраненный прогон Монте-Карло и его результаты"""
+
+    run_id: str = Field(
+        description="Идентификатор прогона для продолжения",
+    )
+    years: int = Field(
+        description="Горизонт прогона в годах",
+    )
+    simulations: int = Field(
+        description="Количество путей прогона",
+    )
+    expires_at: datetime = Field(
+        description="Время, после которого прогон удаляется",
+    )
+    result: MonteCarloResponse = Field(
+        description="Сводка, совпадающая со свежей симуляцией с теми же параметрами и сидом",
+    )
+
+
+class MonteCarloJobResponse(BaseModel):
+    """Состояние фоновой задачи Монте-Карло"""
+
+    job_id: str = Field(
+        description="Идентификатор задачи",
+    )
+    status: JobStatus = Field(
+        description="Статус: queued, running, completed, failed или cancelled",
+    )
+    progress: float = Field(
+        ge=0,
+        le=1,
+        description="Доля готовых чанков",
+    )
+    chunks_done: int = Field(
+        description="Количество готовых чанков",
+    )
+    chunks_total: int = Field(
+        description="Количество запланированных чанков; в адаптивном режиме растет по мере пачек",
+    )
+    created_at: datetime = Field(
+        description="Время постановки в очередь",
+    )
+    finished_at: datetime | None = Field(
+        default=None,
+        description="Время завершения",
+    )
+    expires_at: datetime | None = Field(
+        default=None,
+        description="Время, после которого результат удаляется",
+    )
+    error: str | None = Field(
+        default=None,
+        description="Текст ошибки для задачи со статусом failed",
+    )
 
 
 class ComparisonScenario(BaseModel):
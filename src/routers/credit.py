@@ -4,8 +4,11 @@ from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
 
+from models.schemas import BatchRequest
+from models.schemas import BatchResponse
 from models.schemas import CreditRequest
 from models.schemas import CreditResponse
+from services.interfaces import IBatchCalculator
 from services.interfaces import IFinancialCalculator
 
 
@@ -22,9 +25,31 @@ async def calculate_credit(request_body: CreditRequest, request: Request) -> Cre
     - **payment_type**: Тип платежа
     - **commission**: Комиссия в % от суммы
     - **insurance**: Страховка в % годовых
+    - **detail**: Детализация ответа (summary — без графика, full — с графиком)
+    - **schedule_format**: Формат графика (rows или columns)
+    - **from_month**, **to_month**: Окно графика по месяцам (по умолчанию весь срок)
     """
     try:
         fin_calc: IFinancialCalculator = request.app.state.services.fin_calc
         return fin_calc.calculate_credit(request_body)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/batch", response_model=BatchResponse[CreditResponse])
+async def calculate_credit_batch(
+    request_body: BatchRequest,
+    request: Request,
+) -> BatchResponse[CreditResponse] | HTTPException:
+    """Пакетный расчет кредитов
+
+    - **items**: Запросы в формате одиночного эндпоинта (до 10000)
+
+    Возвращает итоги без графиков в порядке запросов; запрос с ошибкой
+    проверки получает поле error и не прерывает пакет.
+    """
+    try:
+        batch_calc: IBatchCalculator = request.app.state.services.batch_calc
+        return batch_calc.calculate_credit_batch(request_body.items)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
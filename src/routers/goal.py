@@ -4,8 +4,11 @@ from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
 
+from models.schemas import BatchRequest
+from models.schemas import BatchResponse
 from models.schemas import GoalRequest
 from models.schemas import GoalResponse
+from services.interfaces import IBatchCalculator
 from services.interfaces import IFinancialCalculator
 
 
@@ -21,9 +24,30 @@ async def calculate_goal(request_body: GoalRequest, request: Request) -> GoalRes
     - **years**: Срок в годах
     - **expected_rate**: Ожидаемая доходность
     - **monthly_contribution**: Фиксированный платеж (если None - рассчитывается)
+    - **detail**: Детализация ответа (summary — без графика, full — с графиком)
+    - **schedule_format**: Формат графика (rows или columns)
     """
     try:
         fin_calc: IFinancialCalculator = request.app.state.services.fin_calc
         return fin_calc.calculate_goal(request_body)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/batch", response_model=BatchResponse[GoalResponse])
+async def calculate_goal_batch(
+    request_body: BatchRequest,
+    request: Request,
+) -> BatchResponse[GoalResponse] | HTTPException:
+    """Пакетный расчет финансовых целей
+
+    - **items**: Запросы в формате одиночного эндпоинта (до 10000)
+
+    Возвращает итоги без графиков в порядке запросов; запрос с ошибкой
+    проверки получает поле error и не прерывает пакет.
+    """
+    try:
+        batch_calc: IBatchCalculator = request.app.state.services.batch_calc
+        return batch_calc.calculate_goal_batch(request_body.items)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,19 +1,49 @@
 from __future__ import annotations
 
+import json
+
+from collections.abc import AsyncIterator
+from typing import Any
+
 from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
+from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 
+from models.enums import JobStatus
+from models.jobs import MonteCarloJob
+from models.schemas import MonteCarloJobResponse
 from models.schemas import MonteCarloRequest
 from models.schemas import MonteCarloResponse
+from models.schemas import MonteCarloRunExtension
+from models.schemas import MonteCarloRunResponse
+from models.schemas import MonteCarloSweepRequest
+from models.schemas import MonteCarloSweepResponse
+from models.schemas import PortfolioMonteCarloRequest
 from services.interfaces import IMonteCarloService
+from services.v1.montecarlo_service.encoders import ARROW_MEDIA_TYPE
+from services.v1.montecarlo_service.encoders import NPY_MEDIA_TYPE
+from services.v1.montecarlo_service.encoders import MonteCarloEncoder
+from services.v1.montecarlo_service.encoders import NothingToEncodeError
+from services.v1.montecarlo_service.jobs import MonteCarloJobManager
+from services.v1.montecarlo_service.memory import MemoryBudgetExceededError
 
 
 router = APIRouter()
 
+BINARY_MEDIA_TYPES = (NPY_MEDIA_TYPE, ARROW_MEDIA_TYPE)
+
 
-@router.post("/", response_model=MonteCarloResponse)
-async def run_monte_carlo(request_body: MonteCarloRequest, request: Request) -> MonteCarloResponse | HTTPException:
+@router.post(
+    "/",
+    response_model=MonteCarloResponse,
+    responses={200: {"content": {media_type: {} for media_type in BINARY_MEDIA_TYPES}}},
+)
+async def run_monte_carlo(
+    request_body: MonteCarloRequest,
+    request: Request,
+) -> MonteCarloResponse | Response | HTTPException:
     """Симуляция Монте-Карло для инвестиций
 
     - **initial**: Начальный капитал
@@ -23,9 +53,303 @@ async def run_monte_carlo(request_body: MonteCarloRequest, request: Request) ->
     - **risk**: Риск (стандартное отклонение)
     - **simulations**: Количество симуляций (100-10000)
     - **goal_amount**: Целевая сумма
+    - **seed**: Сид для воспроизводимых результатов
+    - **paths_output**: Траектории в ответе (none, bands или raw)
+    - **band_percentiles**: Перцентили помесячных полос
+    - **sample_paths**: Количество репрезентативных траекторий
+    - **statistics_mode**: Точная или потоковая статистика
+    - **path_dtype**: Точность хранения траекторий (float64 или float32)
+    - **sampling**: Схема выборки (pseudo, antithetic или sobol)
+    - **precision**: Целевая точность; simulations тогда задает бюджет путей
+    - **return_model**: Модель доходностей (normal или bootstrap по файлу истории)
+    - **bootstrap_block_months**: Средняя длина блока бутстрэпа в месяцах
+    - **path_metrics**: Месяц первого достижения цели и максимальная просадка путей
+
+    По заголовку `Accept: application/x-npy` или
+    `application/vnd.apache.arrow.stream` полосы, репрезентативные
+    траектории и пути возвращаются бинарными буферами. Для .npy последним
+    массивом идет полная сводка в JSON, а заголовок `X-MonteCarlo-Summary`
+    несет ее ограниченную часть и порядок массивов; в Arrow сводка лежит в
+    метаданных схемы. Запрос без матриц в бинарном формате получает 406.
+    """
+    media_type = _negotiate(request.headers.get("accept", ""))
+    if media_type == ARROW_MEDIA_TYPE and not MonteCarloEncoder.arrow_available():
+        raise HTTPException(status_code=406, detail="Формат Arrow недоступен: не установлен pyarrow")
+
+    try:
+        montecarlo_service: IMonteCarloService = request.app.state.services.montecarlo_service
+        if media_type is None:
+            return await montecarlo_service.simulate(request_body)
+
+        MonteCarloEncoder.check_request(request_body)
+        result = await montecarlo_service.simulate_arrays(request_body)
+        if media_type == NPY_MEDIA_TYPE:
+            content = MonteCarloEncoder.to_npy(result)
+            headers = {"X-MonteCarlo-Summary": MonteCarloEncoder.summary_header(result)}
+        else:
+            content = MonteCarloEncoder.to_arrow(result)
+            headers = {}
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except NothingToEncodeError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+@router.post("/portfolio", response_model=MonteCarloResponse)
+async def run_portfolio_monte_carlo(
+    request_body: PortfolioMonteCarloRequest,
+    request: Request,
+) -> MonteCarloResponse | HTTPException:
+    """Симуляция Монте-Карло портфеля из нескольких коррелированных активов
+
+    - **weights**: Целевые доли активов (в сумме 1)
+    - **expected_returns**: Средние годовые доходности активов в процентах
+    - **covariance**: Годовая ковариационная матрица в квадратах процентов
+    - **rebalancing**: Частота ребалансировки (none, monthly, quarterly или yearly)
+
+    Остальные поля и ответ — как у симуляции одного актива.
     """
     try:
         montecarlo_service: IMonteCarloService = request.app.state.services.montecarlo_service
         return await montecarlo_service.simulate(request_body)
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/sweep", response_model=MonteCarloSweepResponse)
+async def run_monte_carlo_sweep(
+    request_body: MonteCarloSweepRequest,
+    request: Request,
+) -> MonteCarloSweepResponse | HTTPException:
+    """Сетка симуляций Монте-Карло на общих случайных числах
+
+    - **avg_return**: Значения средней годовой доходности
+    - **risk**: Значения риска (стандартного отклонения)
+    - **monthly**: Значения ежемесячного пополнения
+
+    Шоки рисуются один раз и масштабируются под каждую ячейку, поэтому
+    соседние ячейки отличаются только параметрами, а не случайностью.
+    Каждая ячейка совпадает с обычной симуляцией с тем же сидом.
+    """
+    try:
+        montecarlo_service: IMonteCarloService = request.app.state.services.montecarlo_service
+        return await montecarlo_service.simulate_sweep(request_body)
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/stream", response_class=StreamingResponse)
+async def stream_monte_carlo(request_body: MonteCarloRequest, request: Request) -> StreamingResponse:
+    """Потоковая симуляция Монте-Карло в формате NDJSON
+
+    Первая строка — сводка (`type: summary`) со статистиками, перцентилями,
+    вероятностями и распределением. С `paths_output=raw` далее идут строки
+    `type: paths` с полем `offset` и пачкой сырых траекторий по мере
+    готовности чанков; в потоковом режиме статистики сырые пути недоступны.
+    """
+    montecarlo_service: IMonteCarloService = request.app.state.services.montecarlo_service
+    events = montecarlo_service.simulate_stream(request_body)
+    try:
+        summary = await anext(events)
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(_ndjson(summary, events), media_type="application/x-ndjson")
+
+
+@router.post("/events", response_class=StreamingResponse)
+async def monte_carlo_events(request_body: MonteCarloRequest, request: Request) -> StreamingResponse:
+    """Прогрессивная симуляция Монте-Карло в формате Server-Sent Events
+
+    После каждого чанка приходит событие `progress` с числом готовых путей
+    и текущими статистиками, перцентилями, вероятностями и стандартной
+    ошибкой; последнее событие — `result`. С `precision` поток завершается,
+    как только допуск достигнут. При отключении клиента симуляция
+    останавливается, а еще не начатые чанки снимаются с пула.
+    """
+    montecarlo_service: IMonteCarloService = request.app.state.services.montecarlo_service
+    events = montecarlo_service.simulate_progressive(request_body)
+    try:
+        first = await anext(events)
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        _sse(first, events, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/jobs", response_model=MonteCarloJobResponse, status_code=202)
+async def submit_monte_carlo_job(request_body: MonteCarloRequest, request: Request) -> MonteCarloJobResponse:
+    """Поставить симуляцию в фоновую очередь
+
+    Для долгих симуляций, которые не укладываются в таймаут шлюза.
+    Состояние доступно по `GET /jobs/{job_id}`, результат — по
+    `GET /jobs/{job_id}/result`, отмена — `DELETE /jobs/{job_id}`.
+    """
+    montecarlo_jobs: MonteCarloJobManager = request.app.state.services.montecarlo_jobs
+    try:
+        job = montecarlo_jobs.submit(request_body)
+    except ValueError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return _job_response(montecarlo_jobs, job)
+
+
+@router.get("/jobs/{job_id}", response_model=MonteCarloJobResponse)
+async def get_monte_carlo_job(job_id: str, request: Request) -> MonteCarloJobResponse:
+    """Статус и прогресс фоновой задачи по числу готовых чанков"""
+    montecarlo_jobs: MonteCarloJobManager = request.app.state.services.montecarlo_jobs
+    return _job_response(montecarlo_jobs, _find_job(montecarlo_jobs, job_id))
+
+
+@router.get("/jobs/{job_id}/result", response_model=MonteCarloResponse)
+async def get_monte_carlo_job_result(job_id: str, request: Request) -> MonteCarloResponse:
+    """Результат завершенной задачи; хранится ограниченное время"""
+    montecarlo_jobs: MonteCarloJobManager = request.app.state.services.montecarlo_jobs
+    job = _find_job(montecarlo_jobs, job_id)
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=400, detail=job.error)
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Задача не завершена: {job.status}")
+
+    return job.result
+
+
+@router.delete("/jobs/{job_id}", response_model=MonteCarloJobResponse)
+async def cancel_monte_carlo_job(job_id: str, request: Request) -> MonteCarloJobResponse:
+    """Отменить задачу; выполняемая задача останавливается после текущего чанка"""
+    montecarlo_jobs: MonteCarloJobManager = request.app.state.services.montecarlo_jobs
+    job = montecarlo_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена или срок хранения истек")
+
+    return _job_response(montecarlo_jobs, job)
+
+
+@router.post("/runs", response_model=MonteCarloRunResponse)
+async def create_monte_carlo_run(request_body: MonteCarloRequest, request: Request) -> MonteCarloRunResponse:
+    """Симуляция с сохранением прогона для продолжения
+
+    Сохраняются итоговые суммы путей и состояния ГСЧ, поэтому
+    `POST /runs/{run_id}/extend` добавляет годы или пути без пересчета
+    уже посчитанного. Поддерживаются выборки pseudo и antithetic.
+    """
+    try:
+        montecarlo_service: IMonteCarloService = request.app.state.services.montecarlo_service
+        return await montecarlo_service.create_run(request_body)
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/runs/{run_id}/extend", response_model=MonteCarloRunResponse)
+async def extend_monte_carlo_run(
+    run_id: str,
+    request_body: MonteCarloRunExtension,
+    request: Request,
+) -> MonteCarloRunResponse:
+    """Продолжить прогон: добавить годы к горизонту и/или новые пути
+
+    Результат сохраняется как новый прогон и совпадает со свежей
+    симуляцией с объединенными параметрами и тем же сидом.
+    """
+    try:
+        montecarlo_service: IMonteCarloService = request.app.state.services.montecarlo_service
+        response = await montecarlo_service.extend_run(run_id, request_body)
+    except MemoryBudgetExceededError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if response is None:
+        raise HTTPException(status_code=404, detail="Прогон не найден или срок хранения истек")
+    return response
+
+
+def _find_job(montecarlo_jobs: MonteCarloJobManager, job_id: str) -> MonteCarloJob:
+    job = montecarlo_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена или срок хранения истек")
+    return job
+
+
+def _job_response(montecarlo_jobs: MonteCarloJobManager, job: MonteCarloJob) -> MonteCarloJobResponse:
+    return MonteCarloJobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        progress=job.progress.fraction,
+        chunks_done=job.progress.chunks_done,
+        chunks_total=job.progress.chunks_total,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        expires_at=montecarlo_jobs.expires_at(job),
+        error=job.error,
+    )
+
+
+def _negotiate(accept: str) -> str | None:
+    """Бинарный формат из заголовка Accept или None для JSON"""
+    preferences = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            preferences.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(preferences):
+        if media_type in BINARY_MEDIA_TYPES:
+            return media_type
+        if media_type in {"application/json", "application/*", "*/*"}:
+            return None
+    return None
+
+
+async def _sse(
+    first: dict[str, Any],
+    events: AsyncIterator[dict[str, Any]],
+    request: Request,
+) -> AsyncIterator[str]:
+    try:
+        yield _sse_event(first)
+        async for event in events:
+            if await request.is_disconnected():
+                break
+            yield _sse_event(event)
+    finally:
+        await events.aclose()
+
+
+def _sse_event(event: dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _ndjson(first: dict[str, Any], events: AsyncIterator[dict[str, Any]]) -> AsyncIterator[str]:
+    try:
+        yield json.dumps(first) + "\n"
+        async for event in events:
+            yield json.dumps(event) + "\n"
+    finally:
+        await events.aclose()
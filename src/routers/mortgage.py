@@ -4,8 +4,11 @@ from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
 
+from models.schemas import BatchRequest
+from models.schemas import BatchResponse
 from models.schemas import MortgageRequest
 from models.schemas import MortgageResponse
+from services.interfaces import IBatchCalculator
 from services.interfaces import IFinancialCalculator
 
 
@@ -21,10 +24,32 @@ async def calculate_mortgage(request_body: MortgageRequest, request: Request) ->
     - **years**: Срок кредита в годах (1-50)
     - **rate**: Годовая процентная ставка (0.1-99%)
     - **payment_type**: Тип платежа (annuity или differentiated)
-    - **early_payments**: Досрочные погашения
+    - **early_payments**: Досрочные погашения (month, amount, type: reduce_term или reduce_payment)
+    - **detail**: Детализация ответа (summary — без графика, full — с графиком)
+    - **schedule_format**: Формат графика (rows или columns)
+    - **from_month**, **to_month**: Окно графика по месяцам (по умолчанию весь срок)
     """
     try:
         fin_calc: IFinancialCalculator = request.app.state.services.fin_calc
         return fin_calc.calculate_mortgage(request_body)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/batch", response_model=BatchResponse[MortgageResponse])
+async def calculate_mortgage_batch(
+    request_body: BatchRequest,
+    request: Request,
+) -> BatchResponse[MortgageResponse] | HTTPException:
+    """Пакетный расчет ипотек
+
+    - **items**: Запросы в формате одиночного эндпоинта (до 10000)
+
+    Возвращает итоги без графиков в порядке запросов; запрос с ошибкой
+    проверки получает поле error и не прерывает пакет.
+    """
+    try:
+        batch_calc: IBatchCalculator = request.app.state.services.batch_calc
+        return batch_calc.calculate_mortgage_batch(request_body.items)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -4,8 +4,11 @@ from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
 
+from models.schemas import BatchRequest
+from models.schemas import BatchResponse
 from models.schemas import SavingsRequest
 from models.schemas import SavingsResponse
+from services.interfaces import IBatchCalculator
 from services.interfaces import IFinancialCalculator
 
 
@@ -23,9 +26,29 @@ async def calculate_savings(request_body: SavingsRequest, request: Request) -> S
     - **capitalization**: Тип капитализации
     - **tax_rate**: Ставка налога на доход
     - **inflation**: Ожидаемая инфляция
+    - **detail**: Детализация ответа (summary — без годового отчета, full — с отчетом)
     """
     try:
         fin_calc: IFinancialCalculator = request.app.state.services.fin_calc
         return fin_calc.calculate_savings(request_body)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/batch", response_model=BatchResponse[SavingsResponse])
+async def calculate_savings_batch(
+    request_body: BatchRequest,
+    request: Request,
+) -> BatchResponse[SavingsResponse] | HTTPException:
+    """Пакетный расчет накоплений
+
+    - **items**: Запросы в формате одиночного эндпоинта (до 10000)
+
+    Возвращает итоги без графиков в порядке запросов; запрос с ошибкой
+    проверки получает поле error и не прерывает пакет.
+    """
+    try:
+        batch_calc: IBatchCalculator = request.app.state.services.batch_calc
+        return batch_calc.calculate_savings_batch(request_body.items)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -2,15 +2,25 @@ from __future__ import annotations
 
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import AsyncIterator
+from typing import Any
 
+from models.jobs import JobProgress
+from models.results import MonteCarloResult
+from models.schemas import BatchResponse
 from models.schemas import CompareRequest
 from models.schemas import CompareResponse
 from models.schemas import CreditRequest
 from models.schemas import CreditResponse
 from models.schemas import GoalRequest
 from models.schemas import GoalResponse
+from models.schemas import MonteCarloBaseRequest
 from models.schemas import MonteCarloRequest
 from models.schemas import MonteCarloResponse
+from models.schemas import MonteCarloRunExtension
+from models.schemas import MonteCarloRunResponse
+from models.schemas import MonteCarloSweepRequest
+from models.schemas import MonteCarloSweepResponse
 from models.schemas import MortgageRequest
 from models.schemas import MortgageResponse
 from models.schemas import SavingsRequest
@@ -35,9 +45,59 @@ class IFinancialCalculator(ABC):
         pass
 
 
+class IBatchCalculator(ABC):
+    @abstractmethod
+    def calculate_mortgage_batch(self, items: list[Any]) -> BatchResponse[MortgageResponse]:
+        pass
+
+    @abstractmethod
+    def calculate_credit_batch(self, items: list[Any]) -> BatchResponse[CreditResponse]:
+        pass
+
+    @abstractmethod
+    def calculate_savings_batch(self, items: list[Any]) -> BatchResponse[SavingsResponse]:
+        pass
+
+    @abstractmethod
+    def calculate_goal_batch(self, items: list[Any]) -> BatchResponse[GoalResponse]:
+        pass
+
+
 class IMonteCarloService(ABC):
     @abstractmethod
-    async def simulate(self, request: MonteCarloRequest) -> MonteCarloResponse:
+    async def simulate(
+        self,
+        request: MonteCarloBaseRequest,
+        progress: JobProgress | None = None,
+    ) -> MonteCarloResponse:
+        pass
+
+    @abstractmethod
+    async def simulate_arrays(
+        self,
+        request: MonteCarloBaseRequest,
+        progress: JobProgress | None = None,
+    ) -> MonteCarloResult:
+        pass
+
+    @abstractmethod
+    async def simulate_sweep(self, request: MonteCarloSweepRequest) -> MonteCarloSweepResponse:
+        pass
+
+    @abstractmethod
+    async def create_run(self, request: MonteCarloRequest) -> MonteCarloRunResponse:
+        pass
+
+    @abstractmethod
+    async def extend_run(self, run_id: str, extension: MonteCarloRunExtension) -> MonteCarloRunResponse | None:
+        pass
+
+    @abstractmethod
+    def simulate_stream(self, request: MonteCarloBaseRequest) -> AsyncIterator[dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def simulate_progressive(self, request: MonteCarloBaseRequest) -> AsyncIterator[dict[str, Any]]:
         pass
 
 
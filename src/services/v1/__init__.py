@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+from services.v1.batch_calculator import BatchCalculator
 from services.v1.compare_service import CompareService
 from services.v1.financial_calculator import FinancialCalculator
+from services.v1.montecarlo_service import MonteCarloExecutor
+from services.v1.montecarlo_service import MonteCarloJobManager
+from services.v1.montecarlo_service import MonteCarloRunStore
 from services.v1.montecarlo_service import MonteCarloService
 
 
 __all__ = [
+    "BatchCalculator",
     "CompareService",
     "FinancialCalculator",
+    "MonteCarloExecutor",
+    "MonteCarloJobManager",
+    "MonteCarloRunStore",
     "MonteCarloService",
 ]
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from pydantic import TypeAdapter
+from pydantic import ValidationError
+
+from models.enums import CapitalizationType
+from models.enums import DetailLevel
+from models.enums import PaymentType
+from models.schemas import BatchResponse
+from models.schemas import CreditRequest
+from models.schemas import CreditResponse
+from models.schemas import GoalRequest
+from models.schemas import GoalResponse
+from models.schemas import MortgageRequest
+from models.schemas import MortgageResponse
+from models.schemas import SavingsRequest
+from models.schemas import SavingsResponse
+from services.interfaces import IBatchCalculator
+from services.v1.financial_calculator import FinancialCalculator
+from services.v1.schedule_engine import ScheduleEngine
+
+
+MORTGAGE_REQUESTS = TypeAdapter(list[MortgageRequest])
+CREDIT_REQUESTS = TypeAdapter(list[CreditRequest])
+SAVINGS_REQUESTS = TypeAdapter(list[SavingsRequest])
+GOAL_REQUESTS = TypeAdapter(list[GoalRequest])
+
+MONTHS_PER_YEAR = 12
+PERIODS_PER_YEAR = {
+    CapitalizationType.DAILY: 365,
+    CapitalizationType.MONTHLY: MONTHS_PER_YEAR,
+    CapitalizationType.QUARTERLY: 4,
+    CapitalizationType.YEARLY: 1,
+    CapitalizationType.NONE: 0,
+}
+
+
+class BatchCalculator(IBatchCalculator):
+    """Пакетный расчет итогов калькуляторов
+
+    Пакет проверяется одним проходом TypeAdapter, а платежи и итоги
+    считаются массивами NumPy по всем запросам сразу по тем же формулам,
+    что и FinancialCalculator. Графики в пакете не строятся; ипотеки с
+    досрочными погашениями и запросы с окном графика считаются поштучно.
+    """
+
+    @staticmethod
+    def calculate_mortgage_batch(items: list[Any]) -> BatchResponse[MortgageResponse]:
+        return BatchResponse[MortgageResponse](
+            items=BatchCalculator._run(items, MORTGAGE_REQUESTS, BatchCalculator._mortgage_results),
+        )
+
+    @staticmethod
+    def calculate_credit_batch(items: list[Any]) -> BatchResponse[CreditResponse]:
+        return BatchResponse[CreditResponse](
+            items=BatchCalculator._run(items, CREDIT_REQUESTS, BatchCalculator._credit_results),
+        )
+
+    @staticmethod
+    def calculate_savings_batch(items: list[Any]) -> BatchResponse[SavingsResponse]:
+        return BatchResponse[SavingsResponse](
+            items=BatchCalculator._run(items, SAVINGS_REQUESTS, BatchCalculator._savings_results),
+        )
+
+    @staticmethod
+    def calculate_goal_batch(items: list[Any]) -> BatchResponse[GoalResponse]:
+        return BatchResponse[GoalResponse](
+            items=BatchCalculator._run(items, GOAL_REQUESTS, BatchCalculator._goal_results),
+        )
+
+    @staticmethod
+    def _run(
+        items: list[Any],
+        adapter: TypeAdapter,
+        compute: Callable[[list[Any]], list[dict[str, Any]]],
+    ) -> list[dict[str, Any]]:
+        """Результаты в порядке запросов: итоги для корректных, ошибки для остальных"""
+        requests, errors = BatchCalculator._validate(items, adapter)
+        results = dict(zip(requests, compute(list(requests.values())))) if requests else {}
+
+        return [
+            {"index": index, "result": results[index]} if index in results else {"index": index, "error": errors[index]}
+            for index in range(len(items))
+        ]
+
+    @staticmethod
+    def _validate(items: list[Any], adapter: TypeAdapter) -> tuple[dict[int, Any], dict[int, str]]:
+        """Проверка пакета одним проходом; при ошибках корректные запросы проверяются повторно"""
+        try:
+            return dict(enumerate(adapter.validate_python(items))), {}
+        except ValidationError as e:
+            messages: dict[int, list[str]] = {}
+            for error in e.errors(include_url=False):
+                index, *location = error["loc"]
+                field = ".".join(map(str, location))
+                messages.setdefault(index, []).append(f"{field}: {error['msg']}" if field else error["msg"])
+
+        indexes = [index for index in range(len(items)) if index not in messages]
+        requests = adapter.validate_python([items[index] for index in indexes])
+        return dict(zip(indexes, requests)), {index: "; ".join(errors) for index, errors in messages.items()}
+
+    @staticmethod
+    def _mortgage_results(requests: list[MortgageRequest]) -> list[dict[str, Any]]:
+        price = np.array([request.price for request in requests])
+        down_payment = np.array([request.down_payment for request in requests])
+        rate = np.array([request.rate for request in requests])
+        years = np.array([request.years for request in requests])
+        differentiated = np.array([request.payment_type == PaymentType.DIFFERENTIATED for request in requests])
+
+        loan_amount = price - down_payment
+        monthly_rate = rate / 100 / 12
+        months = years * 12
+        growth = (1 + monthly_rate) ** months
+        monthly_payment = np.where(
+            differentiated,
+            loan_amount / months + (loan_amount * monthly_rate),
+            loan_amount * ((monthly_rate * growth) / (growth - 1)),
+        )
+        total_payment = np.where(
+            differentiated,
+            loan_amount + loan_amount * monthly_rate * (months + 1) / 2,
+            monthly_payment * months,
+        )
+
+        results = BatchCalculator._rows(
+            loan_amount=ScheduleEngine.round_money(loan_amount),
+            monthly_payment=ScheduleEngine.round_money(monthly_payment),
+            total_payment=ScheduleEngine.round_money(total_payment),
+            total_interest=ScheduleEngine.round_money(total_payment - loan_amount),
+            term_months=months,
+        )
+        for index, request in enumerate(requests):
+            if request.early_payments or request.from_month or request.to_month:
+                results[index] = BatchCalculator._single(FinancialCalculator.calculate_mortgage, request)
+        return results
+
+    @staticmethod
+    def _credit_results(requests: list[CreditRequest]) -> list[dict[str, Any]]:
+        amount = np.array([request.amount for request in requests])
+        years = np.array([request.years for request in requests])
+        rate = np.array([request.rate for request in requests])
+        commission = np.array([request.commission for request in requests])
+        insurance = np.array([request.insurance for request in requests])
+        differentiated = np.array([request.payment_type == PaymentType.DIFFERENTIATED for request in requests])
+
+        months = (years * 12).astype(np.int64)
+        zero_rate = rate == 0
+        commission_amount = amount * (commission / 100)
+        effective_amount = amount - commission_amount
+        monthly_rate = rate / 100 / 12
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = (1 + monthly_rate) ** months
+            annuity_payment = effective_amount * ((monthly_rate * growth) / (growth - 1))
+        monthly_payment = np.where(
+            differentiated,
+            effective_amount / months + (effective_amount * monthly_rate),
+            annuity_payment,
+        )
+        monthly_insurance = np.where(insurance > 0, amount * (insurance / 100) / 12, 0.0)
+        payments_total = np.where(
+            differentiated,
+            effective_amount + effective_amount * monthly_rate * (months + 1) / 2,
+            monthly_payment * months,
+        )
+        total_payment = payments_total + monthly_insurance * months + commission_amount
+
+        results = BatchCalculator._rows(
+            monthly_payment=ScheduleEngine.round_money(
+                np.where(zero_rate, amount / months, monthly_payment + monthly_insurance),
+            ),
+            total_payment=ScheduleEngine.round_money(np.where(zero_rate, amount + commission_amount, total_payment)),
+            total_interest=ScheduleEngine.round_money(np.where(zero_rate, 0.0, total_payment - amount)),
+            effective_rate=np.where(
+                zero_rate,
+                commission + insurance,
+                ScheduleEngine.round_money(rate + commission + insurance),
+            ),
+            commission_amount=ScheduleEngine.round_money(commission_amount),
+        )
+        for index, request in enumerate(requests):
+            if request.from_month or request.to_month:
+                results[index] = BatchCalculator._single(FinancialCalculator.calculate_credit, request)
+        return results
+
+    @staticmethod
+    def _savings_results(requests: list[SavingsRequest]) -> list[dict[str, Any]]:
+        initial = np.array([request.initial for request in requests])
+        monthly = np.array([request.monthly for request in requests])
+        years = np.array([request.years for request in requests])
+        rate = np.array([request.rate for request in requests])
+        tax_rate = np.array([request.tax_rate for request in requests])
+        inflation = np.array([request.inflation for request in requests])
+        periods_per_year = np.array([PERIODS_PER_YEAR[request.capitalization] for request in requests])
+
+        annual_rate = rate / 100
+        months = years * 12
+        compound = (rate != 0) & (periods_per_year > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate_per_period = annual_rate / periods_per_year
+            total_periods = years * periods_per_year
+            payment_per_period = np.where(periods_per_year == MONTHS_PER_YEAR, monthly, monthly * 12 / periods_per_year)
+            compound_amount = initial * (1 + rate_per_period) ** total_periods + np.where(
+                payment_per_period > 0,
+                payment_per_period * ((1 + rate_per_period) ** total_periods - 1) / rate_per_period,
+                0.0,
+            )
+        simple_amount = initial + monthly * months + initial * annual_rate * years + monthly * annual_rate * years / 2
+        final_amount = np.where(
+            rate == 0, initial + monthly * months, np.where(compound, compound_amount, simple_amount)
+        )
+
+        total_contributions = initial + (monthly * months)
+        total_interest = final_amount - total_contributions
+        total_tax = total_interest * (tax_rate / 100)
+        real_amount = np.where(inflation > 0, final_amount * (1 - inflation / 100) ** years, final_amount)
+
+        return BatchCalculator._rows(
+            final_amount_nominal=ScheduleEngine.round_money(final_amount - total_tax),
+            final_amount_real=ScheduleEngine.round_money(real_amount - total_tax),
+            total_contributions=ScheduleEngine.round_money(total_contributions),
+            total_interest=ScheduleEngine.round_money(total_interest),
+            total_tax=ScheduleEngine.round_money(total_tax),
+        )
+
+    @staticmethod
+    def _goal_results(requests: list[GoalRequest]) -> list[dict[str, Any]]:
+        goal_amount = np.array([request.goal_amount for request in requests])
+        current_savings = np.array([request.current_savings for request in requests])
+        years = np.array([request.years for request in requests])
+        expected_rate = np.array([request.expected_rate for request in requests])
+        fixed = np.array([request.monthly_contribution is not None for request in requests])
+        contribution = np.array([request.monthly_contribution or 0.0 for request in requests])
+
+        months = years * 12
+        zero_rate = expected_rate == 0
+        monthly_rate = expected_rate / 100 / 12
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = (1 + monthly_rate) ** months
+            annuity_factor = (growth - 1) / monthly_rate
+            required_monthly = np.where(
+                zero_rate,
+                (goal_amount - current_savings) / months,
+                np.maximum((goal_amount - current_savings * growth) / annuity_factor, 0.0),
+            )
+            future_value = np.where(
+                zero_rate,
+                current_savings + contribution * months,
+                current_savings * growth + contribution * annuity_factor,
+            )
+
+        return [
+            {
+                "required_monthly": None if is_fixed else required,
+                "expected_final_amount": final if is_fixed else None,
+                "is_achievable": achievable,
+            }
+            for is_fixed, required, final, achievable in zip(
+                fixed.tolist(),
+                ScheduleEngine.round_money(required_monthly).tolist(),
+                ScheduleEngine.round_money(future_value).tolist(),
+                np.where(fixed, future_value >= goal_amount, required_monthly >= 0).tolist(),
+            )
+        ]
+
+    @staticmethod
+    def _rows(**columns: np.ndarray) -> list[dict[str, Any]]:
+        return [dict(zip(columns, values)) for values in zip(*(column.tolist() for column in columns.values()))]
+
+    @staticmethod
+    def _single(calculate: Callable[[Any], Any], request: Any) -> dict[str, Any]:
+        """Поштучный расчет итогов для запросов, которые не укладываются в массивы"""
+        return calculate(request.model_copy(update={"detail": DetailLevel.SUMMARY})).model_dump()
@@ -1,20 +1,40 @@
 from __future__ import annotations
 
+import numpy as np
+
+from pydantic import BaseModel
+from pydantic import TypeAdapter
+
 from models.enums import CapitalizationType
+from models.enums import DetailLevel
 from models.enums import PaymentType
+from models.enums import ScheduleFormat
+from models.results import AmortizationSchedule
 from models.schemas import CreditMonthPayment
+from models.schemas import CreditPeriodTotals
 from models.schemas import CreditRequest
 from models.schemas import CreditResponse
+from models.schemas import CreditScheduleColumns
 from models.schemas import GoalMonth
+from models.schemas import GoalMonthColumns
 from models.schemas import GoalRequest
 from models.schemas import GoalResponse
 from models.schemas import MortgageMonthPayment
 from models.schemas import MortgageRequest
 from models.schemas import MortgageResponse
+from models.schemas import MortgageScheduleColumns
+from models.schemas import PeriodTotals
 from models.schemas import SavingsRequest
 from models.schemas import SavingsResponse
 from models.schemas import SavingsYear
 from services.interfaces import IFinancialCalculator
+from services.v1.prepayment_engine import PrepaymentEngine
+from services.v1.schedule_engine import ScheduleEngine
+
+
+MORTGAGE_SCHEDULE = TypeAdapter(list[MortgageMonthPayment])
+CREDIT_SCHEDULE = TypeAdapter(list[CreditMonthPayment])
+GOAL_BREAKDOWN = TypeAdapter(list[GoalMonth])
 
 
 class FinancialCalculator(IFinancialCalculator):
@@ -30,26 +50,68 @@ class FinancialCalculator(IFinancialCalculator):
             months=months,
             payment_type=request.payment_type,
         )
-        total_payment = monthly_payment * months
-        total_interest = FinancialCalculator._calculate_total_interest(
-            total_payment=total_payment,
-            principal=loan_amount,
-        )
+        if request.early_payments:
+            return FinancialCalculator._calculate_mortgage_with_early_payments(
+                request=request,
+                loan_amount=loan_amount,
+                monthly_rate=monthly_rate,
+                months=months,
+                monthly_payment=monthly_payment,
+            )
 
-        schedule = FinancialCalculator._generate_mortgage_schedule(
-            loan_amount=loan_amount,
+        total_payment = ScheduleEngine.total_payment(
+            amount=loan_amount,
             monthly_rate=monthly_rate,
             months=months,
             payment_type=request.payment_type,
-            initial_monthly_payment=monthly_payment,
+            monthly_payment=monthly_payment,
+        )
+        total_interest = FinancialCalculator._calculate_total_interest(
+            total_payment=total_payment,
+            principal=loan_amount,
         )
 
+        period_totals = None
+        if request.from_month or request.to_month:
+            first_month, last_month = request.from_month or 1, request.to_month or months
+            principal, interest = ScheduleEngine.period_totals(
+                amount=loan_amount,
+                monthly_rate=monthly_rate,
+                months=months,
+                payment_type=request.payment_type,
+                monthly_payment=monthly_payment,
+                first_month=first_month,
+                last_month=last_month,
+            )
+            period_totals = PeriodTotals(
+                from_month=first_month,
+                to_month=last_month,
+                payment=round(principal + interest, 2),
+                principal=round(principal, 2),
+                interest=round(interest, 2),
+            )
+
+        schedule = None
+        if request.detail == DetailLevel.FULL:
+            schedule = FinancialCalculator._generate_mortgage_schedule(
+                loan_amount=loan_amount,
+                monthly_rate=monthly_rate,
+                months=months,
+                payment_type=request.payment_type,
+                initial_monthly_payment=monthly_payment,
+                schedule_format=request.schedule_format,
+                first_month=request.from_month or 1,
+                last_month=request.to_month or months,
+            )
+
         return MortgageResponse(
             loan_amount=round(loan_amount, 2),
             monthly_payment=round(monthly_payment, 2),
             total_payment=round(total_payment, 2),
             total_interest=round(total_interest, 2),
+            term_months=months,
             payment_schedule=schedule,
+            period_totals=period_totals,
         )
 
     @staticmethod
@@ -97,10 +159,12 @@ class FinancialCalculator(IFinancialCalculator):
             years=request.years,
         )
 
-        yearly_breakdown = FinancialCalculator._generate_yearly_savings_breakdown(
-            request=request,
-            annual_rate=annual_rate,
-        )
+        yearly_breakdown = None
+        if request.detail == DetailLevel.FULL:
+            yearly_breakdown = FinancialCalculator._generate_yearly_savings_breakdown(
+                request=request,
+                annual_rate=annual_rate,
+            )
 
         return SavingsResponse(
             final_amount_nominal=round(final_amount - total_tax, 2),
@@ -122,6 +186,29 @@ class FinancialCalculator(IFinancialCalculator):
             monthly_payment = request.amount / months
             total_payment = request.amount + commission_amount
 
+            period_totals = None
+            if request.from_month or request.to_month:
+                first_month, last_month = request.from_month or 1, request.to_month or months
+                principal = monthly_payment * (last_month - first_month + 1)
+                fees = commission_amount if first_month == 1 else 0.0
+                period_totals = CreditPeriodTotals(
+                    from_month=first_month,
+                    to_month=last_month,
+                    payment=round(principal + fees, 2),
+                    principal=round(principal, 2),
+                    interest=0,
+                    fees=round(fees, 2),
+                )
+
+            empty_schedule = None
+            if request.detail == DetailLevel.FULL:
+                empty_schedule = FinancialCalculator._schedule_output(
+                    columns={key: [] for key in CreditScheduleColumns.model_fields},
+                    schedule_format=request.schedule_format,
+                    rows=CREDIT_SCHEDULE,
+                    columns_model=CreditScheduleColumns,
+                )
+
             return CreditResponse(
                 monthly_payment=round(monthly_payment, 2),
                 total_payment=round(total_payment, 2),
@@ -129,7 +216,8 @@ class FinancialCalculator(IFinancialCalculator):
                 effective_rate=request.commission + request.insurance,
                 commission_amount=round(commission_amount, 2),
                 total_insurance=0,
-                payment_schedule=[],
+                payment_schedule=empty_schedule,
+                period_totals=period_totals,
             )
 
         monthly_rate = FinancialCalculator._calculate_monthly_rate(request.rate)
@@ -161,7 +249,13 @@ class FinancialCalculator(IFinancialCalculator):
         )
 
         base_total_payment = FinancialCalculator._calculate_credit_total_payment(
-            monthly_payment=monthly_payment,
+            payments_total=ScheduleEngine.total_payment(
+                amount=effective_amount,
+                monthly_rate=monthly_rate,
+                months=months,
+                payment_type=request.payment_type,
+                monthly_payment=monthly_payment,
+            ),
             monthly_insurance=monthly_insurance,
             months=months,
         )
@@ -177,15 +271,44 @@ class FinancialCalculator(IFinancialCalculator):
             insurance_rate=request.insurance,
         )
 
-        payment_schedule = FinancialCalculator._generate_credit_schedule(
-            effective_amount=effective_amount,
-            monthly_rate=monthly_rate,
-            months=months,
-            payment_type=request.payment_type,
-            monthly_payment=monthly_payment,
-            monthly_insurance=monthly_insurance,
-            commission_amount=commission_amount,
-        )
+        period_totals = None
+        if request.from_month or request.to_month:
+            first_month, last_month = request.from_month or 1, request.to_month or months
+            principal, interest = ScheduleEngine.period_totals(
+                amount=effective_amount,
+                monthly_rate=monthly_rate,
+                months=months,
+                payment_type=request.payment_type,
+                monthly_payment=monthly_payment,
+                first_month=first_month,
+                last_month=last_month,
+            )
+            fees = monthly_insurance * (last_month - first_month + 1)
+            if first_month == 1:
+                fees += commission_amount
+            period_totals = CreditPeriodTotals(
+                from_month=first_month,
+                to_month=last_month,
+                payment=round(principal + interest + fees, 2),
+                principal=round(principal, 2),
+                interest=round(interest, 2),
+                fees=round(fees, 2),
+            )
+
+        payment_schedule = None
+        if request.detail == DetailLevel.FULL:
+            payment_schedule = FinancialCalculator._generate_credit_schedule(
+                effective_amount=effective_amount,
+                monthly_rate=monthly_rate,
+                months=months,
+                payment_type=request.payment_type,
+                monthly_payment=monthly_payment,
+                monthly_insurance=monthly_insurance,
+                commission_amount=commission_amount,
+                schedule_format=request.schedule_format,
+                first_month=request.from_month or 1,
+                last_month=request.to_month or months,
+            )
 
         return CreditResponse(
             monthly_payment=round(monthly_payment + monthly_insurance, 2),
@@ -195,6 +318,7 @@ class FinancialCalculator(IFinancialCalculator):
             commission_amount=round(commission_amount, 2),
             total_insurance=round(monthly_insurance * months, 2),
             payment_schedule=payment_schedule,
+            period_totals=period_totals,
         )
 
     @staticmethod
@@ -204,72 +328,48 @@ class FinancialCalculator(IFinancialCalculator):
         )
         months = FinancialCalculator._years_to_months(request.years)
 
-        if request.expected_rate == 0:
-            if request.monthly_contribution is None:
+        required_monthly = None
+        future_value = None
+        if request.monthly_contribution is None:
+            if request.expected_rate == 0:
                 required_monthly = (request.goal_amount - request.current_savings) / months
-                monthly_breakdown = FinancialCalculator._generate_goal_monthly_breakdown(
+            else:
+                required_monthly = FinancialCalculator._calculate_required_monthly_contribution(
+                    goal_amount=request.goal_amount,
                     current_savings=request.current_savings,
-                    monthly_contribution=required_monthly,
-                    annual_rate=0,
+                    annual_rate=annual_rate,
                     months=months,
                 )
-                return GoalResponse(
-                    required_monthly=round(required_monthly, 2),
-                    expected_final_amount=None,
-                    monthly_breakdown=monthly_breakdown,
-                    is_achievable=required_monthly >= 0,
+            monthly_contribution = required_monthly
+            is_achievable = required_monthly >= 0
+        else:
+            if request.expected_rate == 0:
+                future_value = request.current_savings + request.monthly_contribution * months
+            else:
+                future_value = FinancialCalculator._calculate_expected_final_amount(
+                    current_savings=request.current_savings,
+                    monthly_contribution=request.monthly_contribution,
+                    annual_rate=annual_rate,
+                    months=months,
                 )
-            future_value = request.current_savings + request.monthly_contribution * months
-            monthly_breakdown = FinancialCalculator._generate_goal_monthly_breakdown(
-                current_savings=request.current_savings,
-                monthly_contribution=request.monthly_contribution,
-                annual_rate=0,
-                months=months,
-            )
-            return GoalResponse(
-                required_monthly=None,
-                expected_final_amount=round(future_value, 2),
-                monthly_breakdown=monthly_breakdown,
-                is_achievable=future_value >= request.goal_amount,
-            )
+            monthly_contribution = request.monthly_contribution
+            is_achievable = future_value >= request.goal_amount
 
-        if request.monthly_contribution is None:
-            required_monthly = FinancialCalculator._calculate_required_monthly_contribution(
-                goal_amount=request.goal_amount,
-                current_savings=request.current_savings,
-                annual_rate=annual_rate,
-                months=months,
-            )
+        monthly_breakdown = None
+        if request.detail == DetailLevel.FULL:
             monthly_breakdown = FinancialCalculator._generate_goal_monthly_breakdown(
                 current_savings=request.current_savings,
-                monthly_contribution=required_monthly,
+                monthly_contribution=monthly_contribution,
                 annual_rate=annual_rate,
                 months=months,
-            )
-            return GoalResponse(
-                required_monthly=round(required_monthly, 2),
-                expected_final_amount=None,
-                monthly_breakdown=monthly_breakdown,
-                is_achievable=required_monthly >= 0,
+                schedule_format=request.schedule_format,
             )
 
-        future_value = FinancialCalculator._calculate_expected_final_amount(
-            current_savings=request.current_savings,
-            monthly_contribution=request.monthly_contribution,
-            annual_rate=annual_rate,
-            months=months,
-        )
-        monthly_breakdown = FinancialCalculator._generate_goal_monthly_breakdown(
-            current_savings=request.current_savings,
-            monthly_contribution=request.monthly_contribution,
-            annual_rate=annual_rate,
-            months=months,
-        )
         return GoalResponse(
-            required_monthly=None,
-            expected_final_amount=round(future_value, 2),
+            required_monthly=None if required_monthly is None else round(required_monthly, 2),
+            expected_final_amount=None if future_value is None else round(future_value, 2),
             monthly_breakdown=monthly_breakdown,
-            is_achievable=future_value >= request.goal_amount,
+            is_achievable=is_achievable,
         )
 
     @staticmethod
@@ -304,6 +404,73 @@ class FinancialCalculator(IFinancialCalculator):
         principal_part = loan_amount / months
         return principal_part + (loan_amount * monthly_rate)
 
+    @staticmethod
+    def _calculate_mortgage_with_early_payments(
+        request: MortgageRequest,
+        loan_amount: float,
+        monthly_rate: float,
+        months: int,
+        monthly_payment: float,
+    ) -> MortgageResponse:
+        """Ипотека с досрочными погашениями: итоги по отрезкам, график только для окна"""
+        segments = PrepaymentEngine.segments(
+            amount=loan_amount,
+            monthly_rate=monthly_rate,
+            months=months,
+            payment_type=request.payment_type,
+            monthly_payment=monthly_payment,
+            early_payments=request.early_payments,
+        )
+        term_months = segments[-1].last_month
+        _, total_interest = PrepaymentEngine.period_totals(
+            segments=segments,
+            monthly_rate=monthly_rate,
+            payment_type=request.payment_type,
+            first_month=1,
+            last_month=term_months,
+        )
+        first_month, last_month = request.from_month or 1, request.to_month or months
+
+        period_totals = None
+        if request.from_month or request.to_month:
+            principal, interest = PrepaymentEngine.period_totals(
+                segments=segments,
+                monthly_rate=monthly_rate,
+                payment_type=request.payment_type,
+                first_month=first_month,
+                last_month=last_month,
+            )
+            period_totals = PeriodTotals(
+                from_month=first_month,
+                to_month=last_month,
+                payment=round(principal + interest, 2),
+                principal=round(principal, 2),
+                interest=round(interest, 2),
+            )
+
+        schedule = None
+        if request.detail == DetailLevel.FULL:
+            schedule = FinancialCalculator._mortgage_schedule_output(
+                schedule=PrepaymentEngine.amortize(
+                    segments=segments,
+                    monthly_rate=monthly_rate,
+                    payment_type=request.payment_type,
+                    first_month=first_month,
+                    last_month=last_month,
+                ),
+                schedule_format=request.schedule_format,
+            )
+
+        return MortgageResponse(
+            loan_amount=round(loan_amount, 2),
+            monthly_payment=round(monthly_payment, 2),
+            total_payment=round(loan_amount + total_interest, 2),
+            total_interest=round(total_interest, 2),
+            term_months=term_months,
+            payment_schedule=schedule,
+            period_totals=period_totals,
+        )
+
     @staticmethod
     def _generate_mortgage_schedule(
         loan_amount: float,
@@ -311,33 +478,51 @@ class FinancialCalculator(IFinancialCalculator):
         months: int,
         payment_type: PaymentType,
         initial_monthly_payment: float,
-    ) -> list[MortgageMonthPayment]:
-        schedule: list[MortgageMonthPayment] = []
-        balance = loan_amount
-        monthly_payment = initial_monthly_payment
-
-        for month in range(1, months + 1):
-            interest = balance * monthly_rate
-            principal = monthly_payment - interest
-
-            if payment_type == PaymentType.DIFFERENTIATED:
-                principal = loan_amount / months
-                interest = balance * monthly_rate
-                monthly_payment = principal + interest
-
-            balance -= principal
-
-            schedule.append(
-                MortgageMonthPayment(
-                    month=month,
-                    payment=round(monthly_payment, 2),
-                    principal=round(principal, 2),
-                    interest=round(interest, 2),
-                    balance=round(max(balance, 0), 2),
-                )
-            )
+        schedule_format: ScheduleFormat = ScheduleFormat.ROWS,
+        first_month: int = 1,
+        last_month: int | None = None,
+    ) -> list[MortgageMonthPayment] | MortgageScheduleColumns:
+        schedule = ScheduleEngine.amortize(
+            amount=loan_amount,
+            monthly_rate=monthly_rate,
+            months=months,
+            payment_type=payment_type,
+            monthly_payment=initial_monthly_payment,
+            first_month=first_month,
+            last_month=last_month,
+        )
+        return FinancialCalculator._mortgage_schedule_output(schedule, schedule_format)
+
+    @staticmethod
+    def _mortgage_schedule_output(
+        schedule: AmortizationSchedule,
+        schedule_format: ScheduleFormat,
+    ) -> list[MortgageMonthPayment] | MortgageScheduleColumns:
+        return FinancialCalculator._schedule_output(
+            columns={
+                "month": schedule.month.tolist(),
+                "payment": ScheduleEngine.round_money(schedule.payment).tolist(),
+                "principal": ScheduleEngine.round_money(schedule.principal).tolist(),
+                "interest": ScheduleEngine.round_money(schedule.interest).tolist(),
+                "balance": ScheduleEngine.round_money(schedule.balance).tolist(),
+            },
+            schedule_format=schedule_format,
+            rows=MORTGAGE_SCHEDULE,
+            columns_model=MortgageScheduleColumns,
+        )
 
-        return schedule
+    @staticmethod
+    def _schedule_output(
+        columns: dict[str, list],
+        schedule_format: ScheduleFormat,
+        rows: TypeAdapter,
+        columns_model: type[BaseModel],
+    ) -> list | BaseModel:
+        """График из готовых столбцов: модель со списками или список строк"""
+        if schedule_format == ScheduleFormat.COLUMNS:
+            return columns_model(**columns)
+
+        return rows.validate_python([dict(zip(columns, values)) for values in zip(*columns.values())])
 
     @staticmethod
     def _determine_periods_per_year(capitalization: CapitalizationType) -> int | None:
@@ -496,11 +681,11 @@ class FinancialCalculator(IFinancialCalculator):
 
     @staticmethod
     def _calculate_credit_total_payment(
-        monthly_payment: float,
+        payments_total: float,
         monthly_insurance: float,
         months: int,
     ) -> float:
-        return monthly_payment * months + monthly_insurance * months
+        return payments_total + monthly_insurance * months
 
     @staticmethod
     def _calculate_effective_rate(
@@ -519,40 +704,37 @@ class FinancialCalculator(IFinancialCalculator):
         monthly_payment: float,
         monthly_insurance: float,
         commission_amount: float,
-    ) -> list[CreditMonthPayment]:
-        schedule: list[CreditMonthPayment] = []
-        balance = effective_amount
-
-        for month in range(1, months + 1):
-            if payment_type == PaymentType.ANNUITY:
-                base_payment = monthly_payment
-                interest = balance * monthly_rate
-                principal = base_payment - interest
-            else:
-                principal = effective_amount / months
-                interest = balance * monthly_rate
-                base_payment = principal + interest
-
-            balance -= principal
-
-            fees = monthly_insurance
-            if month == 1 and commission_amount > 0:
-                fees += commission_amount
-
-            total_payment = base_payment + fees
-
-            schedule.append(
-                CreditMonthPayment(
-                    month=month,
-                    payment=round(total_payment, 2),
-                    principal=round(principal, 2),
-                    interest=round(interest, 2),
-                    fees=round(fees, 2),
-                    balance=round(max(balance, 0), 2),
-                )
-            )
+        schedule_format: ScheduleFormat = ScheduleFormat.ROWS,
+        first_month: int = 1,
+        last_month: int | None = None,
+    ) -> list[CreditMonthPayment] | CreditScheduleColumns:
+        schedule = ScheduleEngine.amortize(
+            amount=effective_amount,
+            monthly_rate=monthly_rate,
+            months=months,
+            payment_type=payment_type,
+            monthly_payment=monthly_payment,
+            first_month=first_month,
+            last_month=last_month,
+        )
 
-        return schedule
+        fees = np.full(len(schedule.month), monthly_insurance)
+        if len(fees) and first_month == 1 and commission_amount > 0:
+            fees[0] += commission_amount
+
+        return FinancialCalculator._schedule_output(
+            columns={
+                "month": schedule.month.tolist(),
+                "payment": ScheduleEngine.round_money(schedule.payment + fees).tolist(),
+                "principal": ScheduleEngine.round_money(schedule.principal).tolist(),
+                "interest": ScheduleEngine.round_money(schedule.interest).tolist(),
+                "fees": ScheduleEngine.round_money(fees).tolist(),
+                "balance": ScheduleEngine.round_money(schedule.balance).tolist(),
+            },
+            schedule_format=schedule_format,
+            rows=CREDIT_SCHEDULE,
+            columns_model=CreditScheduleColumns,
+        )
 
     @staticmethod
     def _calculate_required_monthly_contribution(
@@ -593,26 +775,34 @@ class FinancialCalculator(IFinancialCalculator):
         monthly_contribution: float,
         annual_rate: float,
         months: int,
-    ) -> list[GoalMonth]:
+        schedule_format: ScheduleFormat = ScheduleFormat.ROWS,
+    ) -> list[GoalMonth] | GoalMonthColumns:
         monthly_rate = annual_rate / 12 if annual_rate > 0 else 0
         balance = current_savings
         total_contributions = 0.0
-        breakdown: list[GoalMonth] = []
+        amounts: list[float] = []
+        contributions: list[float] = []
+        interests: list[float] = []
 
-        for month in range(1, months + 1):
+        for _ in range(months):
             balance += monthly_contribution
             total_contributions += monthly_contribution
 
             interest = balance * monthly_rate if monthly_rate > 0 else 0
             balance += interest
 
-            breakdown.append(
-                GoalMonth(
-                    month=month,
-                    amount=round(balance, 2),
-                    contributions=round(total_contributions, 2),
-                    interest=round(interest, 2),
-                )
-            )
-
-        return breakdown
+            amounts.append(round(balance, 2))
+            contributions.append(round(total_contributions, 2))
+            interests.append(round(interest, 2))
+
+        return FinancialCalculator._schedule_output(
+            columns={
+                "month": list(range(1, months + 1)),
+                "amount": amounts,
+                "contributions": contributions,
+                "interest": interests,
+            },
+            schedule_format=schedule_format,
+            rows=GOAL_BREAKDOWN,
+            columns_model=GoalMonthColumns,
+        )
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from services.v1.montecarlo_service.executor import MonteCarloExecutor
+from services.v1.montecarlo_service.jobs import MonteCarloJobManager
+from services.v1.montecarlo_service.montecarlo_service import MonteCarloService
+from services.v1.montecarlo_service.runs import MonteCarloRunStore
+
+
+__all__ = [
+    "MonteCarloExecutor",
+    "MonteCarloJobManager",
+    "MonteCarloRunStore",
+    "MonteCarloService",
+]
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import math
+
+from typing import Any
+
+import numpy as np
+
+
+SUMMARY_PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+DISTRIBUTION_BINS = 10
+MONTHS_PER_YEAR = 12
+
+
+class RunningStats:
+    """Среднее и дисперсия по Уэлфорду, минимум и максимум; сливаются без исходных данных"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+
+        batch = RunningStats()
+        batch.count = len(values)
+        batch.mean = float(np.mean(values))
+        batch.m2 = float(np.sum((values - batch.mean) ** 2))
+        batch.min = float(np.min(values))
+        batch.max = float(np.max(values))
+        self.merge(batch)
+
+    def merge(self, other: RunningStats) -> None:
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+class QuantileSketch:
+    """Сливаемый скетч квантилей с относительной точностью (по схеме DDSketch)
+
+    Значения раскладываются по логарифмическим корзинам ширины gamma,
+    поэтому любой квантиль восстанавливается с относительной ошибкой не
+    больше relative_accuracy при памяти, зависящей только от диапазона.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.005):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: dict[int, int] = {}
+        self.negative: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def update(self, values: np.ndarray) -> None:
+        self.count += len(values)
+        self.zero_count += int(np.count_nonzero(values == 0))
+        self._add(self.positive, values[values > 0])
+        self._add(self.negative, -values[values < 0])
+
+    def merge(self, other: QuantileSketch) -> None:
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def buckets(self) -> tuple[np.ndarray, np.ndarray]:
+        """Представители корзин по возрастанию и их веса"""
+        negative_keys = np.array(sorted(self.negative, reverse=True), dtype=np.int64)
+        positive_keys = np.array(sorted(self.positive), dtype=np.int64)
+
+        values = np.concatenate(
+            [
+                -self._value(negative_keys),
+                np.zeros(1 if self.zero_count else 0),
+                self._value(positive_keys),
+            ],
+        )
+        counts = np.concatenate(
+            [
+                np.array([self.negative[k] for k in negative_keys], dtype=np.int64),
+                np.array([self.zero_count] if self.zero_count else [], dtype=np.int64),
+                np.array([self.positive[k] for k in positive_keys], dtype=np.int64),
+            ],
+        )
+        return values, counts
+
+    def quantiles(self, qs: list[float]) -> list[float]:
+        values, counts = self.buckets()
+        cumulative = np.cumsum(counts)
+        ranks = np.asarray(qs, dtype=np.float64) * (self.count - 1)
+        indexes = np.searchsorted(cumulative, ranks, side="right")
+        return values[np.minimum(indexes, len(values) - 1)].tolist()
+
+    def _add(self, store: dict[int, int], magnitudes: np.ndarray) -> None:
+        if len(magnitudes) == 0:
+            return
+
+        keys = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        unique, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(unique.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def _value(self, keys: np.ndarray) -> np.ndarray:
+        return 2 * self.gamma ** keys.astype(np.float64) / (self.gamma + 1)
+
+
+class FinalsAccumulator:
+    """Потоковая сводка по итоговым суммам без хранения массивов
+
+    Сливается по чанкам и отдает те же разделы, что и точный расчет:
+    statistics, percentiles, probabilities и distribution.
+    """
+
+    def __init__(
+        self,
+        total_contributions: float,
+        initial: float,
+        goal_amount: float | None,
+        group_size: int = 1,
+        relative_accuracy: float = 0.005,
+    ):
+        self.total_contributions = total_contributions
+        self.initial = initial
+        self.goal_amount = goal_amount
+        self.group_size = group_size
+        self.stats = RunningStats()
+        self.group_means = RunningStats()
+        self.group_reach_goal = RunningStats()
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.loss_count = 0
+        self.negative_return_count = 0
+        self.reach_goal_count = 0
+
+    def update(self, final_array: np.ndarray) -> None:
+        """Добавить итоговые суммы; массив начинается на границе группы"""
+        self.stats.update(final_array)
+        self.sketch.update(final_array)
+        self.loss_count += int(np.count_nonzero(final_array < self.total_contributions))
+        self.negative_return_count += int(np.count_nonzero(final_array < self.initial))
+
+        groups = np.arange(len(final_array)) // self.group_size
+        counts = np.bincount(groups)
+        self.group_means.update(np.bincount(groups, weights=final_array) / counts)
+
+        if self.goal_amount:
+            reach_goal = final_array >= self.goal_amount
+            self.reach_goal_count += int(np.count_nonzero(reach_goal))
+            self.group_reach_goal.update(np.bincount(groups, weights=reach_goal * 100.0) / counts)
+
+    def merge(self, other: FinalsAccumulator) -> None:
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+        self.loss_count += other.loss_count
+        self.negative_return_count += other.negative_return_count
+        self.reach_goal_count += other.reach_goal_count
+        self.group_means.merge(other.group_means)
+        self.group_reach_goal.merge(other.group_reach_goal)
+
+    def summary(self) -> dict[str, Any]:
+        count = self.stats.count
+        percentile_values = self.sketch.quantiles([q / 100 for q in SUMMARY_PERCENTILES])
+
+        probabilities: dict[str, float] = {
+            "loss": self.loss_count / count * 100,
+            "negative_return": self.negative_return_count / count * 100,
+        }
+        standard_error = {"mean": self._standard_error(self.group_means)}
+        if self.goal_amount:
+            probabilities["reach_goal"] = self.reach_goal_count / count * 100
+            standard_error["reach_goal"] = self._standard_error(self.group_reach_goal)
+
+        return {
+            "statistics": {
+                "median": self.sketch.quantiles([0.5])[0],
+                "mean": self.stats.mean,
+                "std": self.stats.std,
+                "min": self.stats.min,
+                "max": self.stats.max,
+            },
+            "percentiles": {str(q): value for q, value in zip(SUMMARY_PERCENTILES, percentile_values)},
+            "probabilities": probabilities,
+            "distribution": self._distribution(),
+            "standard_error": standard_error,
+        }
+
+    @staticmethod
+    def _standard_error(group_stats: RunningStats) -> float | None:
+        if group_stats.count <= 1:
+            return None
+        return math.sqrt(group_stats.m2 / (group_stats.count - 1) / group_stats.count)
+
+    def _distribution(self) -> list[dict]:
+        values, counts = self.sketch.buckets()
+        values = np.clip(values, self.stats.min, self.stats.max)
+        hist, bins = np.histogram(
+            values,
+            bins=DISTRIBUTION_BINS,
+            range=(self.stats.min, self.stats.max),
+            weights=counts,
+        )
+
+        return [
+            {
+                "range": f"{bins[i]:.0f}-{bins[i + 1]:.0f}",
+                "count": int(hist[i]),
+                "percent": float(hist[i] / self.stats.count * 100),
+            }
+            for i in range(len(hist))
+        ]
+
+
+class PathMetricsAccumulator:
+    """Сводка по месяцу первого достижения цели и максимальной просадке путей
+
+    Месяцы достижения хранятся точной гистограммой по месяцам горизонта
+    (последняя корзина — цель не достигнута), просадки — скетчем
+    квантилей, поэтому аккумулятор сливается по чанкам в любом режиме.
+    """
+
+    def __init__(self, months: int, goal_amount: float | None, relative_accuracy: float = 0.005):
+        self.months = months
+        self.goal_amount = goal_amount
+        self.goal_counts = np.zeros(months + 2, dtype=np.int64)
+        self.drawdowns = RunningStats()
+        self.drawdown_sketch = QuantileSketch(relative_accuracy)
+
+    def update(self, goal_months: np.ndarray, max_drawdowns: np.ndarray) -> None:
+        """goal_months: месяц первого достижения цели или -1; max_drawdowns: просадки в долях"""
+        if self.goal_amount:
+            self.goal_counts += np.bincount(
+                np.where(goal_months < 0, self.months + 1, goal_months), minlength=self.months + 2
+            )
+        self.drawdowns.update(max_drawdowns)
+        self.drawdown_sketch.update(max_drawdowns)
+
+    def merge(self, other: PathMetricsAccumulator) -> None:
+        self.goal_counts += other.goal_counts
+        self.drawdowns.merge(other.drawdowns)
+        self.drawdown_sketch.merge(other.drawdown_sketch)
+
+    def summary(self) -> dict[str, Any]:
+        drawdown_percentiles = self.drawdown_sketch.quantiles([q / 100 for q in SUMMARY_PERCENTILES])
+        summary: dict[str, Any] = {
+            "time_to_goal": None,
+            "max_drawdown": {
+                "mean": self.drawdowns.mean * 100,
+                "median": self.drawdown_sketch.quantiles([0.5])[0] * 100,
+                "max": self.drawdowns.max * 100,
+                "percentiles": {str(q): value * 100 for q, value in zip(SUMMARY_PERCENTILES, drawdown_percentiles)},
+            },
+        }
+        if self.goal_amount:
+            summary["time_to_goal"] = self._time_to_goal()
+        return summary
+
+    def _time_to_goal(self) -> dict[str, Any]:
+        """Перцентили месяца достижения по всем путям: None, если к нему цель еще не достигнута"""
+        count = self.drawdowns.count
+        reached_counts = self.goal_counts[:-1]
+        reached = int(reached_counts.sum())
+
+        ranks = np.asarray(SUMMARY_PERCENTILES, dtype=np.float64) / 100 * (count - 1)
+        indexes = np.searchsorted(np.cumsum(self.goal_counts), ranks, side="right")
+        percentiles = {str(q): int(i) if i <= self.months else None for q, i in zip(SUMMARY_PERCENTILES, indexes)}
+
+        month_years = np.maximum(np.ceil(np.arange(self.months + 1) / MONTHS_PER_YEAR), 1).astype(np.int64) - 1
+        yearly = np.bincount(month_years, weights=reached_counts)
+        edges = np.arange(len(yearly) + 1) * MONTHS_PER_YEAR
+
+        return {
+            "reached": reached / count * 100,
+            "mean_months": float(np.arange(self.months + 1) @ reached_counts / reached) if reached else None,
+            "percentiles": percentiles,
+            "distribution": [
+                {
+                    "range": f"{edges[i]}-{edges[i + 1]}",
+                    "count": int(yearly[i]),
+                    "percent": float(yearly[i] / count * 100),
+                }
+                for i in range(len(yearly))
+            ],
+        }
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+
+from typing import Any
+
+import numpy as np
+
+from models.enums import PathsOutput
+from models.results import MonteCarloResult
+from models.schemas import MonteCarloBaseRequest
+
+
+NPY_MEDIA_TYPE = "application/x-npy"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+HEADER_SUMMARY_KEYS = ("statistics", "percentiles", "probabilities", "standard_error", "downgrades")
+
+
+class NothingToEncodeError(ValueError):
+    """В результате нет матриц для бинарного формата"""
+
+    def __init__(self):
+        super().__init__("Бинарные форматы передают матрицы: нужны paths_output=bands или raw либо sample_paths > 0")
+
+
+class MonteCarloEncoder:
+    """Бинарные представления матриц симуляции
+
+    Полосы, репрезентативные траектории и сырые пути уходят непрерывными
+    буферами NumPy в точности хранения. Полная сводка идет вместе с
+    матрицами: последним массивом .npy или метаданными схемы Arrow.
+    """
+
+    @staticmethod
+    def arrow_available() -> bool:
+        return importlib.util.find_spec("pyarrow") is not None
+
+    @staticmethod
+    def check_request(request: MonteCarloBaseRequest) -> None:
+        """Отклонить запрос без матриц до запуска симуляции"""
+        if request.paths_output == PathsOutput.NONE and not request.sample_paths:
+            raise NothingToEncodeError
+
+    @staticmethod
+    def matrices(result: MonteCarloResult) -> dict[str, np.ndarray]:
+        """Имеющиеся матрицы в порядке передачи: полосы, репрезентативные траектории, пути"""
+        matrices = {
+            "bands": result.bands,
+            "sample_paths": result.sample_paths,
+            "paths": result.paths,
+        }
+        matrices = {name: np.ascontiguousarray(matrix) for name, matrix in matrices.items() if matrix is not None}
+        if not matrices:
+            raise NothingToEncodeError
+        return matrices
+
+    @staticmethod
+    def summary_json(result: MonteCarloResult) -> str:
+        return json.dumps(MonteCarloEncoder._summary(result))
+
+    @staticmethod
+    def summary_header(result: MonteCarloResult) -> str:
+        """Ограниченная часть сводки для заголовка: без распределения, хода сходимости и метрик путей"""
+        summary = MonteCarloEncoder._summary(result)
+        return json.dumps(
+            {key: summary[key] for key in ("seed", "band_percentiles", *HEADER_SUMMARY_KEYS) if key in summary}
+            | {"arrays": [*MonteCarloEncoder.matrices(result), "summary"]},
+        )
+
+    @staticmethod
+    def to_npy(result: MonteCarloResult) -> bytes:
+        """Подряд идущие массивы .npy в порядке заголовка `arrays`
+
+        Последний массив — полная сводка в JSON как байты uint8. Читаются
+        последовательными вызовами np.load на одном файловом объекте.
+        """
+        buffer = io.BytesIO()
+        for matrix in MonteCarloEncoder.matrices(result).values():
+            np.save(buffer, matrix, allow_pickle=False)
+        summary = np.frombuffer(MonteCarloEncoder.summary_json(result).encode(), dtype=np.uint8)
+        np.save(buffer, summary, allow_pickle=False)
+        return buffer.getvalue()
+
+    @staticmethod
+    def to_arrow(result: MonteCarloResult) -> bytes:
+        """Arrow IPC stream: строка на траекторию, по пакету записей на матрицу
+
+        Колонки: `kind` (bands, sample_paths или paths), `index` — номер
+        строки в матрице и `values` — траектория фиксированной длины.
+        Значения оборачивают плоский буфер матрицы без копирования и
+        хранятся в точности путей; полосы при float32 приводятся к ней же.
+        Сводка лежит в метаданных схемы.
+        """
+        import pyarrow as pa
+
+        matrices = MonteCarloEncoder.matrices(result)
+        stored = [matrix for name, matrix in matrices.items() if name != "bands"]
+        dtype = stored[0].dtype if stored else next(iter(matrices.values())).dtype
+        months = next(iter(matrices.values())).shape[1]
+
+        schema = pa.schema(
+            [
+                ("kind", pa.string()),
+                ("index", pa.int32()),
+                ("values", pa.list_(pa.from_numpy_dtype(dtype), months)),
+            ],
+            metadata={"summary": MonteCarloEncoder.summary_json(result)},
+        )
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for name, matrix in matrices.items():
+                rows = len(matrix)
+                values = np.ascontiguousarray(matrix, dtype=dtype).ravel()
+                writer.write_batch(
+                    pa.record_batch(
+                        [
+                            pa.repeat(name, rows),
+                            pa.array(np.arange(rows, dtype=np.int32)),
+                            pa.FixedSizeListArray.from_arrays(pa.array(values), months),
+                        ],
+                        schema=schema,
+                    ),
+                )
+        return sink.getvalue().to_pybytes()
+
+    @staticmethod
+    def _summary(result: MonteCarloResult) -> dict[str, Any]:
+        return {
+            "seed": result.seed,
+            "band_percentiles": result.band_percentiles,
+            **result.summary,
+        }
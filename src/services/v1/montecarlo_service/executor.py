@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import multiprocessing
+import os
+
+from collections.abc import Callable
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+
+import numpy as np
+
+from models.enums import ExecutorType
+from services.v1.montecarlo_service.path_engine import PathEngine
+from services.v1.montecarlo_service.path_engine import PathParameters
+from settings import Settings
+
+
+def _warm_up() -> None:
+    PathEngine.simulate_paths(
+        params=PathParameters(
+            initial=1.0,
+            monthly_contribution=1.0,
+            monthly_rate=0.0,
+            monthly_risk=0.01,
+            months=12,
+        ),
+        simulations=8,
+        streams=[np.random.SeedSequence()],
+    )
+
+
+def _noop() -> None:
+    return None
+
+
+class MonteCarloExecutor:
+    """Постоянный пул воркеров для симуляций Монте-Карло
+
+    Пул создается один раз на процесс приложения, воркеры прогреваются
+    при старте, а размер чанков подбирается по объему «путь × месяц».
+    """
+
+    def __init__(
+        self,
+        executor_type: ExecutorType = ExecutorType.PROCESS,
+        workers: int | None = None,
+        chunk_cells: int = 2_000_000,
+        parallel_threshold: int = 200_000,
+    ):
+        self.executor_type = executor_type
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_cells = chunk_cells
+        self.parallel_threshold = parallel_threshold
+        self._pool: Executor | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> MonteCarloExecutor:
+        return cls(
+            executor_type=settings.montecarlo_executor,
+            workers=settings.montecarlo_workers,
+            chunk_cells=settings.montecarlo_chunk_cells,
+            parallel_threshold=settings.montecarlo_parallel_threshold,
+        )
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+
+        if self.executor_type == ExecutorType.PROCESS:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_up,
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="montecarlo",
+            )
+
+        wait([self._pool.submit(_noop) for _ in range(self.workers)])
+
+    def shutdown(self) -> None:
+        if self._pool is None:
+            return
+
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+
+    def plan_chunks(self, simulations: int, months: int, block_size: int = 1) -> list[int]:
+        """Размеры чанков в путях, кратные block_size (кроме последнего)"""
+        cells = simulations * months
+        blocks = math.ceil(simulations / block_size)
+
+        count = 1
+        if cells >= self.parallel_threshold:
+            count = max(self.workers, math.ceil(cells / self.chunk_cells))
+        count = max(1, min(count, blocks))
+
+        base, remainder = divmod(blocks, count)
+        sizes = [(base + (1 if i < remainder else 0)) * block_size for i in range(count)]
+        sizes[-1] -= sum(sizes) - simulations
+        return sizes
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pool is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, fn, *args)
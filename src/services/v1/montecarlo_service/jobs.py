@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+
+from datetime import datetime
+from datetime import timedelta
+
+from models.enums import JobStatus
+from models.jobs import JobCancelledError
+from models.jobs import MonteCarloJob
+from models.schemas import MonteCarloBaseRequest
+from services.interfaces import IMonteCarloService
+from settings import Settings
+
+
+FINISHED_STATUSES = frozenset({JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED})
+
+
+class MonteCarloJobManager:
+    """Очередь фоновых симуляций Монте-Карло внутри процесса
+
+    Задачи выполняют несколько асинхронных воркеров поверх общего пула
+    MonteCarloExecutor. Прогресс считается по готовым чанкам, отмена
+    срабатывает между чанками, а завершенные задачи хранятся ttl секунд.
+    """
+
+    def __init__(
+        self,
+        service: IMonteCarloService,
+        concurrency: int = 2,
+        ttl_seconds: float = 3600,
+        max_jobs: int = 1000,
+    ):
+        self.service = service
+        self.concurrency = concurrency
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_jobs = max_jobs
+        self._jobs: dict[str, MonteCarloJob] = {}
+        self._queue: asyncio.Queue[MonteCarloJob] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    @classmethod
+    def from_settings(cls, service: IMonteCarloService, settings: Settings) -> MonteCarloJobManager:
+        return cls(
+            service=service,
+            concurrency=settings.montecarlo_job_concurrency,
+            ttl_seconds=settings.montecarlo_job_ttl_seconds,
+            max_jobs=settings.montecarlo_max_jobs,
+        )
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> None:
+        if self._workers:
+            return
+
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def shutdown(self) -> None:
+        for job in self._jobs.values():
+            job.progress.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def submit(self, request: MonteCarloBaseRequest) -> MonteCarloJob:
+        self.start()
+        self._purge_expired()
+        if len(self._jobs) >= self.max_jobs:
+            raise ValueError(f"Очередь задач заполнена: не больше {self.max_jobs} задач")
+
+        job = MonteCarloJob(
+            job_id=uuid.uuid4().hex,
+            request=request,
+            created_at=datetime.now().astimezone(),
+        )
+        self._jobs[job.job_id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> MonteCarloJob | None:
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> MonteCarloJob | None:
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+
+        job.progress.cancel()
+        if job.status == JobStatus.QUEUED:
+            self._finish(job, JobStatus.CANCELLED)
+        return job
+
+    def expires_at(self, job: MonteCarloJob) -> datetime | None:
+        return None if job.finished_at is None else job.finished_at + self.ttl
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == JobStatus.QUEUED:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: MonteCarloJob) -> None:
+        job.status = JobStatus.RUNNING
+        try:
+            job.result = await self.service.simulate(job.request, job.progress)
+        except JobCancelledError:
+            self._finish(job, JobStatus.CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, JobStatus.FAILED)
+        else:
+            self._finish(job, JobStatus.COMPLETED)
+
+    @staticmethod
+    def _finish(job: MonteCarloJob, status: JobStatus) -> None:
+        job.status = status
+        job.finished_at = datetime.now().astimezone()
+
+    def _purge_expired(self) -> None:
+        now = datetime.now().astimezone()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at + self.ttl <= now
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
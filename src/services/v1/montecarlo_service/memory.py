@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+import numpy as np
+
+from models.enums import MemoryPolicy
+from models.enums import PathDtype
+from models.enums import PathsOutput
+from models.enums import StatisticsMode
+from models.schemas import MonteCarloBaseRequest
+from models.schemas import MonteCarloSweepRequest
+from services.v1.montecarlo_service.path_engine import PATH_BLOCK_SIZE
+from settings import Settings
+
+
+PYTHON_FLOAT_BYTES = 32
+FLOAT64_BYTES = 8
+
+
+class MemoryBudgetExceededError(ValueError):
+    """Запрос не укладывается в бюджет памяти даже после понижения"""
+
+
+class MemoryBudget:
+    """Оценка пиковой памяти запроса до запуска симуляции
+
+    Запрос сверх бюджета отклоняется или, в режиме downgrade,
+    последовательно упрощается: траектории хранятся во float32, сырые
+    пути заменяются полосами, затем траектории не хранятся вовсе.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: int,
+        policy: MemoryPolicy = MemoryPolicy.DOWNGRADE,
+        workers: int = 1,
+    ):
+        self.budget_bytes = budget_bytes
+        self.policy = policy
+        self.workers = workers
+
+    @classmethod
+    def from_settings(cls, settings: Settings, workers: int) -> MemoryBudget:
+        return cls(
+            budget_bytes=settings.montecarlo_memory_budget_mb * 2**20,
+            policy=settings.montecarlo_memory_policy,
+            workers=workers,
+        )
+
+    def estimate(self, request: MonteCarloBaseRequest) -> int:
+        """Пиковый объем в байтах: буферы воркеров, разделяемая матрица путей и ее копии"""
+        months = request.years * 12
+        workers_bytes = self.workers * (1 + 2 * request.assets) * months * PATH_BLOCK_SIZE * FLOAT64_BYTES
+        if request.statistics_mode == StatisticsMode.STREAMING:
+            return workers_bytes
+
+        finals_bytes = 2 * request.simulations * FLOAT64_BYTES
+        if request.paths_output == PathsOutput.NONE and not request.sample_paths:
+            return workers_bytes + finals_bytes
+
+        cells = request.simulations * (months + 1)
+        itemsize = np.dtype(request.path_dtype).itemsize
+        total = workers_bytes + finals_bytes + cells * itemsize
+        if request.paths_output != PathsOutput.NONE:
+            total += cells * itemsize
+        if request.paths_output == PathsOutput.RAW:
+            total += cells * (itemsize + PYTHON_FLOAT_BYTES)
+        return total
+
+    def estimate_finals(self, request: MonteCarloBaseRequest) -> int:
+        """Пиковый объем запроса, который хранит только итоговые суммы путей"""
+        return self.estimate(request.model_copy(update={"paths_output": PathsOutput.NONE, "sample_paths": 0}))
+
+    def estimate_stream(self, request: MonteCarloBaseRequest) -> int:
+        """Пиковый объем потока: итоговые суммы, пачки путей в работе и одна пачка в виде списков"""
+        total = self.estimate_finals(request)
+        if request.paths_output == PathsOutput.RAW:
+            batch = PATH_BLOCK_SIZE * (request.years * 12 + 1)
+            total += batch * (self.workers * np.dtype(request.path_dtype).itemsize + PYTHON_FLOAT_BYTES)
+        return total
+
+    def estimate_sweep(self, request: MonteCarloSweepRequest) -> int:
+        """Пиковый объем сетки: шоки и состояния ячеек в воркерах, итоги ячеек и их копии"""
+        months = request.years * 12
+        workers_bytes = self.workers * (months + 2 * request.cells) * PATH_BLOCK_SIZE * FLOAT64_BYTES
+        finals_bytes = 3 * request.cells * request.simulations * FLOAT64_BYTES
+        return workers_bytes + finals_bytes
+
+    def apply(
+        self,
+        request: MonteCarloBaseRequest,
+        estimate: Callable[[MonteCarloBaseRequest], int] | None = None,
+    ) -> tuple[MonteCarloBaseRequest, list[str]]:
+        """Запрос, укладывающийся в бюджет, и список примененных понижений"""
+        estimate = estimate or self.estimate
+        downgrades: list[str] = []
+        if estimate(request) <= self.budget_bytes:
+            return request, downgrades
+
+        if self.policy == MemoryPolicy.DOWNGRADE:
+            for update, note in self._downgrade_steps(request):
+                request = request.model_copy(update=update)
+                downgrades.append(note)
+                if estimate(request) <= self.budget_bytes:
+                    return request, downgrades
+
+        raise self._exceeded(estimate(request))
+
+    def check(self, required_bytes: int) -> None:
+        """Отклонить запрос сверх бюджета, когда понижать в нем нечего"""
+        if required_bytes > self.budget_bytes:
+            raise self._exceeded(required_bytes)
+
+    def _exceeded(self, required_bytes: int) -> MemoryBudgetExceededError:
+        return MemoryBudgetExceededError(
+            f"Запрос требует около {required_bytes / 2**20:.0f} МБ памяти "
+            f"при бюджете {self.budget_bytes / 2**20:.0f} МБ",
+        )
+
+    @staticmethod
+    def _downgrade_steps(request: MonteCarloBaseRequest) -> list[tuple[dict, str]]:
+        steps = []
+        if request.path_dtype != PathDtype.FLOAT32:
+            steps.append(({"path_dtype": PathDtype.FLOAT32}, "path_dtype=float32"))
+        if request.paths_output == PathsOutput.RAW:
+            steps.append(({"paths_output": PathsOutput.BANDS}, "paths_output=bands"))
+        if request.paths_output != PathsOutput.NONE or request.sample_paths:
+            steps.append(
+                ({"paths_output": PathsOutput.NONE, "sample_paths": 0}, "paths_output=none, sample_paths=0"),
+            )
+        return steps
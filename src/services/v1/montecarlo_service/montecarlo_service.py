@@ -0,0 +1,1073 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import math
+import time
+
+from collections import deque
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+
+from models.enums import PathsOutput
+from models.enums import PrecisionMetric
+from models.enums import RebalancingFrequency
+from models.enums import ReturnModel
+from models.enums import SamplingScheme
+from models.enums import StatisticsMode
+from models.jobs import JobProgress
+from models.results import MonteCarloResult
+from models.results import MonteCarloRun
+from models.schemas import MAX_EXACT_SIMULATIONS
+from models.schemas import MonteCarloBaseRequest
+from models.schemas import MonteCarloPrecision
+from models.schemas import MonteCarloRequest
+from models.schemas import MonteCarloResponse
+from models.schemas import MonteCarloRunExtension
+from models.schemas import MonteCarloRunResponse
+from models.schemas import MonteCarloSweepCell
+from models.schemas import MonteCarloSweepRequest
+from models.schemas import MonteCarloSweepResponse
+from models.schemas import PortfolioMonteCarloRequest
+from services.interfaces import IMonteCarloService
+from services.v1.montecarlo_service.accumulators import SUMMARY_PERCENTILES
+from services.v1.montecarlo_service.accumulators import FinalsAccumulator
+from services.v1.montecarlo_service.accumulators import PathMetricsAccumulator
+from services.v1.montecarlo_service.executor import MonteCarloExecutor
+from services.v1.montecarlo_service.memory import MemoryBudget
+from services.v1.montecarlo_service.path_engine import PATH_BLOCK_SIZE
+from services.v1.montecarlo_service.path_engine import STREAM_BLOCK_SIZE
+from services.v1.montecarlo_service.path_engine import BlockStream
+from services.v1.montecarlo_service.path_engine import PathEngine
+from services.v1.montecarlo_service.path_engine import PathParameters
+from services.v1.montecarlo_service.path_engine import PortfolioParameters
+from services.v1.montecarlo_service.path_engine import SweepParameters
+from services.v1.montecarlo_service.path_engine import load_returns
+from services.v1.montecarlo_service.runs import MonteCarloRunStore
+from services.v1.montecarlo_service.shared_buffer import SharedPathBuffer
+from services.v1.montecarlo_service.shared_buffer import SharedPathTarget
+from settings import settings
+
+
+ADAPTIVE_INITIAL_SIMULATIONS = 2 * STREAM_BLOCK_SIZE
+ADAPTIVE_MAX_GROWTH = 4.0
+CONFIDENCE_Z = 1.959964
+REBALANCE_MONTHS = {
+    RebalancingFrequency.NONE: 0,
+    RebalancingFrequency.MONTHLY: 1,
+    RebalancingFrequency.QUARTERLY: 3,
+    RebalancingFrequency.YEARLY: 12,
+}
+COVARIANCE_TOLERANCE = 1e-12
+
+
+class MonteCarloService(IMonteCarloService):
+    def __init__(
+        self,
+        executor: MonteCarloExecutor | None = None,
+        memory_budget: MemoryBudget | None = None,
+        runs: MonteCarloRunStore | None = None,
+    ):
+        self.executor = executor or MonteCarloExecutor.from_settings(settings)
+        self.memory_budget = memory_budget or MemoryBudget.from_settings(settings, self.executor.workers)
+        self.runs = runs or MonteCarloRunStore.from_settings(settings)
+
+    async def simulate(
+        self,
+        request: MonteCarloBaseRequest,
+        progress: JobProgress | None = None,
+    ) -> MonteCarloResponse:
+        return MonteCarloService._to_response(await self.simulate_arrays(request, progress))
+
+    async def simulate_arrays(
+        self,
+        request: MonteCarloBaseRequest,
+        progress: JobProgress | None = None,
+    ) -> MonteCarloResult:
+        """Симуляция с проверкой бюджета памяти до запуска"""
+        request, downgrades = self.memory_budget.apply(request)
+        result = await self._simulate_arrays(request, progress)
+        if downgrades:
+            result.summary["downgrades"] = downgrades
+        return result
+
+    async def _simulate_arrays(
+        self,
+        request: MonteCarloBaseRequest,
+        progress: JobProgress | None = None,
+    ) -> MonteCarloResult:
+        params = MonteCarloService._prepare_parameters(request)
+        seed, streams = PathEngine.spawn_streams(request.seed, request.simulations)
+        keep_paths = MonteCarloService._needs_paths(request)
+
+        if request.precision is not None:
+            summary, all_simulations = await self._run_until_precise(request, params, streams, keep_paths, progress)
+            if all_simulations is None:
+                return MonteCarloResult(seed=seed, summary=summary, band_percentiles=request.band_percentiles)
+            return MonteCarloService._build_result(request, all_simulations, params, seed, summary)
+
+        if not keep_paths:
+            return MonteCarloResult(
+                seed=seed,
+                summary=await self._collect_summary(request, params, streams, progress),
+                band_percentiles=request.band_percentiles,
+            )
+
+        sizes = self.executor.plan_chunks(request.simulations, params.months, STREAM_BLOCK_SIZE)
+        offsets = np.cumsum([0, *sizes[:-1]]).tolist()
+        chunks = [
+            (n, chunk_streams, offset)
+            for (n, chunk_streams), offset in zip(MonteCarloService._split_streams(sizes, streams), offsets)
+        ]
+
+        fn, args = MonteCarloService._fill_simulations, ()
+        if request.path_metrics:
+            fn, args = MonteCarloService._fill_outcomes, (request.goal_amount,)
+
+        with SharedPathBuffer((request.simulations, params.months + 1), request.path_dtype) as buffer:
+            metrics = await self._run_chunks(fn, params, chunks, buffer.target, *args, progress=progress)
+            result = MonteCarloService._build_result(
+                request=request,
+                all_simulations=buffer.array,
+                params=params,
+                seed=seed,
+            )
+            if request.path_metrics:
+                result.summary.update(MonteCarloService._merge_metrics(metrics))
+            if result.paths is not None:
+                result.paths = result.paths.copy()
+
+        return result
+
+    async def simulate_sweep(self, request: MonteCarloSweepRequest) -> MonteCarloSweepResponse:
+        """Сетка по доходности, риску и взносу на одной матрице шоков"""
+        self.memory_budget.check(self.memory_budget.estimate_sweep(request))
+        params = MonteCarloService._prepare_sweep_parameters(request)
+        seed, streams = PathEngine.spawn_streams(request.seed, request.simulations)
+
+        sizes = self.executor.plan_chunks(request.simulations, params.months * request.cells, STREAM_BLOCK_SIZE)
+        chunks = MonteCarloService._split_streams(sizes, streams)
+        finals = await self._run_chunks(MonteCarloService._run_sweep_finals, params, chunks)
+
+        return MonteCarloService._summarize_sweep(request, params, np.concatenate(finals, axis=-1), seed)
+
+    async def create_run(self, request: MonteCarloRequest) -> MonteCarloRunResponse:
+        """Симуляция с сохранением итоговых сумм и состояний ГСЧ для продолжения"""
+        MonteCarloService._check_resumable(request)
+        self.memory_budget.check(self.memory_budget.estimate_finals(request))
+        params = MonteCarloService._prepare_parameters(request)
+        seed, streams = PathEngine.spawn_streams(request.seed, request.simulations)
+
+        finals, states = await self._run_terminal_chunks(params, request.simulations, streams)
+        return self._run_response(self.runs.save(request, seed, finals, states), params)
+
+    async def extend_run(self, run_id: str, extension: MonteCarloRunExtension) -> MonteCarloRunResponse | None:
+        """Продолжить прогон: сначала горизонт от сохраненных сумм, затем новые пути
+
+        Горизонт продолжается генераторами, восстановленными из состояний
+        блоков, а новые пути берутся из следующих дочерних потоков сида.
+        Последний неполный блок пересчитывается целиком, поэтому итог
+        совпадает со свежим прогоном с объединенными параметрами.
+        """
+        run = self.runs.get(run_id)
+        if run is None:
+            return None
+
+        request = type(run.request).model_validate(
+            run.request.model_dump()
+            | {
+                "years": run.request.years + extension.extra_years,
+                "simulations": run.request.simulations + extension.extra_simulations,
+            },
+        )
+        self.memory_budget.check(self.memory_budget.estimate_finals(request))
+        finals, states = run.finals, run.states
+
+        if extension.extra_years:
+            horizon = MonteCarloService._prepare_parameters(
+                run.request.model_copy(update={"years": extension.extra_years})
+            )
+            generators = [MonteCarloService._restore_generator(state) for state in states]
+            finals, states = await self._run_terminal_chunks(horizon, len(finals), generators, finals)
+
+        params = MonteCarloService._prepare_parameters(request)
+        if extension.extra_simulations:
+            first_block = len(finals) // STREAM_BLOCK_SIZE
+            offset = first_block * STREAM_BLOCK_SIZE
+            _, streams = PathEngine.spawn_streams(run.seed, request.simulations)
+            added, added_states = await self._run_terminal_chunks(
+                params, request.simulations - offset, streams[first_block:]
+            )
+            finals = np.concatenate([finals[:offset], added])
+            states = states[:first_block] + added_states
+
+        return self._run_response(self.runs.save(request, run.seed, finals, states), params)
+
+    async def simulate_stream(self, request: MonteCarloBaseRequest) -> AsyncIterator[dict[str, Any]]:
+        """Сводка, затем пути пачками
+
+        Первый проход считает только итоговые суммы, второй заново
+        генерирует траектории из тех же потоков и отдает их по чанкам,
+        поэтому в памяти держится не больше одного чанка на воркер.
+        Пути отдаются только с paths_output=raw и не больше
+        MAX_EXACT_SIMULATIONS, поэтому в потоковом режиме статистики
+        поток ограничен сводкой.
+        """
+        if request.paths_output == PathsOutput.RAW and (
+            request.statistics_mode == StatisticsMode.STREAMING or request.simulations > MAX_EXACT_SIMULATIONS
+        ):
+            raise ValueError(
+                f"Сырые пути в потоке доступны только в точном режиме и не больше {MAX_EXACT_SIMULATIONS} симуляций",
+            )
+
+        request, downgrades = self.memory_budget.apply(request, self.memory_budget.estimate_stream)
+        params = MonteCarloService._prepare_parameters(request)
+        seed, streams = PathEngine.spawn_streams(request.seed, request.simulations)
+        summary = await self._collect_summary(request, params, streams)
+        simulations = summary["convergence"]["simulations"] if request.precision else request.simulations
+
+        yield {
+            "type": "summary",
+            "simulations": simulations,
+            "months": params.months,
+            "seed": seed,
+            **summary,
+            **({"downgrades": downgrades} if downgrades else {}),
+        }
+        if request.paths_output != PathsOutput.RAW:
+            return
+
+        batch_sizes = [PATH_BLOCK_SIZE] * (simulations // PATH_BLOCK_SIZE)
+        if simulations % PATH_BLOCK_SIZE:
+            batch_sizes.append(simulations % PATH_BLOCK_SIZE)
+
+        offset = 0
+        chunks = MonteCarloService._split_streams(batch_sizes, streams)
+        batches = self._iter_chunks(MonteCarloService._run_simulations, params, chunks, request.path_dtype)
+        async with contextlib.aclosing(batches):
+            async for n, batch in batches:
+                yield {"type": "paths", "offset": offset, "paths": batch.tolist()}
+                offset += n
+
+    async def simulate_progressive(self, request: MonteCarloBaseRequest) -> AsyncIterator[dict[str, Any]]:
+        """Промежуточные сводки по мере готовности чанков, затем итог
+
+        Первый чанк — один блок путей, дальше размер удваивается до
+        обычного размера чанка, так что первая оценка приходит быстро.
+        Промежуточные сводки берутся из сливаемого аккумулятора, как в
+        потоковом режиме статистики, поэтому событие стоит O(чанка), а не
+        пересортировки всех путей. В точном режиме итоговые суммы
+        копятся по чанкам, и событие result считается по ним точно.
+        С precision поток останавливается, как только допуск достигнут.
+        """
+        self.memory_budget.check(self.memory_budget.estimate_finals(request))
+        params = MonteCarloService._prepare_parameters(request)
+        seed, streams = PathEngine.spawn_streams(request.seed, request.simulations)
+        precision = request.precision
+        deadline = None
+        if precision is not None and precision.max_seconds is not None:
+            deadline = time.monotonic() + precision.max_seconds
+
+        streaming = request.statistics_mode == StatisticsMode.STREAMING
+        total_contributions = MonteCarloService._calculate_total_contributions(request, params.months)
+        fn, args = MonteCarloService._run_final_amounts, ()
+        if streaming:
+            fn, args = MonteCarloService._run_accumulator, (total_contributions, request.goal_amount)
+
+        chunks = MonteCarloService._split_streams(self._progressive_sizes(request.simulations, params.months), streams)
+        accumulator = FinalsAccumulator(
+            total_contributions=total_contributions,
+            initial=params.initial,
+            goal_amount=request.goal_amount,
+            group_size=PathEngine.group_size(params.sampling),
+        )
+        parts: list[np.ndarray] = []
+        trace: list[dict[str, Any]] = []
+        done = 0
+
+        results = self._iter_chunks(fn, params, chunks, *args)
+        async with contextlib.aclosing(results):
+            async for n, chunk in results:
+                done += n
+                if streaming:
+                    accumulator.merge(chunk)
+                else:
+                    accumulator.update(chunk)
+                    parts.append(chunk)
+                summary = accumulator.summary()
+
+                if precision is None:
+                    yield {"type": "progress", "simulations": done, **summary}
+                    continue
+
+                error = MonteCarloService._precision_error(precision, summary, accumulator.sketch.quantiles, done)
+                trace.append({"simulations": done, "error": error})
+                yield {"type": "progress", "simulations": done, "error": error, **summary}
+
+                converged = error is not None and error <= precision.tolerance
+                if converged or (deadline is not None and time.monotonic() >= deadline):
+                    break
+
+        if not streaming:
+            summary = MonteCarloService._summarize(request, np.concatenate(parts), params)
+        if precision is not None:
+            summary["convergence"] = MonteCarloService._convergence(precision, trace)
+        yield {"type": "result", "simulations": done, "seed": seed, **summary}
+
+    def _progressive_sizes(self, simulations: int, months: int) -> list[int]:
+        """Размеры чанков с удвоением от одного блока до обычного размера"""
+        limit = max(PATH_BLOCK_SIZE, *self.executor.plan_chunks(simulations, months, STREAM_BLOCK_SIZE))
+        sizes = []
+        size = STREAM_BLOCK_SIZE
+        remaining = simulations
+        while remaining > 0:
+            sizes.append(min(size, remaining))
+            remaining -= sizes[-1]
+            size = min(size * 2, limit)
+        return sizes
+
+    async def _iter_chunks(
+        self,
+        fn: Callable[..., Any],
+        params: PathParameters | PortfolioParameters | SweepParameters,
+        chunks: list[tuple[int, list[np.random.SeedSequence]]],
+        *args: Any,
+    ) -> AsyncIterator[tuple[int, Any]]:
+        """Результаты чанков по порядку, в работе не больше чанков, чем воркеров
+
+        При закрытии генератора еще не начатые чанки снимаются с пула.
+        """
+        pending: deque[tuple[int, asyncio.Task]] = deque()
+        try:
+            for n, chunk_streams in chunks:
+                pending.append((n, asyncio.ensure_future(self.executor.run(fn, params, n, chunk_streams, *args))))
+                if len(pending) >= self.executor.workers:
+                    first, task = pending.popleft()
+                    yield first, await task
+
+            while pending:
+                first, task = pending.popleft()
+                yield first, await task
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def _collect_summary(
+        self,
+        request: MonteCarloBaseRequest,
+        params: PathParameters | PortfolioParameters,
+        streams: list[np.random.SeedSequence],
+        progress: JobProgress | None = None,
+    ) -> dict[str, Any]:
+        """Сводка по итоговым суммам без хранения траекторий
+
+        В потоковом режиме статистики каждый чанк возвращает только
+        сливаемый аккумулятор, иначе — массив итоговых сумм. С path_metrics
+        чанк дополнительно возвращает аккумулятор метрик путей.
+        """
+        if request.precision is not None:
+            summary, _ = await self._run_until_precise(request, params, streams, False, progress)
+            return summary
+
+        sizes = self.executor.plan_chunks(request.simulations, params.months, STREAM_BLOCK_SIZE)
+        chunks = MonteCarloService._split_streams(sizes, streams)
+
+        streaming = request.statistics_mode == StatisticsMode.STREAMING
+        total_contributions = MonteCarloService._calculate_total_contributions(request, params.months)
+        fn, args = MonteCarloService._run_final_amounts, ()
+        if streaming:
+            fn, args = MonteCarloService._run_accumulator, (total_contributions, request.goal_amount)
+        if request.path_metrics:
+            fn, args = MonteCarloService._run_outcomes, (streaming, total_contributions, request.goal_amount)
+
+        results = await self._run_chunks(fn, params, chunks, *args, progress=progress)
+        metrics = None
+        if request.path_metrics:
+            results, metrics = zip(*results)
+
+        if streaming:
+            accumulator = results[0]
+            for other in results[1:]:
+                accumulator.merge(other)
+            summary = accumulator.summary()
+        else:
+            summary = MonteCarloService._summarize(request, np.concatenate(results), params)
+
+        if metrics:
+            summary.update(MonteCarloService._merge_metrics(metrics))
+        return summary
+
+    async def _run_until_precise(
+        self,
+        request: MonteCarloBaseRequest,
+        params: PathParameters | PortfolioParameters,
+        streams: list[np.random.SeedSequence],
+        keep_paths: bool,
+        progress: JobProgress | None = None,
+    ) -> tuple[dict[str, Any], np.ndarray | None]:
+        """Адаптивная симуляция: пачки путей до достижения целевой точности
+
+        Каждая пачка дробится на чанки так же, как обычный запуск, и
+        продолжает те же потоки блоков, поэтому результат с тем же сидом
+        совпадает с обычным запуском на итоговом числе путей. Поле
+        simulations служит бюджетом путей, max_seconds — бюджетом времени.
+        """
+        precision = request.precision
+        deadline = None if precision.max_seconds is None else time.monotonic() + precision.max_seconds
+        streaming = request.statistics_mode == StatisticsMode.STREAMING
+        total_contributions = MonteCarloService._calculate_total_contributions(request, params.months)
+
+        accumulator: FinalsAccumulator | None = None
+        parts: list[np.ndarray] = []
+        trace: list[dict[str, Any]] = []
+        done = 0
+        target = min(request.simulations, ADAPTIVE_INITIAL_SIMULATIONS)
+
+        while True:
+            sizes = self.executor.plan_chunks(target - done, params.months, STREAM_BLOCK_SIZE)
+            chunks = MonteCarloService._split_streams(sizes, streams[done // STREAM_BLOCK_SIZE :])
+
+            if streaming:
+                accumulators = await self._run_chunks(
+                    MonteCarloService._run_accumulator,
+                    params,
+                    chunks,
+                    total_contributions,
+                    request.goal_amount,
+                    progress=progress,
+                )
+                for other in accumulators:
+                    if accumulator is None:
+                        accumulator = other
+                    else:
+                        accumulator.merge(other)
+                summary = accumulator.summary()
+                quantiles = accumulator.sketch.quantiles
+            else:
+                if keep_paths:
+                    parts.extend(
+                        await self._run_chunks(
+                            MonteCarloService._run_simulations,
+                            params,
+                            chunks,
+                            request.path_dtype,
+                            progress=progress,
+                        ),
+                    )
+                else:
+                    parts.extend(
+                        await self._run_chunks(MonteCarloService._run_final_amounts, params, chunks, progress=progress),
+                    )
+                final_array = np.concatenate(parts)
+                if keep_paths:
+                    final_array = final_array[:, -1]
+                summary = MonteCarloService._summarize(request, final_array, params)
+                quantiles = functools.partial(np.quantile, final_array)
+
+            done = target
+            error = MonteCarloService._precision_error(precision, summary, quantiles, done)
+            trace.append({"simulations": done, "error": error})
+
+            converged = error is not None and error <= precision.tolerance
+            out_of_time = deadline is not None and time.monotonic() >= deadline
+            if converged or done >= request.simulations or out_of_time:
+                break
+            target = MonteCarloService._next_target(done, error, precision.tolerance, request.simulations)
+
+        summary["convergence"] = MonteCarloService._convergence(precision, trace)
+        return summary, np.concatenate(parts) if keep_paths and not streaming else None
+
+    async def _run_terminal_chunks(
+        self,
+        params: PathParameters,
+        simulations: int,
+        streams: list[BlockStream],
+        initial_amounts: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, list[dict[str, Any]]]:
+        """Итоговые суммы и состояния ГСЧ блоков, посчитанные чанками на пуле"""
+        sizes = self.executor.plan_chunks(simulations, params.months, STREAM_BLOCK_SIZE)
+        offsets = np.cumsum([0, *sizes[:-1]]).tolist()
+        chunks = [
+            (n, chunk_streams) if initial_amounts is None else (n, chunk_streams, initial_amounts[offset : offset + n])
+            for (n, chunk_streams), offset in zip(MonteCarloService._split_streams(sizes, streams), offsets)
+        ]
+
+        parts = await self._run_chunks(MonteCarloService._run_terminal, params, chunks)
+        return np.concatenate([finals for finals, _ in parts]), [state for _, states in parts for state in states]
+
+    def _run_response(self, run: MonteCarloRun, params: PathParameters) -> MonteCarloRunResponse:
+        result = MonteCarloResult(
+            seed=run.seed,
+            summary=MonteCarloService._summarize(run.request, run.finals, params),
+            band_percentiles=run.request.band_percentiles,
+        )
+        return MonteCarloRunResponse(
+            run_id=run.run_id,
+            years=run.request.years,
+            simulations=run.request.simulations,
+            expires_at=self.runs.expires_at(run),
+            result=MonteCarloService._to_response(result),
+        )
+
+    async def _run_chunks(
+        self,
+        fn: Callable[..., Any],
+        params: PathParameters | PortfolioParameters | SweepParameters,
+        chunks: list[tuple[Any, ...]],
+        *args: Any,
+        progress: JobProgress | None = None,
+    ) -> list[Any]:
+        """Запустить чанки на пуле и вернуть результаты в порядке чанков
+
+        Чанк — (число путей, потоки, *свои аргументы), общие args идут
+        после аргументов чанка. С progress каждый готовый чанк засчитывается, а после него
+        проверяется отмена: еще не начатые чанки снимаются с пула.
+        """
+        tasks = [
+            asyncio.ensure_future(self.executor.run(fn, params, n, chunk_streams, *chunk_args, *args))
+            for n, chunk_streams, *chunk_args in chunks
+        ]
+        if progress is None:
+            return await asyncio.gather(*tasks)
+
+        progress.add_chunks(len(tasks))
+        try:
+            for task in asyncio.as_completed(tasks):
+                await task
+                progress.chunk_done()
+                progress.check_cancelled()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return [task.result() for task in tasks]
+
+    @staticmethod
+    def _precision_error(
+        precision: MonteCarloPrecision,
+        summary: dict[str, Any],
+        quantiles: Callable[[list[float]], Iterable[float]],
+        simulations: int,
+    ) -> float | None:
+        """Текущая ошибка в единицах допуска или None, если ее еще нельзя оценить
+
+        Интервал медианы строится по порядковым статистикам, как для
+        независимой выборки; для антитетики и Sobol он консервативен.
+        Ошибка вероятности цели не ниже оценки Агрести — Коулла: при
+        p = 0 или p = 1 на первой пачке выборочная ошибка равна нулю и
+        иначе остановила бы симуляцию при любом допуске.
+        """
+        if precision.metric == PrecisionMetric.REACH_GOAL:
+            standard_error = summary["standard_error"]["reach_goal"]
+            if standard_error is None:
+                return None
+            return max(
+                standard_error,
+                MonteCarloService._agresti_coull_error(summary["probabilities"]["reach_goal"], simulations),
+            )
+
+        if precision.metric == PrecisionMetric.MEAN:
+            standard_error = summary["standard_error"]["mean"]
+            mean = abs(summary["statistics"]["mean"])
+            if standard_error is None or mean == 0:
+                return None
+            return standard_error / mean * 100
+
+        half_width = CONFIDENCE_Z * 0.5 / math.sqrt(simulations)
+        low, median, high = quantiles([max(0.0, 0.5 - half_width), 0.5, min(1.0, 0.5 + half_width)])
+        if median == 0:
+            return None
+        return float((high - low) / abs(median) * 100)
+
+    @staticmethod
+    def _agresti_coull_error(probability: float, simulations: int) -> float:
+        """Стандартная ошибка доли в процентных пунктах по Агрести — Коуллу
+
+        К выборке добавляются z² / 2 успехов и неудач, поэтому оценка
+        положительна и при нуле или всех достижениях цели.
+        """
+        adjusted = simulations + CONFIDENCE_Z**2
+        share = (probability / 100 * simulations + CONFIDENCE_Z**2 / 2) / adjusted
+        return math.sqrt(share * (1 - share) / adjusted) * 100
+
+    @staticmethod
+    def _convergence(precision: MonteCarloPrecision, trace: list[dict[str, Any]]) -> dict[str, Any]:
+        error = trace[-1]["error"]
+        return {
+            "metric": precision.metric,
+            "tolerance": precision.tolerance,
+            "achieved_error": error,
+            "converged": error is not None and error <= precision.tolerance,
+            "simulations": trace[-1]["simulations"],
+            "trace": trace,
+        }
+
+    @staticmethod
+    def _next_target(done: int, error: float | None, tolerance: float, budget: int) -> int:
+        """Следующее число путей по закону ошибки ~ 1/sqrt(n), с ограничением роста"""
+        growth = ADAPTIVE_MAX_GROWTH
+        if error is not None:
+            growth = min(ADAPTIVE_MAX_GROWTH, 1.1 * (error / tolerance) ** 2)
+
+        target = math.ceil(done * growth / STREAM_BLOCK_SIZE) * STREAM_BLOCK_SIZE
+        return min(budget, max(target, done + STREAM_BLOCK_SIZE))
+
+    @staticmethod
+    def _sync_simulate(request: MonteCarloBaseRequest) -> MonteCarloResponse:
+        params = MonteCarloService._prepare_parameters(request)
+        seed, streams = PathEngine.spawn_streams(request.seed, request.simulations)
+
+        all_simulations = MonteCarloService._run_simulations(
+            params=params,
+            simulations=request.simulations,
+            streams=streams,
+            dtype=request.path_dtype,
+        )
+
+        result = MonteCarloService._build_result(
+            request=request,
+            all_simulations=all_simulations,
+            params=params,
+            seed=seed,
+        )
+        return MonteCarloService._to_response(result)
+
+    @staticmethod
+    def _split_streams(
+        sizes: list[int],
+        streams: list[BlockStream],
+    ) -> list[tuple[int, list[BlockStream]]]:
+        chunks = []
+        first_stream = 0
+        for n in sizes:
+            chunk_streams = math.ceil(n / STREAM_BLOCK_SIZE)
+            chunks.append((n, streams[first_stream : first_stream + chunk_streams]))
+            first_stream += chunk_streams
+        return chunks
+
+    @staticmethod
+    def _summarize(
+        request: MonteCarloBaseRequest,
+        final_array: np.ndarray,
+        params: PathParameters | PortfolioParameters,
+    ) -> dict[str, Any]:
+        total_contributions = MonteCarloService._calculate_total_contributions(
+            request,
+            params.months,
+        )
+
+        return {
+            "statistics": MonteCarloService._calculate_statistics(final_array),
+            "percentiles": MonteCarloService._calculate_percentiles(final_array),
+            "probabilities": MonteCarloService._calculate_probabilities(
+                final_array=final_array,
+                request=request,
+                total_contributions=total_contributions,
+            ),
+            "distribution": MonteCarloService._build_distribution(final_array),
+            "standard_error": MonteCarloService._calculate_standard_error(
+                final_array=final_array,
+                request=request,
+                group_size=PathEngine.group_size(params.sampling),
+            ),
+        }
+
+    @staticmethod
+    def _build_result(
+        request: MonteCarloBaseRequest,
+        all_simulations: np.ndarray,
+        params: PathParameters | PortfolioParameters,
+        seed: int,
+        summary: dict[str, Any] | None = None,
+    ) -> MonteCarloResult:
+        result = MonteCarloResult(
+            seed=seed,
+            summary=summary or MonteCarloService._summarize(request, all_simulations[:, -1], params),
+            band_percentiles=request.band_percentiles,
+        )
+
+        if request.paths_output != PathsOutput.NONE:
+            result.bands = MonteCarloService._calculate_bands(
+                all_simulations=all_simulations,
+                band_percentiles=request.band_percentiles,
+            )
+
+        if request.sample_paths:
+            result.sample_paths = MonteCarloService._select_sample_paths(
+                all_simulations=all_simulations,
+                count=request.sample_paths,
+            )
+
+        if request.paths_output == PathsOutput.RAW:
+            result.paths = all_simulations
+
+        return result
+
+    @staticmethod
+    def _to_response(result: MonteCarloResult) -> MonteCarloResponse:
+        bands = None
+        if result.bands is not None:
+            bands = {f"{q:g}": band.tolist() for q, band in zip(result.band_percentiles, result.bands)}
+
+        return MonteCarloResponse(
+            **result.summary,
+            bands=bands,
+            sample_paths=None if result.sample_paths is None else result.sample_paths.tolist(),
+            simulations_data=None if result.paths is None else result.paths.tolist(),
+            seed=result.seed,
+        )
+
+    @staticmethod
+    def _check_resumable(request: MonteCarloRequest) -> None:
+        """Продолжение требует, чтобы шоки блока дописывались по месяцам без пересчета"""
+        if request.return_model != ReturnModel.NORMAL:
+            raise ValueError("Продолжение прогона доступно только для нормальной модели доходностей")
+        if request.sampling == SamplingScheme.SOBOL:
+            raise ValueError("Продолжение прогона недоступно для выборки Sobol")
+        if request.statistics_mode != StatisticsMode.EXACT or request.precision is not None:
+            raise ValueError("Продолжение прогона требует точной статистики без целевой точности")
+
+    @staticmethod
+    def _restore_generator(state: dict[str, Any]) -> np.random.Generator:
+        generator = np.random.Generator(getattr(np.random, state["bit_generator"])())
+        generator.bit_generator.state = state
+        return generator
+
+    @staticmethod
+    def _needs_paths(request: MonteCarloBaseRequest) -> bool:
+        """Нужна ли матрица траекторий; иначе считаются только итоговые суммы"""
+        return request.statistics_mode == StatisticsMode.EXACT and (
+            request.paths_output != PathsOutput.NONE or request.sample_paths > 0
+        )
+
+    @staticmethod
+    def _prepare_parameters(request: MonteCarloBaseRequest) -> PathParameters | PortfolioParameters:
+        if request.is_portfolio:
+            return MonteCarloService._prepare_portfolio_parameters(request)
+
+        return PathParameters(
+            initial=request.initial,
+            monthly_contribution=request.monthly,
+            monthly_rate=request.avg_return / 100 / 12,
+            monthly_risk=request.risk / 100 / np.sqrt(12),
+            months=request.years * 12,
+            sampling=request.sampling,
+            returns_path=MonteCarloService._returns_path() if request.return_model == ReturnModel.BOOTSTRAP else None,
+            mean_block=request.bootstrap_block_months,
+        )
+
+    @staticmethod
+    def _prepare_sweep_parameters(request: MonteCarloSweepRequest) -> SweepParameters:
+        return SweepParameters(
+            initial=request.initial,
+            monthly_rates=np.asarray(request.avg_return, dtype=np.float64) / 100 / 12,
+            monthly_risks=np.asarray(request.risk, dtype=np.float64) / 100 / np.sqrt(12),
+            monthly_contributions=np.asarray(request.monthly, dtype=np.float64),
+            months=request.years * 12,
+            sampling=request.sampling,
+        )
+
+    @staticmethod
+    def _summarize_sweep(
+        request: MonteCarloSweepRequest,
+        params: SweepParameters,
+        finals: np.ndarray,
+        seed: int,
+    ) -> MonteCarloSweepResponse:
+        """Статистики всех ячеек сразу, вдоль оси путей"""
+        grid = finals.shape[:-1]
+        total_contributions = request.initial + params.monthly_contributions * params.months
+        finals = finals.reshape(-1, finals.shape[-1])
+
+        columns = {
+            "median": np.median(finals, axis=1),
+            "mean": np.mean(finals, axis=1),
+            "std": np.std(finals, axis=1),
+            "min": np.min(finals, axis=1),
+            "max": np.max(finals, axis=1),
+        }
+        percentiles = np.percentile(finals, SUMMARY_PERCENTILES, axis=1)
+        probabilities = {
+            "loss": np.mean(finals < np.broadcast_to(total_contributions, grid).reshape(-1, 1), axis=1) * 100,
+            "negative_return": np.mean(finals < request.initial, axis=1) * 100,
+        }
+        if request.goal_amount:
+            probabilities["reach_goal"] = np.mean(finals >= request.goal_amount, axis=1) * 100
+
+        cells = []
+        for cell, (i, j, k) in enumerate(np.ndindex(grid)):
+            cells.append(
+                MonteCarloSweepCell(
+                    avg_return=request.avg_return[i],
+                    risk=request.risk[j],
+                    monthly=request.monthly[k],
+                    statistics={key: float(values[cell]) for key, values in columns.items()},
+                    percentiles={str(q): float(values[cell]) for q, values in zip(SUMMARY_PERCENTILES, percentiles)},
+                    probabilities={key: float(values[cell]) for key, values in probabilities.items()},
+                ),
+            )
+
+        return MonteCarloSweepResponse(cells=cells, seed=seed)
+
+    @staticmethod
+    def _returns_path() -> str:
+        """Путь к файлу истории; проверяется до запуска, чтобы ошибка не всплыла в воркере"""
+        if settings.montecarlo_returns_path is None:
+            raise ValueError("Бутстрэп недоступен: не задан файл доходностей FINAPI_MONTECARLO_RETURNS_PATH")
+
+        path = str(settings.montecarlo_returns_path)
+        load_returns(path)
+        return path
+
+    @staticmethod
+    def _prepare_portfolio_parameters(request: PortfolioMonteCarloRequest) -> PortfolioParameters:
+        return PortfolioParameters(
+            initial=request.initial,
+            monthly_contribution=request.monthly,
+            weights=np.asarray(request.weights, dtype=np.float64),
+            monthly_returns=np.asarray(request.expected_returns, dtype=np.float64) / 100 / 12,
+            cholesky=MonteCarloService._covariance_factor(np.asarray(request.covariance) / 100**2 / 12),
+            months=request.years * 12,
+            rebalance_every=REBALANCE_MONTHS[request.rebalancing],
+            sampling=request.sampling,
+        )
+
+    @staticmethod
+    def _covariance_factor(covariance: np.ndarray) -> np.ndarray:
+        """Матрица L с L @ L.T == covariance: Холецкий, для вырожденной матрицы — через собственные числа"""
+        try:
+            return np.linalg.cholesky(covariance)
+        except np.linalg.LinAlgError:
+            eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+            if eigenvalues.min() < -COVARIANCE_TOLERANCE * max(1.0, eigenvalues.max()):
+                raise ValueError("Ковариационная матрица должна быть неотрицательно определенной")
+            return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+    @staticmethod
+    def _run_simulations(
+        params: PathParameters | PortfolioParameters,
+        simulations: int,
+        streams: list[np.random.SeedSequence],
+        dtype: str = "float64",
+    ) -> np.ndarray:
+        return PathEngine.simulate_paths(params, simulations, streams, dtype)
+
+    @staticmethod
+    def _fill_simulations(
+        params: PathParameters | PortfolioParameters,
+        simulations: int,
+        streams: list[np.random.SeedSequence],
+        offset: int,
+        target: SharedPathTarget,
+    ) -> None:
+        """Записать пути чанка в строки [offset, offset + simulations) разделяемой матрицы"""
+        with target.attach() as paths:
+            PathEngine.simulate_paths(params, simulations, streams, out=paths[offset : offset + simulations])
+
+    @staticmethod
+    def _fill_outcomes(
+        params: PathParameters | PortfolioParameters,
+        simulations: int,
+        streams: list[np.random.SeedSequence],
+        offset: int,
+        target: SharedPathTarget,
+        goal_amount: float | None,
+    ) -> PathMetricsAccumulator:
+        """Записать пути чанка в разделяемую матрицу и вернуть метрики путей из того же прохода"""
+        with target.attach() as paths:
+            _, goal_months, max_drawdowns = PathEngine.simulate_outcomes(
+                params,
+                simulations,
+                streams,
+                goal_amount,
+                out=paths[offset : offset + simulations],
+            )
+
+        metrics = PathMetricsAccumulator(params.months, goal_amount)
+        metrics.update(goal_months, max_drawdowns)
+        return metrics
+
+    @staticmethod
+    def _run_outcomes(
+        params: PathParameters | PortfolioParameters,
+        simulations: int,
+        streams: list[np.random.SeedSequence],
+        streaming: bool,
+        total_contributions: float,
+        goal_amount: float | None,
+    ) -> tuple[np.ndarray | FinalsAccumulator, PathMetricsAccumulator]:
+        """Итоговые суммы (или их аккумулятор) и метрики путей за один проход"""
+        finals, goal_months, max_drawdowns = PathEngine.simulate_outcomes(params, simulations, streams, goal_amount)
+        metrics = PathMetricsAccumulator(params.months, goal_amount)
+        metrics.update(goal_months, max_drawdowns)
+        if not streaming:
+            return finals, metrics
+
+        accumulator = FinalsAccumulator(
+            total_contributions=total_contributions,
+            initial=params.initial,
+            goal_amount=goal_amount,
+            group_size=PathEngine.group_size(params.sampling),
+        )
+        accumulator.update(finals)
+        return accumulator, metrics
+
+    @staticmethod
+    def _merge_metrics(metrics: Iterable[PathMetricsAccumulator]) -> dict[str, Any]:
+        merged, *others = metrics
+        for other in others:
+            merged.merge(other)
+        return merged.summary()
+
+    @staticmethod
+    def _run_final_amounts(
+        params: PathParameters | PortfolioParameters,
+        simulations: int,
+        streams: list[np.random.SeedSequence],
+    ) -> np.ndarray:
+        return PathEngine.simulate_finals(params, simulations, streams)
+
+    @staticmethod
+    def _run_terminal(
+        params: PathParameters,
+        simulations: int,
+        streams: list[BlockStream],
+        initial_amounts: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, list[dict[str, Any]]]:
+        """Итоговые суммы чанка и состояния ГСЧ его блоков после последнего месяца"""
+        generators = [np.random.default_rng(stream) for stream in streams]
+        finals = PathEngine.simulate_finals(params, simulations, generators, initial_amounts)
+        return finals, [generator.bit_generator.state for generator in generators]
+
+    @staticmethod
+    def _run_sweep_finals(
+        params: SweepParameters,
+        simulations: int,
+        streams: list[np.random.SeedSequence],
+    ) -> np.ndarray:
+        return PathEngine.simulate_sweep_finals(params, simulations, streams)
+
+    @staticmethod
+    def _run_accumulator(
+        params: PathParameters | PortfolioParameters,
+        simulations: int,
+        streams: list[np.random.SeedSequence],
+        total_contributions: float,
+        goal_amount: float | None,
+    ) -> FinalsAccumulator:
+        accumulator = FinalsAccumulator(
+            total_contributions=total_contributions,
+            initial=params.initial,
+            goal_amount=goal_amount,
+            group_size=PathEngine.group_size(params.sampling),
+        )
+        accumulator.update(PathEngine.simulate_finals(params, simulations, streams))
+        return accumulator
+
+    @staticmethod
+    def _calculate_statistics(final_array: np.ndarray) -> dict:
+        return {
+            "median": float(np.median(final_array)),
+            "mean": float(np.mean(final_array)),
+            "std": float(np.std(final_array)),
+            "min": float(np.min(final_array)),
+            "max": float(np.max(final_array)),
+        }
+
+    @staticmethod
+    def _calculate_percentiles(final_array: np.ndarray) -> dict:
+        return {
+            "5": float(np.percentile(final_array, 5)),
+            "10": float(np.percentile(final_array, 10)),
+            "25": float(np.percentile(final_array, 25)),
+            "50": float(np.percentile(final_array, 50)),
+            "75": float(np.percentile(final_array, 75)),
+            "90": float(np.percentile(final_array, 90)),
+            "95": float(np.percentile(final_array, 95)),
+        }
+
+    @staticmethod
+    def _calculate_bands(
+        all_simulations: np.ndarray,
+        band_percentiles: list[float],
+    ) -> np.ndarray:
+        return np.percentile(all_simulations, band_percentiles, axis=0)
+
+    @staticmethod
+    def _select_sample_paths(all_simulations: np.ndarray, count: int) -> np.ndarray:
+        order = np.argsort(all_simulations[:, -1])
+        ranks = np.linspace(0, len(order) - 1, min(count, len(order))).round().astype(int)
+        return all_simulations[order[ranks]]
+
+    @staticmethod
+    def _calculate_total_contributions(
+        request: MonteCarloBaseRequest,
+        months: int,
+    ) -> float:
+        return request.initial + (request.monthly * months)
+
+    @staticmethod
+    def _calculate_probabilities(
+        final_array: np.ndarray,
+        request: MonteCarloBaseRequest,
+        total_contributions: float,
+    ) -> dict:
+        probabilities: dict[str, float] = {
+            "loss": float(np.mean(final_array < total_contributions)) * 100,
+            "negative_return": float(np.mean(final_array < request.initial)) * 100,
+        }
+
+        if request.goal_amount:
+            probabilities["reach_goal"] = float(np.mean(final_array >= request.goal_amount)) * 100
+
+        return probabilities
+
+    @staticmethod
+    def _calculate_standard_error(
+        final_array: np.ndarray,
+        request: MonteCarloBaseRequest,
+        group_size: int,
+    ) -> dict[str, float | None]:
+        groups = np.arange(len(final_array)) // group_size
+        counts = np.bincount(groups)
+
+        standard_error = {
+            "mean": MonteCarloService._group_standard_error(final_array, groups, counts),
+        }
+        if request.goal_amount:
+            reach_goal = (final_array >= request.goal_amount).astype(np.float64) * 100
+            standard_error["reach_goal"] = MonteCarloService._group_standard_error(reach_goal, groups, counts)
+
+        return standard_error
+
+    @staticmethod
+    def _group_standard_error(
+        values: np.ndarray,
+        groups: np.ndarray,
+        counts: np.ndarray,
+    ) -> float | None:
+        group_means = np.bincount(groups, weights=values) / counts
+        if len(group_means) <= 1:
+            return None
+        return float(np.std(group_means, ddof=1) / np.sqrt(len(group_means)))
+
+    @staticmethod
+    def _build_distribution(final_array: np.ndarray) -> list[dict]:
+        hist, bins = np.histogram(final_array, bins=10)
+        distribution: list[dict] = []
+
+        for i in range(len(hist)):
+            distribution.append(
+                {
+                    "range": f"{bins[i]:.0f}-{bins[i + 1]:.0f}",
+                    "count": int(hist[i]),
+                    "percent": float(hist[i] / len(final_array) * 100),
+                },
+            )
+
+        return distribution
@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import functools
+import math
+import os
+
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+import numpy as np
+
+from models.enums import SamplingScheme
+
+
+PATH_BLOCK_SIZE = 2048
+STREAM_BLOCK_SIZE = 256
+SOBOL_BITS = 30
+RETURNS_DTYPE = np.dtype("<f8")
+
+BlockStream = np.random.SeedSequence | np.random.Generator
+
+
+@dataclass(frozen=True)
+class PathParameters:
+    """Месячные параметры модели, передаются воркерам целиком
+
+    С returns_path доходности берутся бутстрэпом из файла истории,
+    а monthly_rate и monthly_risk не используются.
+    """
+
+    initial: float
+    monthly_contribution: float
+    monthly_rate: float
+    monthly_risk: float
+    months: int
+    sampling: SamplingScheme = SamplingScheme.PSEUDO
+    returns_path: str | None = None
+    mean_block: float = 12.0
+
+
+@dataclass(frozen=True, eq=False)
+class PortfolioParameters:
+    """Месячные параметры портфеля: доли, средние доходности и фактор Холецкого ковариации"""
+
+    initial: float
+    monthly_contribution: float
+    weights: np.ndarray
+    monthly_returns: np.ndarray
+    cholesky: np.ndarray
+    months: int
+    rebalance_every: int = 1
+    sampling: SamplingScheme = SamplingScheme.PSEUDO
+
+
+@dataclass(frozen=True, eq=False)
+class SweepParameters:
+    """Сетка месячных параметров: доходности, риски и взносы, по одной оси на каждый"""
+
+    initial: float
+    monthly_rates: np.ndarray
+    monthly_risks: np.ndarray
+    monthly_contributions: np.ndarray
+    months: int
+    sampling: SamplingScheme = SamplingScheme.PSEUDO
+
+
+class PathEngine:
+    """Векторизованная генерация траекторий портфеля
+
+    Пути разбиты на блоки по STREAM_BLOCK_SIZE, у каждого блока свой
+    независимый поток ГСЧ. Доходности рисуются одной матрицей на блок,
+    а рекуррентность «пополнение, затем рост» выполняется сразу для всех
+    путей слоя из нескольких блоков.
+    """
+
+    @staticmethod
+    def spawn_streams(seed: int | None, simulations: int) -> tuple[int, list[np.random.SeedSequence]]:
+        """Сид запроса и дочерние потоки, по одному на блок путей"""
+        seed_sequence = np.random.SeedSequence(seed)
+        blocks = math.ceil(simulations / STREAM_BLOCK_SIZE)
+        return seed_sequence.entropy, seed_sequence.spawn(blocks)
+
+    @staticmethod
+    def group_size(sampling: SamplingScheme) -> int:
+        """Размер независимой группы путей для оценки стандартной ошибки
+
+        Антитетические пары зависимы внутри пары, а блок Sobol — одна
+        рандомизированная сетка, поэтому независимы только их средние.
+        """
+        if sampling == SamplingScheme.ANTITHETIC:
+            return 2
+        if sampling == SamplingScheme.SOBOL:
+            return STREAM_BLOCK_SIZE
+        return 1
+
+    @staticmethod
+    def simulate_paths(
+        params: PathParameters | PortfolioParameters,
+        simulations: int,
+        streams: list[np.random.SeedSequence],
+        dtype: str = "float64",
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Траектории (simulations, months + 1); считаются во float64, хранятся в dtype или в out"""
+        paths = np.empty((simulations, params.months + 1), dtype=dtype) if out is None else out
+
+        for start, size, slab_streams in PathEngine.iter_slabs(simulations, streams):
+            paths[start : start + size] = PathEngine.run_slab(params, slab_streams)[:, :size].T
+
+        return paths
+
+    @staticmethod
+    def simulate_finals(
+        params: PathParameters | PortfolioParameters,
+        simulations: int,
+        streams: list[BlockStream],
+        initial_amounts: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Только итоговые суммы, без хранения траекторий; совпадают с simulate_paths(...)[:, -1]
+
+        initial_amounts задает суммы путей на начало горизонта вместо
+        params.initial. Вместо потоков можно передать генераторы: тогда
+        шоки продолжают их последовательность, а состояние сдвигается.
+        """
+        finals = np.empty(simulations, dtype=np.float64)
+
+        for start, size, slab_streams in PathEngine.iter_slabs(simulations, streams):
+            if isinstance(params, PortfolioParameters):
+                finals[start : start + size] = PathEngine.run_slab(params, slab_streams)[-1, :size]
+                continue
+
+            growth = PathEngine.draw_growth(params, slab_streams)
+            amounts = np.full(growth.shape[1], params.initial, dtype=np.float64)
+            if initial_amounts is not None:
+                amounts[:size] = initial_amounts[start : start + size]
+            for month in range(params.months):
+                amounts += params.monthly_contribution
+                amounts *= growth[month]
+            finals[start : start + size] = amounts[:size]
+
+        return finals
+
+    @staticmethod
+    def simulate_outcomes(
+        params: PathParameters | PortfolioParameters,
+        simulations: int,
+        streams: list[BlockStream],
+        goal_amount: float | None,
+        out: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Итоговые суммы, месяц первого достижения цели (-1 — не достигнута) и максимальная просадка
+
+        Пик, просадка и месяц достижения обновляются в том же помесячном
+        проходе, что и суммы, поэтому матрица путей не хранится и не
+        перечитывается. С out траектории слоя еще и записываются в него.
+        """
+        finals = np.empty(simulations, dtype=np.float64)
+        goal_months = np.empty(simulations, dtype=np.int64)
+        max_drawdowns = np.empty(simulations, dtype=np.float64)
+
+        for start, size, slab_streams in PathEngine.iter_slabs(simulations, streams):
+            if out is None:
+                months = PathEngine.iter_months(params, slab_streams)
+            else:
+                months = PathEngine.run_slab(params, slab_streams)
+                out[start : start + size] = months[:, :size].T
+
+            months = iter(months)
+            amounts = next(months)
+            peak = amounts.copy()
+            ratio = np.ones_like(peak)
+            drawdown = np.zeros_like(peak)
+            reached = np.where(amounts >= goal_amount, 0, -1) if goal_amount else np.full(peak.shape, -1)
+            for month, amounts in enumerate(months, start=1):
+                np.maximum(peak, amounts, out=peak)
+                np.divide(amounts, peak, out=ratio, where=peak > 0)
+                np.maximum(drawdown, 1 - ratio, out=drawdown)
+                if goal_amount:
+                    reached[(reached < 0) & (amounts >= goal_amount)] = month
+
+            finals[start : start + size] = amounts[:size]
+            goal_months[start : start + size] = reached[:size]
+            max_drawdowns[start : start + size] = drawdown[:size]
+
+        return finals, goal_months, max_drawdowns
+
+    @staticmethod
+    def iter_months(
+        params: PathParameters | PortfolioParameters,
+        streams: list[BlockStream],
+    ) -> Iterator[np.ndarray]:
+        """Суммы всех путей слоя помесячно, начиная с начального капитала
+
+        Для одного актива массив переиспользуется между шагами, поэтому
+        его нужно обработать до следующей итерации.
+        """
+        if isinstance(params, PortfolioParameters):
+            yield from PathEngine.run_slab(params, streams)
+            return
+
+        growth = PathEngine.draw_growth(params, streams)
+        amounts = np.full(growth.shape[1], params.initial, dtype=np.float64)
+        yield amounts
+        for month in range(params.months):
+            amounts += params.monthly_contribution
+            amounts *= growth[month]
+            yield amounts
+
+    @staticmethod
+    def iter_slabs(
+        simulations: int,
+        streams: list[BlockStream],
+    ) -> Iterator[tuple[int, int, list[BlockStream]]]:
+        """Слои из нескольких блоков: (первый путь, число путей, потоки слоя)"""
+        streams_per_slab = max(1, PATH_BLOCK_SIZE // STREAM_BLOCK_SIZE)
+
+        for first in range(0, len(streams), streams_per_slab):
+            slab_streams = streams[first : first + streams_per_slab]
+            start = first * STREAM_BLOCK_SIZE
+            size = min(len(slab_streams) * STREAM_BLOCK_SIZE, simulations - start)
+            yield start, size, slab_streams
+
+    @staticmethod
+    def run_slab(
+        params: PathParameters | PortfolioParameters,
+        streams: list[np.random.SeedSequence],
+    ) -> np.ndarray:
+        """Траектории слоя в помесячной раскладке: (months + 1, blocks × STREAM_BLOCK_SIZE)"""
+        if isinstance(params, PortfolioParameters):
+            return PathEngine.run_portfolio_recurrence(params, PathEngine.draw_asset_returns(params, streams))
+
+        return PathEngine.run_recurrence(
+            initial=params.initial,
+            monthly_contribution=params.monthly_contribution,
+            growth=PathEngine.draw_growth(params, streams),
+        )
+
+    @staticmethod
+    def draw_growth(
+        params: PathParameters,
+        streams: list[BlockStream],
+    ) -> np.ndarray:
+        """Множители роста (1 + r) в помесячной раскладке: (months, blocks × STREAM_BLOCK_SIZE)
+
+        Каждый блок всегда рисуется целиком, поэтому пути блока не зависят
+        от общего числа симуляций и от разбиения на чанки.
+        """
+        if params.returns_path is not None:
+            return PathEngine.draw_bootstrap_growth(params, streams)
+
+        growth = PathEngine.draw_shocks(params.sampling, params.months, streams)
+        growth *= params.monthly_risk
+        growth += 1 + params.monthly_rate
+        return growth
+
+    @staticmethod
+    def draw_shocks(
+        sampling: SamplingScheme,
+        months: int,
+        streams: list[BlockStream],
+    ) -> np.ndarray:
+        """Стандартные нормальные шоки в помесячной раскладке: (months, blocks × STREAM_BLOCK_SIZE)"""
+        shocks = np.empty((len(streams), months, STREAM_BLOCK_SIZE), dtype=np.float64)
+        for block, stream in enumerate(streams):
+            PathEngine._draw_shocks(sampling, np.random.default_rng(stream), out=shocks[block])
+
+        return shocks.transpose(1, 0, 2).reshape(months, -1)
+
+    @staticmethod
+    def simulate_sweep_finals(
+        params: SweepParameters,
+        simulations: int,
+        streams: list[np.random.SeedSequence],
+    ) -> np.ndarray:
+        """Итоговые суммы всех ячеек сетки: (rates, risks, contributions, simulations)
+
+        Шоки рисуются один раз и масштабируются под каждую ячейку
+        broadcast-операцией, поэтому ячейки используют общие случайные
+        числа и совпадают с отдельными прогонами с тем же сидом.
+        """
+        rates = 1 + params.monthly_rates[:, None, None, None]
+        risks = params.monthly_risks[None, :, None, None]
+        contributions = params.monthly_contributions[None, None, :, None]
+        grid = (len(params.monthly_rates), len(params.monthly_risks), len(params.monthly_contributions))
+        finals = np.empty((*grid, simulations), dtype=np.float64)
+
+        for start, size, slab_streams in PathEngine.iter_slabs(simulations, streams):
+            shocks = PathEngine.draw_shocks(params.sampling, params.months, slab_streams)[:, :size]
+            amounts = np.full((*grid, size), params.initial, dtype=np.float64)
+            growth = np.empty((grid[0], grid[1], 1, size), dtype=np.float64)
+            for month in range(params.months):
+                np.multiply(shocks[month], risks, out=growth)
+                growth += rates
+                amounts += contributions
+                amounts *= growth
+            finals[..., start : start + size] = amounts
+
+        return finals
+
+    @staticmethod
+    def draw_bootstrap_growth(
+        params: PathParameters,
+        streams: list[BlockStream],
+    ) -> np.ndarray:
+        """Множители роста из истории стационарным бутстрэпом: (months, blocks × STREAM_BLOCK_SIZE)
+
+        Каждый месяц с вероятностью 1 / mean_block начинается новый блок со
+        случайного месяца истории, иначе блок продолжается следующим месяцем
+        по кругу. Индексы всех путей считаются без циклов по месяцам: начало
+        текущего блока — накопленный максимум месяцев перезапуска.
+        """
+        history = np.asarray(load_returns(params.returns_path))
+        size = len(streams) * STREAM_BLOCK_SIZE
+        restarts = np.empty((params.months, size), dtype=bool)
+        starts = np.empty((params.months, size), dtype=np.int64)
+        for block, stream in enumerate(streams):
+            rng = np.random.default_rng(stream)
+            columns = slice(block * STREAM_BLOCK_SIZE, (block + 1) * STREAM_BLOCK_SIZE)
+            restarts[:, columns] = rng.random((params.months, STREAM_BLOCK_SIZE)) < 1 / params.mean_block
+            starts[:, columns] = rng.integers(0, len(history), size=(params.months, STREAM_BLOCK_SIZE))
+        restarts[0] = True
+
+        months = np.arange(params.months)[:, None]
+        block_start = np.maximum.accumulate(np.where(restarts, months, 0), axis=0)
+        indexes = np.take_along_axis(starts, block_start, axis=0)
+        indexes += months - block_start
+        indexes %= len(history)
+
+        growth = np.take(history, indexes).astype(np.float64)
+        growth += 1
+        return growth
+
+    @staticmethod
+    def draw_asset_returns(
+        params: PortfolioParameters,
+        streams: list[np.random.SeedSequence],
+    ) -> np.ndarray:
+        """Коррелированные месячные доходности активов: (months, blocks × STREAM_BLOCK_SIZE, assets)
+
+        Независимые шоки всех путей и месяцев коррелируются одним
+        пакетным умножением на транспонированный фактор Холецкого.
+        """
+        assets = len(params.weights)
+        shocks = np.empty((len(streams), params.months * assets, STREAM_BLOCK_SIZE), dtype=np.float64)
+        for block, stream in enumerate(streams):
+            PathEngine._draw_shocks(params.sampling, np.random.default_rng(stream), out=shocks[block])
+
+        shocks = shocks.reshape(len(streams), params.months, assets, STREAM_BLOCK_SIZE)
+        shocks = shocks.transpose(1, 0, 3, 2).reshape(params.months, -1, assets)
+        returns = np.matmul(shocks, params.cholesky.T)
+        returns += params.monthly_returns
+        return returns
+
+    @staticmethod
+    def run_portfolio_recurrence(params: PortfolioParameters, returns: np.ndarray) -> np.ndarray:
+        """Стоимость портфеля в помесячной раскладке: (months + 1, paths)
+
+        Взнос делится по целевым долям, затем позиции растут на
+        доходности своих активов; раз в rebalance_every месяцев позиции
+        возвращаются к целевым долям (0 — без ребалансировки).
+        """
+        months, size, _ = returns.shape
+        block = np.empty((months + 1, size), dtype=np.float64)
+        block[0] = params.initial
+
+        holdings = np.multiply.outer(np.full(size, params.initial), params.weights)
+        contribution = params.monthly_contribution * params.weights
+        for month in range(months):
+            holdings += contribution
+            holdings *= 1 + returns[month]
+            holdings.sum(axis=1, out=block[month + 1])
+            if params.rebalance_every and (month + 1) % params.rebalance_every == 0:
+                np.multiply.outer(block[month + 1], params.weights, out=holdings)
+
+        return block
+
+    @staticmethod
+    def run_recurrence(
+        initial: float,
+        monthly_contribution: float,
+        growth: np.ndarray,
+    ) -> np.ndarray:
+        """Траектории в помесячной раскладке: (months + 1, paths)"""
+        months, size = growth.shape
+
+        block = np.empty((months + 1, size), dtype=np.float64)
+        block[0] = initial
+
+        for month in range(months):
+            np.add(block[month], monthly_contribution, out=block[month + 1])
+            block[month + 1] *= growth[month]
+
+        return block
+
+    @staticmethod
+    def _draw_shocks(sampling: SamplingScheme, rng: np.random.Generator, out: np.ndarray) -> None:
+        """Стандартные нормальные шоки одного блока: (измерения, STREAM_BLOCK_SIZE)"""
+        dimensions = out.shape[0]
+        if sampling == SamplingScheme.ANTITHETIC:
+            half = rng.standard_normal((dimensions, STREAM_BLOCK_SIZE // 2))
+            out[:, 0::2] = half
+            np.negative(half, out=out[:, 1::2])
+        elif sampling == SamplingScheme.SOBOL:
+            net = _sobol_net(dimensions)
+            from scipy.special import ndtri
+
+            shift = rng.integers(0, 2**SOBOL_BITS, size=(dimensions, 1), dtype=np.uint64)
+            ndtri(((net ^ shift) + 0.5) / 2**SOBOL_BITS, out=out)
+        else:
+            rng.standard_normal(out=out)
+
+
+@functools.lru_cache(maxsize=8)
+def _sobol_net(dimensions: int) -> np.ndarray:
+    """Первые STREAM_BLOCK_SIZE точек Sobol в целых: (dimensions, STREAM_BLOCK_SIZE)
+
+    Блоки рандомизируются независимым цифровым сдвигом, так что каждый
+    блок — отдельная реплика для оценки ошибки.
+    """
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        raise ValueError("Выборка Sobol недоступна: не установлен scipy")
+
+    sobol = qmc.Sobol(d=dimensions, scramble=False, bits=SOBOL_BITS)
+    points = sobol.random_base2(m=STREAM_BLOCK_SIZE.bit_length() - 1)
+    return np.ascontiguousarray((points * 2**SOBOL_BITS).astype(np.uint64).T)
+
+
+def load_returns(path: str) -> np.ndarray:
+    """Месячные доходности из файла истории, отображенного в память
+
+    Отображение кэшируется до изменения файла, поэтому запрос не читает
+    историю целиком: в память попадают только страницы выбранных месяцев.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise ValueError(f"Файл исторических доходностей недоступен: {path}")
+    return _map_returns(path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=8)
+def _map_returns(path: str, mtime_ns: int, size: int) -> np.memmap:
+    if size == 0 or size % RETURNS_DTYPE.itemsize:
+        raise ValueError(f"Файл исторических доходностей должен содержать массив float64: {path}")
+    return np.memmap(path, dtype=RETURNS_DTYPE, mode="r")
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import uuid
+
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+
+import numpy as np
+
+from models.results import MonteCarloRun
+from models.schemas import MonteCarloRequest
+from settings import Settings
+
+
+class MonteCarloRunStore:
+    """Хранилище прогонов для продолжения внутри процесса
+
+    Прогон хранит только итоговые суммы путей и состояния ГСЧ блоков,
+    поэтому продолжение не пересчитывает уже посчитанные месяцы. Прогоны
+    живут ttl секунд, при переполнении вытесняются самые старые.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_runs: int = 100):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_runs = max_runs
+        self._runs: dict[str, MonteCarloRun] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> MonteCarloRunStore:
+        return cls(
+            ttl_seconds=settings.montecarlo_run_ttl_seconds,
+            max_runs=settings.montecarlo_max_runs,
+        )
+
+    def save(
+        self,
+        request: MonteCarloRequest,
+        seed: int,
+        finals: np.ndarray,
+        states: list[dict[str, Any]],
+    ) -> MonteCarloRun:
+        self._purge_expired()
+        while len(self._runs) >= self.max_runs:
+            del self._runs[next(iter(self._runs))]
+
+        run = MonteCarloRun(
+            run_id=uuid.uuid4().hex,
+            request=request,
+            seed=seed,
+            finals=finals,
+            states=states,
+            created_at=datetime.now().astimezone(),
+        )
+        self._runs[run.run_id] = run
+        return run
+
+    def get(self, run_id: str) -> MonteCarloRun | None:
+        self._purge_expired()
+        return self._runs.get(run_id)
+
+    def expires_at(self, run: MonteCarloRun) -> datetime:
+        return run.created_at + self.ttl
+
+    def _purge_expired(self) -> None:
+        now = datetime.now().astimezone()
+        expired = [run_id for run_id, run in self._runs.items() if run.created_at + self.ttl <= now]
+        for run_id in expired:
+            del self._runs[run_id]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import contextlib
+
+from collections.abc import Generator
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SharedPathTarget:
+    """Адрес матрицы путей в разделяемой памяти; передается воркерам вместо данных"""
+
+    name: str
+    shape: tuple[int, int]
+    dtype: str
+
+    @contextlib.contextmanager
+    def attach(self) -> Generator[np.ndarray]:
+        """Подключиться к матрице из воркера; представления не должны пережить блок"""
+        shm = shared_memory.SharedMemory(name=self.name, track=False)
+        try:
+            yield np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+        finally:
+            shm.close()
+
+
+class SharedPathBuffer:
+    """Матрица (simulations, months + 1) в multiprocessing.shared_memory
+
+    Воркеры пишут каждый в свой диапазон строк, а родитель считает
+    статистики прямо по буферу без копирования и сериализации чанков.
+    Буфер освобождается при выходе из блока with, поэтому все, что
+    должно его пережить, нужно скопировать внутри блока.
+    """
+
+    def __init__(self, shape: tuple[int, int], dtype: str = "float64"):
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        self.target = SharedPathTarget(name=self._shm.name, shape=shape, dtype=dtype)
+        self.array: np.ndarray | None = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+
+    def __enter__(self) -> SharedPathBuffer:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.array is None:
+            return
+
+        self.array = None
+        self._shm.close()
+        self._shm.unlink()
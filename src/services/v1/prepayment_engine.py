@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import itertools
+import math
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from models.enums import EarlyPaymentType
+from models.enums import PaymentType
+from models.results import AmortizationSchedule
+from models.results import ScheduleSegment
+from models.schemas import EarlyPayment
+
+
+TERM_TOLERANCE = 1e-9
+
+
+class PrepaymentEngine:
+    """График с досрочными погашениями по отрезкам закрытых формул
+
+    Погашения делят срок на отрезки с постоянным платежом. Остаток
+    внутри отрезка и суммы процентов считаются по формулам, поэтому
+    погашение пересчитывает только параметры следующего отрезка, итоги
+    стоят O(число погашений), а строки строятся лишь для нужного окна.
+    """
+
+    @staticmethod
+    def segments(
+        amount: float,
+        monthly_rate: float,
+        months: int,
+        payment_type: PaymentType,
+        monthly_payment: float,
+        early_payments: Sequence[EarlyPayment],
+    ) -> list[ScheduleSegment]:
+        """Отрезки графика; последний заканчивается фактическим месяцем погашения кредита"""
+        level = amount / months if payment_type == PaymentType.DIFFERENTIATED else monthly_payment
+        segment = ScheduleSegment(first_month=1, last_month=months, balance=amount, level=level)
+        segments = [segment]
+
+        ordered = sorted(early_payments, key=lambda early_payment: early_payment.month)
+        for month, group in itertools.groupby(ordered, key=lambda early_payment: early_payment.month):
+            if month > segment.last_month:
+                break
+
+            balance = float(
+                PrepaymentEngine.balance(segment, month - segment.first_month + 1, monthly_rate, payment_type)
+            )
+            remaining = segment.last_month - month
+            level = segment.level
+            prepaid = 0.0
+            for early_payment in group:
+                paid = min(early_payment.amount, balance)
+                balance -= paid
+                prepaid += paid
+                if balance <= 0 or remaining == 0:
+                    continue
+                if early_payment.type == EarlyPaymentType.REDUCE_PAYMENT:
+                    level = PrepaymentEngine._level(balance, monthly_rate, remaining, payment_type)
+                else:
+                    remaining = min(remaining, PrepaymentEngine._term(balance, monthly_rate, level, payment_type))
+
+            segment.last_month = month
+            segment.prepayment = prepaid
+            if balance <= 0 or remaining == 0:
+                break
+
+            segment = ScheduleSegment(first_month=month + 1, last_month=month + remaining, balance=balance, level=level)
+            segments.append(segment)
+
+        return segments
+
+    @staticmethod
+    def balance(
+        segment: ScheduleSegment,
+        elapsed: int | np.ndarray,
+        monthly_rate: float,
+        payment_type: PaymentType,
+    ) -> float | np.ndarray:
+        """Остаток после elapsed регулярных платежей отрезка без его досрочного погашения
+
+        Для аннуитета B_k = P / r * (1 - (1 + r)^(k - n)), где n —
+        дробный срок, за который платеж P гасит остаток отрезка: форма
+        через expm1 не теряет точность к концу срока.
+        """
+        if payment_type == PaymentType.DIFFERENTIATED or monthly_rate == 0:
+            return segment.balance - elapsed * segment.level
+
+        log_growth = math.log1p(monthly_rate)
+        horizon = -math.log1p(-segment.balance * monthly_rate / segment.level) / log_growth
+        return -segment.level / monthly_rate * np.expm1((elapsed - horizon) * log_growth)
+
+    @staticmethod
+    def amortize(
+        segments: list[ScheduleSegment],
+        monthly_rate: float,
+        payment_type: PaymentType,
+        first_month: int,
+        last_month: int,
+    ) -> AmortizationSchedule:
+        """Неокругленные столбцы графика за месяцы first_month..last_month
+
+        Досрочное погашение входит в платеж и тело своего месяца, последний
+        месяц кредита гасит весь остаток.
+        """
+        final_month = segments[-1].last_month
+        parts: dict[str, list[np.ndarray]] = {
+            "month": [],
+            "payment": [],
+            "principal": [],
+            "interest": [],
+            "balance": [],
+        }
+        for segment in segments:
+            start, end = max(first_month, segment.first_month), min(last_month, segment.last_month)
+            if start > end:
+                continue
+
+            elapsed = np.arange(start - segment.first_month, end - segment.first_month + 2)
+            balances = np.asarray(PrepaymentEngine.balance(segment, elapsed, monthly_rate, payment_type))
+            interest = balances[:-1] * monthly_rate
+            if payment_type == PaymentType.DIFFERENTIATED:
+                principal = np.full(len(interest), segment.level)
+            else:
+                principal = segment.level - interest
+            balance = balances[1:].copy()
+
+            if end == segment.last_month:
+                principal[-1] += segment.prepayment
+                balance[-1] -= segment.prepayment
+            if end == final_month:
+                principal[-1] = balances[-2]
+                balance[-1] = 0
+
+            parts["month"].append(np.arange(start, end + 1))
+            parts["payment"].append(principal + interest)
+            parts["principal"].append(principal)
+            parts["interest"].append(interest)
+            parts["balance"].append(np.maximum(balance, 0))
+
+        return AmortizationSchedule(
+            **{name: np.concatenate(arrays) if arrays else np.empty(0) for name, arrays in parts.items()},
+        )
+
+    @staticmethod
+    def period_totals(
+        segments: list[ScheduleSegment],
+        monthly_rate: float,
+        payment_type: PaymentType,
+        first_month: int,
+        last_month: int,
+    ) -> tuple[float, float]:
+        """Тело, включая досрочные погашения, и проценты за месяцы first_month..last_month"""
+        principal = PrepaymentEngine._balance_before(
+            segments, first_month, monthly_rate, payment_type
+        ) - PrepaymentEngine._balance_before(segments, last_month + 1, monthly_rate, payment_type)
+
+        interest = 0.0
+        for segment in segments:
+            start, end = max(first_month, segment.first_month), min(last_month, segment.last_month)
+            if start > end:
+                continue
+
+            first, last = start - segment.first_month, end - segment.first_month + 1
+            count = last - first
+            if payment_type == PaymentType.DIFFERENTIATED or monthly_rate == 0:
+                interest += monthly_rate * (count * segment.balance - segment.level * (first + last - 1) * count / 2)
+            else:
+                start_balance, end_balance = PrepaymentEngine.balance(
+                    segment, np.array([first, last]), monthly_rate, payment_type
+                )
+                interest += count * segment.level - float(start_balance - end_balance)
+
+        return float(principal), interest
+
+    @staticmethod
+    def _balance_before(
+        segments: list[ScheduleSegment],
+        month: int,
+        monthly_rate: float,
+        payment_type: PaymentType,
+    ) -> float:
+        for segment in segments:
+            if month <= segment.last_month:
+                return float(PrepaymentEngine.balance(segment, month - segment.first_month, monthly_rate, payment_type))
+        return 0.0
+
+    @staticmethod
+    def _level(balance: float, monthly_rate: float, remaining: int, payment_type: PaymentType) -> float:
+        """Новый платеж или часть тела, гасящие остаток за оставшийся срок"""
+        if payment_type == PaymentType.DIFFERENTIATED or monthly_rate == 0:
+            return balance / remaining
+        return balance * monthly_rate / -math.expm1(-remaining * math.log1p(monthly_rate))
+
+    @staticmethod
+    def _term(balance: float, monthly_rate: float, level: float, payment_type: PaymentType) -> int:
+        """Число месяцев, за которое прежний платеж гасит остаток"""
+        if payment_type == PaymentType.DIFFERENTIATED or monthly_rate == 0:
+            term = balance / level
+        else:
+            term = -math.log1p(-balance * monthly_rate / level) / math.log1p(monthly_rate)
+        return max(math.ceil(term - TERM_TOLERANCE), 1)
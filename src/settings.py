@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from pydantic import Field
+from pydantic_settings import BaseSettings
+from pydantic_settings import SettingsConfigDict
+
+from models.enums import ExecutorType
+from models.enums import MemoryPolicy
+
+
+class Settings(BaseSettings):
+    """Настройки сервиса, читаются из переменных окружения с префиксом FINAPI_"""
+
+    model_config = SettingsConfigDict(env_prefix="FINAPI_")
+
+    montecarlo_executor: ExecutorType = Field(
+        default=ExecutorType.PROCESS,
+        description="Пул исполнителей для симуляций Монте-Карло",
+    )
+    montecarlo_workers: int | None = Field(
+        default=None,
+        ge=1,
+        description="Количество воркеров пула, по умолчанию число ядер",
+    )
+    montecarlo_chunk_cells: int = Field(
+        default=2_000_000,
+        ge=1,
+        description="Целевой объем чанка в ячейках «путь × месяц»",
+    )
+    montecarlo_parallel_threshold: int = Field(
+        default=200_000,
+        ge=0,
+        description="Объем задачи в ячейках, ниже которого симуляция не дробится",
+    )
+    montecarlo_memory_budget_mb: int = Field(
+        default=1024,
+        ge=1,
+        description="Бюджет памяти одного запроса Монте-Карло в мегабайтах",
+    )
+    montecarlo_memory_policy: MemoryPolicy = Field(
+        default=MemoryPolicy.DOWNGRADE,
+        description="Что делать с запросом сверх бюджета: отклонить или упростить вывод траекторий",
+    )
+    montecarlo_job_concurrency: int = Field(
+        default=2,
+        ge=1,
+        description="Количество одновременно выполняемых фоновых задач Монте-Карло",
+    )
+    montecarlo_job_ttl_seconds: float = Field(
+        default=3600,
+        gt=0,
+        description="Сколько секунд хранится результат завершенной задачи",
+    )
+    montecarlo_max_jobs: int = Field(
+        default=1000,
+        ge=1,
+        description="Максимальное число хранимых задач, включая завершенные",
+    )
+    montecarlo_run_ttl_seconds: float = Field(
+        default=3600,
+        gt=0,
+        description="Сколько секунд хранится прогон для продолжения",
+    )
+    montecarlo_max_runs: int = Field(
+        default=100,
+        ge=1,
+        description="Максимальное число хранимых прогонов; при переполнении вытесняются самые старые",
+    )
+    montecarlo_returns_path: Path | None = Field(
+        default=None,
+        description="Бинарный файл месячных доходностей (float64, little-endian, 0.01 = 1%) для бутстрэпа",
+    )
+
+
+settings = Settings()
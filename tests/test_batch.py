@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.models.schemas import CreditRequest
+from src.models.schemas import GoalRequest
+from src.models.schemas import MortgageRequest
+from src.models.schemas import SavingsRequest
+from src.services.v1.batch_calculator import BatchCalculator
+from src.services.v1.financial_calculator import FinancialCalculator
+
+
+def _single_results(items, request_model, calculate):
+    return [calculate(request_model(**(item | {"detail": "summary"}))).model_dump() for item in items]
+
+
+class TestBatch:
+    """Тесты пакетного расчета"""
+
+    def test_mortgage_batch_matches_single(self):
+        """Тест: пакетные итоги ипотек совпадают с поштучным расчетом"""
+        rng = np.random.default_rng(7)
+        items = [
+            {
+                "price": round(float(rng.uniform(1e5, 5e7)), 2),
+                "down_payment": round(float(rng.uniform(0, 9e4)), 2),
+                "years": int(rng.integers(1, 51)),
+                "rate": round(float(rng.uniform(0.1, 40)), 2),
+                "payment_type": str(rng.choice(["annuity", "differentiated"])),
+            }
+            for _ in range(500)
+        ]
+
+        response = BatchCalculator.calculate_mortgage_batch(items)
+
+        assert [item.index for item in response.items] == list(range(500))
+        assert [item.result.model_dump() for item in response.items] == _single_results(
+            items, MortgageRequest, FinancialCalculator.calculate_mortgage
+        )
+
+    def test_credit_batch_matches_single(self):
+        """Тест: пакетные итоги кредитов, включая нулевую ставку, совпадают с поштучным расчетом"""
+        rng = np.random.default_rng(8)
+        items = [
+            {
+                "amount": round(float(rng.uniform(1e3, 5e6)), 2),
+                "years": float(rng.choice([0.25, 0.5, 1, 2.5, 7, 30])),
+                "rate": float(rng.choice([0, round(float(rng.uniform(0.5, 40)), 2)])),
+                "commission": float(rng.choice([0, 1.5])),
+                "insurance": float(rng.choice([0, 0.9])),
+                "payment_type": str(rng.choice(["annuity", "differentiated"])),
+            }
+            for _ in range(500)
+        ]
+
+        response = BatchCalculator.calculate_credit_batch(items)
+
+        assert [item.result.model_dump() for item in response.items] == _single_results(
+            items, CreditRequest, FinancialCalculator.calculate_credit
+        )
+
+    def test_savings_batch_matches_single(self):
+        """Тест: пакетные итоги накоплений совпадают с поштучным расчетом для всех капитализаций"""
+        rng = np.random.default_rng(9)
+        items = [
+            {
+                "initial": round(float(rng.uniform(0, 1e6)), 2),
+                "monthly": float(rng.choice([0, round(float(rng.uniform(0, 1e5)), 2)])),
+                "years": int(rng.integers(1, 41)),
+                "rate": float(rng.choice([0, round(float(rng.uniform(0.1, 20)), 2)])),
+                "capitalization": str(rng.choice(["daily", "monthly", "quarterly", "yearly", "none"])),
+                "tax_rate": float(rng.choice([0, 13])),
+                "inflation": float(rng.choice([0, 7])),
+            }
+            for _ in range(500)
+        ]
+
+        response = BatchCalculator.calculate_savings_batch(items)
+        expected = _single_results(items, SavingsRequest, FinancialCalculator.calculate_savings)
+
+        for item, single in zip(response.items, expected):
+            assert item.result.model_dump() == pytest.approx(single, rel=1e-12)
+
+    def test_goal_batch_matches_single(self):
+        """Тест: пакетные итоги целей с фиксированным и расчетным взносом совпадают с поштучным расчетом"""
+        rng = np.random.default_rng(10)
+        items = [
+            {
+                "goal_amount": round(float(rng.uniform(1e4, 1e7)), 2),
+                "current_savings": round(float(rng.uniform(0, 2e6)), 2),
+                "years": int(rng.integers(1, 41)),
+                "expected_rate": float(rng.choice([0, round(float(rng.uniform(0.1, 20)), 2)])),
+                "monthly_contribution": rng.choice([None, round(float(rng.uniform(0, 1e5)), 2)]),
+            }
+            for _ in range(500)
+        ]
+
+        response = BatchCalculator.calculate_goal_batch(items)
+        expected = _single_results(items, GoalRequest, FinancialCalculator.calculate_goal)
+
+        for item, single in zip(response.items, expected):
+            assert item.result.model_dump() == pytest.approx(single, rel=1e-12)
+
+    def test_errors_reported_per_item_in_order(self):
+        """Тест: некорректные запросы получают ошибку, остальные считаются, порядок сохраняется"""
+        valid = {"price": 5_000_000, "down_payment": 1_000_000, "years": 20, "rate": 12.0}
+        items = [
+            valid,
+            valid | {"price": -1},
+            "not a request",
+            valid | {"down_payment": 5_000_000},
+            valid | {"years": 10},
+        ]
+
+        response = BatchCalculator.calculate_mortgage_batch(items)
+
+        assert [item.index for item in response.items] == list(range(5))
+        assert [item.error is None for item in response.items] == [True, False, False, False, True]
+        assert "price" in response.items[1].error
+        assert "Первоначальный взнос" in response.items[3].error
+        assert response.items[1].result is None
+        assert response.items[0].result.model_dump() == _single_results(
+            [valid], MortgageRequest, FinancialCalculator.calculate_mortgage
+        )[0]
+        assert response.items[4].result.term_months == 120
+
+    def test_mortgage_batch_early_payments(self):
+        """Тест: ипотеки с досрочными погашениями и окном считаются в пакете поштучно"""
+        items = [
+            {"price": 5_000_000, "down_payment": 1_000_000, "years": 20, "rate": 12.0},
+            {
+                "price": 5_000_000,
+                "down_payment": 1_000_000,
+                "years": 20,
+                "rate": 12.0,
+                "early_payments": [{"month": 24, "amount": 1_000_000}],
+                "to_month": 12,
+            },
+        ]
+
+        response = BatchCalculator.calculate_mortgage_batch(items)
+        expected = _single_results(items, MortgageRequest, FinancialCalculator.calculate_mortgage)
+
+        assert [item.result.model_dump() for item in response.items] == expected
+        assert response.items[1].result.term_months < response.items[0].result.term_months
+        assert response.items[1].result.period_totals is not None
+        assert response.items[1].result.payment_schedule is None
+
+    def test_credit_batch_windows(self):
+        """Тест: кредиты с окном, включая нулевую ставку, получают итоги периода"""
+        items = [
+            {"amount": 120_000, "years": 2, "rate": 0, "commission": 1.5, "from_month": 7, "to_month": 12},
+            {"amount": 500_000, "years": 3, "rate": 15.0, "insurance": 0.9, "to_month": 12},
+        ]
+
+        response = BatchCalculator.calculate_credit_batch(items)
+
+        assert [item.result.model_dump() for item in response.items] == _single_results(
+            items, CreditRequest, FinancialCalculator.calculate_credit
+        )
+        assert response.items[0].result.period_totals.principal == 30_000
+        assert response.items[1].result.period_totals is not None
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import numpy as np
 import pytest
 
 from src.models.schemas import CreditRequest
@@ -104,6 +105,150 @@ class TestCredit:
         assert len(response.payment_schedule) == 12
         assert response.monthly_payment > 0
 
+    @pytest.mark.parametrize("payment_type", [PaymentType.ANNUITY, PaymentType.DIFFERENTIATED])
+    def test_schedule_matches_row_by_row(self, payment_type):
+        """Тест: векторизованный график с комиссией и страховкой совпадает с построчным до копейки"""
+        rng = np.random.default_rng(3)
+        for _ in range(200):
+            request = CreditRequest(
+                amount=round(float(rng.uniform(1e3, 5e6)), 2),
+                years=float(rng.choice([0.25, 0.5, 1, 1.5, 3, 7, 30])),
+                rate=round(float(rng.uniform(0.5, 40)), 2),
+                payment_type=payment_type,
+                commission=float(rng.choice([0, 1.5, 3])),
+                insurance=float(rng.choice([0, 0.7, 1])),
+            )
+            response = FinancialCalculator.calculate_credit(request)
+
+            monthly_rate = request.rate / 100 / 12
+            months = int(request.years * 12)
+            commission_amount = request.amount * request.commission / 100
+            effective_amount = request.amount - commission_amount
+            monthly_insurance = request.amount * request.insurance / 100 / 12 if request.insurance > 0 else 0.0
+            monthly_payment = FinancialCalculator._calculate_credit_monthly_payment(
+                effective_amount=effective_amount,
+                monthly_rate=monthly_rate,
+                months=months,
+                payment_type=payment_type,
+            )
+
+            expected = []
+            balance = effective_amount
+            for month in range(1, months + 1):
+                if payment_type == PaymentType.ANNUITY:
+                    base_payment = monthly_payment
+                    interest = balance * monthly_rate
+                    principal = base_payment - interest
+                else:
+                    principal = effective_amount / months
+                    interest = balance * monthly_rate
+                    base_payment = principal + interest
+                balance -= principal
+                fees = monthly_insurance
+                if month == 1 and commission_amount > 0:
+                    fees += commission_amount
+                expected.append(
+                    {
+                        "month": month,
+                        "payment": round(base_payment + fees, 2),
+                        "principal": round(principal, 2),
+                        "interest": round(interest, 2),
+                        "balance": round(max(balance, 0), 2),
+                        "fees": round(fees, 2),
+                    },
+                )
+
+            assert [row.model_dump() for row in response.payment_schedule] == expected
+
+    def test_columns_format_matches_rows(self):
+        """Тест: столбцовый график кредита с комиссией совпадает с построчным"""
+        params = {"amount": 700_000, "years": 2, "rate": 14.0, "commission": 2.0, "insurance": 1.0}
+        rows = FinancialCalculator.calculate_credit(CreditRequest(**params))
+        columns = FinancialCalculator.calculate_credit(CreditRequest(**params, schedule_format="columns"))
+
+        for field in ("month", "payment", "principal", "interest", "fees", "balance"):
+            assert getattr(columns.payment_schedule, field) == [getattr(row, field) for row in rows.payment_schedule]
+
+    def test_columns_format_zero_rate(self):
+        """Тест: при нулевой ставке столбцовый график пустой"""
+        request = CreditRequest(amount=100_000, years=1, rate=0, schedule_format="columns")
+
+        response = FinancialCalculator.calculate_credit(request)
+
+        assert response.payment_schedule.month == []
+        assert response.payment_schedule.fees == []
+
+    def test_schedule_window_fees(self):
+        """Тест: комиссия попадает только в окно с первым месяцем, страховка — в каждый месяц"""
+        params = {"amount": 700_000, "years": 3, "rate": 14.0, "commission": 2.0, "insurance": 1.0}
+        full = FinancialCalculator.calculate_credit(CreditRequest(**params)).payment_schedule
+        first = FinancialCalculator.calculate_credit(CreditRequest(**params, to_month=6)).payment_schedule
+        later = FinancialCalculator.calculate_credit(CreditRequest(**params, from_month=13, to_month=24)).payment_schedule
+
+        assert [row.month for row in later] == list(range(13, 25))
+        assert first[0].fees == full[0].fees
+        for row, expected in zip(first + later, full[:6] + full[12:24]):
+            assert row.fees == expected.fees
+            assert row.payment == pytest.approx(expected.payment, abs=0.011)
+            assert row.balance == pytest.approx(expected.balance, abs=0.011)
+
+    @pytest.mark.parametrize("rate", [0, 15.0])
+    def test_summary_detail_skips_schedule(self, credit_request, rate):
+        """Тест: detail=summary возвращает те же итоги без графика платежей"""
+        params = credit_request.model_dump() | {"rate": rate, "commission": 1.0}
+        full = FinancialCalculator.calculate_credit(CreditRequest(**params))
+        summary = FinancialCalculator.calculate_credit(CreditRequest(**(params | {"detail": "summary"})))
+
+        assert summary.payment_schedule is None
+        assert summary.model_dump(exclude={"payment_schedule"}) == full.model_dump(exclude={"payment_schedule"})
+
+    def test_differentiated_total_payment_matches_schedule(self):
+        """Тест: итог дифференцированного кредита равен сумме платежей графика"""
+        request = CreditRequest(
+            amount=900_000,
+            years=5,
+            rate=17.0,
+            payment_type=PaymentType.DIFFERENTIATED,
+            commission=1.0,
+            insurance=0.5,
+        )
+
+        response = FinancialCalculator.calculate_credit(request)
+        schedule_total = sum(row.payment for row in response.payment_schedule)
+
+        assert response.total_payment == pytest.approx(schedule_total, abs=len(response.payment_schedule) * 0.005)
+
+    def test_period_totals_with_fees(self):
+        """Тест: итоги периода кредита включают страховку и комиссию первого месяца"""
+        params = {"amount": 700_000, "years": 3, "rate": 14.0, "commission": 2.0, "insurance": 1.0}
+        rows = FinancialCalculator.calculate_credit(CreditRequest(**params)).payment_schedule
+
+        for from_month, to_month in ((1, 12), (7, 30)):
+            response = FinancialCalculator.calculate_credit(
+                CreditRequest(**params, from_month=from_month, to_month=to_month, detail="summary"),
+            )
+            window = rows[from_month - 1 : to_month]
+
+            rounding = len(window) * 0.005 + 0.01
+            assert response.period_totals.fees == pytest.approx(sum(row.fees for row in window), abs=rounding)
+            assert response.period_totals.interest == pytest.approx(sum(row.interest for row in window), abs=rounding)
+            assert response.period_totals.payment == pytest.approx(sum(row.payment for row in window), abs=rounding)
+
+    def test_period_totals_zero_rate(self):
+        """Тест: при нулевой ставке итоги периода считаются по линейному погашению тела"""
+        params = {"amount": 120_000, "years": 2, "rate": 0, "commission": 1.5}
+        full = FinancialCalculator.calculate_credit(CreditRequest(**params, from_month=1))
+        later = FinancialCalculator.calculate_credit(CreditRequest(**params, from_month=7, to_month=12))
+
+        assert full.period_totals.principal == 120_000
+        assert full.period_totals.payment == full.total_payment
+        assert full.period_totals.fees == full.commission_amount
+        assert (later.period_totals.from_month, later.period_totals.to_month) == (7, 12)
+        assert later.period_totals.principal == 30_000
+        assert later.period_totals.interest == 0
+        assert later.period_totals.fees == 0
+        assert later.period_totals.payment == 30_000
+
     def test_effective_rate_calculation(self):
         """Тест расчета эффективной ставки"""
         request = CreditRequest(
@@ -104,6 +104,32 @@ class TestGoal:
 
         assert response.is_achievable is True
 
+    @pytest.mark.parametrize("monthly_contribution", [None, 15_000])
+    def test_columns_format_matches_rows(self, goal_request, monthly_contribution):
+        """Тест: столбцовый помесячный график совпадает с построчным"""
+        params = goal_request.model_dump() | {"monthly_contribution": monthly_contribution}
+        rows = FinancialCalculator.calculate_goal(GoalRequest(**params))
+        columns = FinancialCalculator.calculate_goal(GoalRequest(**(params | {"schedule_format": "columns"})))
+
+        assert columns.required_monthly == rows.required_monthly
+        for field in ("month", "amount", "contributions", "interest"):
+            assert getattr(columns.monthly_breakdown, field) == [getattr(row, field) for row in rows.monthly_breakdown]
+
+    @pytest.mark.parametrize("expected_rate", [0, 10.0])
+    @pytest.mark.parametrize("monthly_contribution", [None, 15_000])
+    def test_summary_detail_skips_breakdown(self, goal_request, expected_rate, monthly_contribution):
+        """Тест: detail=summary возвращает те же итоги без помесячного графика"""
+        params = goal_request.model_dump() | {
+            "expected_rate": expected_rate,
+            "monthly_contribution": monthly_contribution,
+        }
+        full = FinancialCalculator.calculate_goal(GoalRequest(**params))
+        summary = FinancialCalculator.calculate_goal(GoalRequest(**(params | {"detail": "summary"})))
+
+        assert summary.monthly_breakdown is None
+        assert full.monthly_breakdown is not None
+        assert summary.model_dump(exclude={"monthly_breakdown"}) == full.model_dump(exclude={"monthly_breakdown"})
+
 
 @pytest.mark.parametrize(
     "goal_amount,current_savings,years,rate",
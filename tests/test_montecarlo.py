@@ -0,0 +1,1437 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import io
+import json
+
+import numpy as np
+import pytest
+
+from src.models.enums import ExecutorType
+from src.models.enums import JobStatus
+from src.models.enums import MemoryPolicy
+from src.models.enums import PathDtype
+from src.models.enums import PathsOutput
+from src.models.enums import PrecisionMetric
+from src.models.enums import RebalancingFrequency
+from src.models.enums import ReturnModel
+from src.models.enums import SamplingScheme
+from src.models.enums import StatisticsMode
+from src.models.schemas import MonteCarloPrecision
+from src.models.schemas import MonteCarloRequest
+from src.models.schemas import MonteCarloRunExtension
+from src.models.schemas import MonteCarloSweepRequest
+from src.models.schemas import PortfolioMonteCarloRequest
+from src.services.v1.montecarlo_service import MonteCarloExecutor
+from src.services.v1.montecarlo_service import MonteCarloJobManager
+from src.services.v1.montecarlo_service import MonteCarloRunStore
+from src.services.v1.montecarlo_service import MonteCarloService
+from src.services.v1.montecarlo_service.accumulators import FinalsAccumulator
+from src.services.v1.montecarlo_service.accumulators import QuantileSketch
+from src.services.v1.montecarlo_service.accumulators import RunningStats
+from src.services.v1.montecarlo_service.encoders import MonteCarloEncoder
+from src.services.v1.montecarlo_service.encoders import NothingToEncodeError
+from src.services.v1.montecarlo_service.memory import MemoryBudget
+from src.services.v1.montecarlo_service.memory import MemoryBudgetExceededError
+from src.services.v1.montecarlo_service.path_engine import PathEngine
+from src.services.v1.montecarlo_service.path_engine import PathParameters
+from src.services.v1.montecarlo_service.shared_buffer import SharedPathBuffer
+
+
+@pytest.fixture
+def montecarlo_request():
+    """Базовая фикстура для симуляции Монте-Карло"""
+    return MonteCarloRequest(
+        initial=100_000,
+        monthly=10_000,
+        years=10,
+        avg_return=8.0,
+        risk=15.0,
+        simulations=1000,
+        goal_amount=2_000_000,
+    )
+
+
+@pytest.fixture
+def raw_request(montecarlo_request):
+    """Фикстура с выгрузкой всех траекторий"""
+    return montecarlo_request.model_copy(update={"paths_output": PathsOutput.RAW})
+
+
+@pytest.fixture
+def montecarlo_service():
+    """Сервис Монте-Карло на пуле потоков"""
+    executor = MonteCarloExecutor(
+        executor_type=ExecutorType.THREAD,
+        workers=3,
+        parallel_threshold=0,
+    )
+    yield MonteCarloService(executor)
+    executor.shutdown()
+
+
+class TestPathEngine:
+    """Тесты векторизованного движка траекторий"""
+
+    def test_matches_scalar_recurrence(self):
+        """Тест совпадения с поэлементной рекуррентностью на тех же доходностях"""
+        months, size = 24, 5
+        returns = np.random.default_rng(42).normal(0.01, 0.05, size=(months, size))
+        block = PathEngine.run_recurrence(
+            initial=1000,
+            monthly_contribution=100,
+            growth=1 + returns,
+        )
+
+        for path in range(size):
+            amount = 1000.0
+            for month in range(months):
+                amount += 100
+                amount *= 1 + returns[month, path]
+                assert block[month + 1, path] == pytest.approx(amount, rel=1e-12)
+
+    def test_blocks_cover_all_paths(self):
+        """Тест разбиения на блоки потоков"""
+        _, streams = PathEngine.spawn_streams(seed=1, simulations=3000)
+        paths = PathEngine.simulate_paths(
+            params=PathParameters(
+                initial=1000,
+                monthly_contribution=100,
+                monthly_rate=0.01,
+                monthly_risk=0.05,
+                months=12,
+            ),
+            simulations=3000,
+            streams=streams,
+        )
+
+        assert len(streams) == 12
+        assert paths.shape == (3000, 13)
+        assert np.all(paths[:, 0] == 1000)
+        assert np.all(np.isfinite(paths))
+        assert len(np.unique(paths[:, -1])) == 3000
+
+    def test_mean_matches_expectation(self):
+        """Тест совпадения среднего с аналитическим ожиданием"""
+        months, rate = 120, 0.005
+        _, streams = PathEngine.spawn_streams(seed=7, simulations=20_000)
+        paths = PathEngine.simulate_paths(
+            params=PathParameters(
+                initial=100_000,
+                monthly_contribution=1000,
+                monthly_rate=rate,
+                monthly_risk=0.04,
+                months=months,
+            ),
+            simulations=20_000,
+            streams=streams,
+        )
+
+        expected = 100_000.0
+        for _ in range(months):
+            expected = (expected + 1000) * (1 + rate)
+
+        assert paths[:, -1].mean() == pytest.approx(expected, rel=0.01)
+
+    def test_antithetic_pairs_mirror_shocks(self):
+        """Тест зеркальности шоков в антитетических парах"""
+        params = PathParameters(
+            initial=0,
+            monthly_contribution=0,
+            monthly_rate=0.01,
+            monthly_risk=0.05,
+            months=6,
+            sampling=SamplingScheme.ANTITHETIC,
+        )
+        _, streams = PathEngine.spawn_streams(seed=3, simulations=512)
+        growth = PathEngine.draw_growth(params, streams)
+
+        shocks = (growth - 1.01) / 0.05
+        np.testing.assert_allclose(shocks[:, 0::2], -shocks[:, 1::2], atol=1e-12)
+
+    def test_sobol_block_is_stratified(self):
+        """Тест равномерности сетки Sobol в одном блоке"""
+        pytest.importorskip("scipy")
+        params = PathParameters(
+            initial=0,
+            monthly_contribution=0,
+            monthly_rate=0.0,
+            monthly_risk=1.0,
+            months=4,
+            sampling=SamplingScheme.SOBOL,
+        )
+        _, streams = PathEngine.spawn_streams(seed=5, simulations=256)
+        shocks = PathEngine.draw_growth(params, streams) - 1
+
+        for month in range(params.months):
+            assert np.abs(shocks[month].mean()) < 0.02
+            counts = np.histogram(shocks[month], bins=[-np.inf, -0.6745, 0, 0.6745, np.inf])[0]
+            assert counts.tolist() == [64, 64, 64, 64]
+
+
+class TestMonteCarloService:
+    """Тесты сервиса Монте-Карло"""
+
+    def test_simulate(self, montecarlo_service, raw_request):
+        """Тест параллельной симуляции"""
+        response = asyncio.run(montecarlo_service.simulate(raw_request))
+
+        assert len(response.simulations_data) == raw_request.simulations
+        assert len(response.simulations_data[0]) == raw_request.years * 12 + 1
+        assert response.statistics["min"] <= response.statistics["median"] <= response.statistics["max"]
+        assert sum(bucket["count"] for bucket in response.distribution) == raw_request.simulations
+        assert 0 <= response.probabilities["reach_goal"] <= 100
+
+    def test_sync_simulate(self, raw_request):
+        """Тест синхронной симуляции"""
+        response = MonteCarloService._sync_simulate(raw_request)
+
+        assert len(response.simulations_data) == raw_request.simulations
+        assert response.percentiles["5"] <= response.percentiles["50"] <= response.percentiles["95"]
+
+    def test_process_pool(self, raw_request):
+        """Тест симуляции на пуле процессов"""
+        executor = MonteCarloExecutor(
+            executor_type=ExecutorType.PROCESS,
+            workers=2,
+            parallel_threshold=0,
+        )
+        request = raw_request.model_copy(update={"seed": 17})
+        executor.start()
+        try:
+            response = asyncio.run(MonteCarloService(executor).simulate(request))
+        finally:
+            executor.shutdown()
+
+        assert len(response.simulations_data) == raw_request.simulations
+        assert response.simulations_data == MonteCarloService._sync_simulate(request).simulations_data
+        assert not executor.started
+
+    def test_seed_reproducible_across_splits(self, raw_request):
+        """Тест: один сид дает побайтно одинаковый результат при любом разбиении"""
+        request = raw_request.model_copy(update={"seed": 2024})
+        responses = []
+        for workers in (1, 3, 5):
+            executor = MonteCarloExecutor(
+                executor_type=ExecutorType.THREAD,
+                workers=workers,
+                parallel_threshold=0,
+            )
+            responses.append(asyncio.run(MonteCarloService(executor).simulate(request)))
+            executor.shutdown()
+        responses.append(MonteCarloService._sync_simulate(request))
+
+        first = np.array(responses[0].simulations_data)
+        for response in responses[1:]:
+            assert np.array_equal(np.array(response.simulations_data), first)
+            assert response.statistics == responses[0].statistics
+        assert responses[0].seed == 2024
+
+    def test_seed_prefix_stable(self, raw_request):
+        """Тест: первые пути не зависят от общего числа симуляций"""
+        small = MonteCarloService._sync_simulate(raw_request.model_copy(update={"seed": 5}))
+        large = MonteCarloService._sync_simulate(
+            raw_request.model_copy(update={"seed": 5, "simulations": 1500}),
+        )
+
+        assert large.simulations_data[:1000] == small.simulations_data
+
+    def test_unseeded_runs_differ(self, raw_request):
+        """Тест: без сида каждый запуск получает новый сид"""
+        first = MonteCarloService._sync_simulate(raw_request)
+        second = MonteCarloService._sync_simulate(raw_request)
+
+        assert first.seed != second.seed
+        assert first.simulations_data != second.simulations_data
+
+    @pytest.mark.parametrize("sampling", list(SamplingScheme))
+    def test_sampling_reproducible_across_splits(self, montecarlo_request, sampling):
+        """Тест: схемы выборки воспроизводимы по сиду при любом разбиении"""
+        if sampling == SamplingScheme.SOBOL:
+            pytest.importorskip("scipy")
+        request = montecarlo_request.model_copy(update={"seed": 11, "sampling": sampling})
+        executor = MonteCarloExecutor(executor_type=ExecutorType.THREAD, workers=3, parallel_threshold=0)
+        parallel = asyncio.run(MonteCarloService(executor).simulate(request))
+        executor.shutdown()
+        sequential = MonteCarloService._sync_simulate(request)
+
+        assert parallel.statistics == sequential.statistics
+        assert parallel.standard_error == sequential.standard_error
+
+    def test_variance_reduction_lowers_standard_error(self, montecarlo_request):
+        """Тест: антитетика и Sobol уменьшают стандартную ошибку среднего"""
+        pytest.importorskip("scipy")
+        request = montecarlo_request.model_copy(update={"seed": 9, "simulations": 8192})
+        errors = {
+            sampling: MonteCarloService._sync_simulate(
+                request.model_copy(update={"sampling": sampling}),
+            ).standard_error["mean"]
+            for sampling in SamplingScheme
+        }
+
+        assert errors[SamplingScheme.ANTITHETIC] < errors[SamplingScheme.PSEUDO]
+        assert errors[SamplingScheme.SOBOL] < errors[SamplingScheme.PSEUDO]
+
+    def test_standard_error_matches_pseudo_formula(self, montecarlo_request):
+        """Тест: для псевдослучайной выборки ошибка равна std / sqrt(n)"""
+        response = MonteCarloService._sync_simulate(montecarlo_request.model_copy(update={"seed": 1}))
+        n = montecarlo_request.simulations
+        finals = response.statistics
+
+        assert response.standard_error["mean"] == pytest.approx(finals["std"] * np.sqrt(n / (n - 1)) / np.sqrt(n))
+        assert response.standard_error["reach_goal"] is not None
+
+
+    def test_bands_by_default(self, montecarlo_request):
+        """Тест: по умолчанию возвращаются полосы, а не сырые пути"""
+        response = MonteCarloService._sync_simulate(montecarlo_request)
+        months = montecarlo_request.years * 12
+
+        assert response.simulations_data is None
+        assert response.sample_paths is None
+        assert list(response.bands) == ["5", "25", "50", "75", "95"]
+        assert all(len(band) == months + 1 for band in response.bands.values())
+
+        bands = np.array(list(response.bands.values()))
+        assert np.all(np.diff(bands, axis=0) >= 0)
+        assert response.bands["50"][-1] == pytest.approx(response.percentiles["50"])
+
+    def test_bands_match_raw_paths(self, raw_request):
+        """Тест: полосы совпадают с перцентилями сырых путей"""
+        request = raw_request.model_copy(update={"seed": 3, "band_percentiles": [2.5, 97.5]})
+        response = MonteCarloService._sync_simulate(request)
+        paths = np.array(response.simulations_data)
+
+        assert np.allclose(response.bands["2.5"], np.percentile(paths, 2.5, axis=0))
+        assert np.allclose(response.bands["97.5"], np.percentile(paths, 97.5, axis=0))
+
+    def test_sample_paths(self, montecarlo_request):
+        """Тест репрезентативных траекторий"""
+        request = montecarlo_request.model_copy(
+            update={"paths_output": PathsOutput.NONE, "sample_paths": 5},
+        )
+        response = MonteCarloService._sync_simulate(request)
+        finals = [path[-1] for path in response.sample_paths]
+
+        assert response.bands is None
+        assert len(response.sample_paths) == 5
+        assert finals == sorted(finals)
+        assert finals[0] == pytest.approx(response.statistics["min"])
+        assert finals[-1] == pytest.approx(response.statistics["max"])
+
+    def test_stream_matches_simulate(self, montecarlo_service, raw_request):
+        """Тест: поток дает ту же сводку и те же пути, что и обычный ответ"""
+        request = raw_request.model_copy(update={"seed": 11, "simulations": 5000})
+
+        async def collect():
+            return [event async for event in montecarlo_service.simulate_stream(request)]
+
+        events = asyncio.run(collect())
+        response = MonteCarloService._sync_simulate(request)
+
+        summary, batches = events[0], events[1:]
+        assert summary["type"] == "summary"
+        assert summary["seed"] == 11
+        assert summary["statistics"] == response.statistics
+        assert summary["probabilities"] == response.probabilities
+        assert [batch["offset"] for batch in batches] == [0, 2048, 4096]
+
+        paths = [path for batch in batches for path in batch["paths"]]
+        assert paths == response.simulations_data
+
+    def test_stream_paths_only_for_raw(self, montecarlo_service, montecarlo_request):
+        """Тест: без paths_output=raw поток ограничен сводкой"""
+
+        async def collect():
+            return [event async for event in montecarlo_service.simulate_stream(montecarlo_request)]
+
+        events = asyncio.run(collect())
+
+        assert [event["type"] for event in events] == ["summary"]
+
+    def test_stream_rejects_raw_paths_in_streaming_mode(self, montecarlo_service, raw_request):
+        """Тест: сырые пути в потоке не отдаются в потоковом режиме статистики"""
+        request = raw_request.model_copy(
+            update={"statistics_mode": StatisticsMode.STREAMING, "simulations": 1_000_000},
+        )
+
+        async def collect():
+            return [event async for event in montecarlo_service.simulate_stream(request)]
+
+        with pytest.raises(ValueError, match="Сырые пути"):
+            asyncio.run(collect())
+
+
+class TestMonteCarloEncoder:
+    """Тесты бинарных форматов ответа"""
+
+    def test_npy_roundtrip(self, montecarlo_service, raw_request):
+        """Тест: полосы и пути читаются последовательными np.load, последней идет полная сводка"""
+        result = asyncio.run(montecarlo_service.simulate_arrays(raw_request))
+        buffer = io.BytesIO(MonteCarloEncoder.to_npy(result))
+
+        header = json.loads(MonteCarloEncoder.summary_header(result))
+        assert header["arrays"] == ["bands", "paths", "summary"]
+        assert np.array_equal(np.load(buffer), result.bands)
+        assert np.array_equal(np.load(buffer), result.paths)
+
+        summary = json.loads(np.load(buffer).tobytes())
+        assert summary["seed"] == header["seed"] == result.seed
+        assert summary["statistics"] == header["statistics"] == result.summary["statistics"]
+        assert summary["distribution"] == result.summary["distribution"]
+        assert "distribution" not in header
+
+    def test_npy_sample_paths(self, montecarlo_service, montecarlo_request):
+        """Тест: репрезентативные траектории идут в .npy отдельным массивом"""
+        request = montecarlo_request.model_copy(update={"sample_paths": 5})
+        result = asyncio.run(montecarlo_service.simulate_arrays(request))
+        buffer = io.BytesIO(MonteCarloEncoder.to_npy(result))
+
+        assert json.loads(MonteCarloEncoder.summary_header(result))["arrays"] == ["bands", "sample_paths", "summary"]
+        assert np.array_equal(np.load(buffer), result.bands)
+        assert np.array_equal(np.load(buffer), result.sample_paths)
+
+    def test_arrow_roundtrip(self, montecarlo_service, raw_request):
+        """Тест: строки Arrow совпадают со строками матриц"""
+        pa = pytest.importorskip("pyarrow")
+        request = raw_request.model_copy(update={"sample_paths": 5})
+        result = asyncio.run(montecarlo_service.simulate_arrays(request))
+
+        table = pa.ipc.open_stream(MonteCarloEncoder.to_arrow(result)).read_all()
+        values = np.stack(table.column("values").to_numpy(zero_copy_only=False))
+        kinds = np.array(table.column("kind").to_pylist())
+
+        assert table.schema.field("values").type == pa.list_(pa.float64(), request.years * 12 + 1)
+        assert table.num_rows == len(result.bands) + 5 + request.simulations
+        assert np.array_equal(values[kinds == "bands"], result.bands)
+        assert np.array_equal(values[kinds == "sample_paths"], result.sample_paths)
+        assert np.array_equal(values[kinds == "paths"], result.paths)
+        assert table.column("index").to_pylist()[-1] == request.simulations - 1
+        assert json.loads(table.schema.metadata[b"summary"])["seed"] == result.seed
+
+    def test_arrow_float32_paths(self, montecarlo_service, raw_request):
+        """Тест: пути float32 передаются в Arrow как float32"""
+        pa = pytest.importorskip("pyarrow")
+        request = raw_request.model_copy(update={"path_dtype": PathDtype.FLOAT32})
+        result = asyncio.run(montecarlo_service.simulate_arrays(request))
+
+        table = pa.ipc.open_stream(MonteCarloEncoder.to_arrow(result)).read_all()
+        values = np.stack(table.column("values").to_numpy(zero_copy_only=False))
+        kinds = np.array(table.column("kind").to_pylist())
+
+        assert table.schema.field("values").type.value_type == pa.float32()
+        assert np.array_equal(values[kinds == "paths"], result.paths)
+
+    def test_nothing_to_encode(self, montecarlo_service, montecarlo_request):
+        """Тест: без полос, траекторий и путей бинарные форматы отклоняются, а не отдают пустой ответ"""
+        request = montecarlo_request.model_copy(update={"paths_output": PathsOutput.NONE})
+        result = asyncio.run(montecarlo_service.simulate_arrays(request))
+
+        with pytest.raises(NothingToEncodeError, match="paths_output"):
+            MonteCarloEncoder.check_request(request)
+        with pytest.raises(NothingToEncodeError):
+            MonteCarloEncoder.to_npy(result)
+        with pytest.raises(NothingToEncodeError):
+            MonteCarloEncoder.to_arrow(result)
+        MonteCarloEncoder.check_request(request.model_copy(update={"sample_paths": 3}))
+
+
+class TestAccumulators:
+    """Тесты сливаемых потоковых сводок"""
+
+    def test_running_stats_merge(self):
+        """Тест: слияние по частям совпадает с расчетом по всему массиву"""
+        values = np.random.default_rng(0).normal(100, 15, size=10_000)
+        stats = RunningStats()
+        for part in np.array_split(values, 7):
+            partial = RunningStats()
+            partial.update(part)
+            stats.merge(partial)
+
+        assert stats.count == 10_000
+        assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+        assert stats.std == pytest.approx(values.std(), rel=1e-9)
+        assert stats.min == values.min()
+        assert stats.max == values.max()
+
+    def test_sketch_relative_accuracy(self):
+        """Тест: квантили скетча в пределах относительной точности"""
+        values = np.random.default_rng(1).lognormal(12, 1, size=50_000) - 50_000
+        sketch = QuantileSketch(relative_accuracy=0.005)
+        for part in np.array_split(values, 5):
+            partial = QuantileSketch(relative_accuracy=0.005)
+            partial.update(part)
+            sketch.merge(partial)
+
+        qs = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+        exact = np.quantile(values, qs, method="lower")
+        for approx, expected in zip(sketch.quantiles(qs), exact):
+            assert approx == pytest.approx(expected, rel=0.0101)
+
+    def test_finals_summary_matches_exact(self, montecarlo_request):
+        """Тест: потоковая сводка совпадает с точной в пределах точности скетча"""
+        request = montecarlo_request.model_copy(update={"seed": 9})
+        response = MonteCarloService._sync_simulate(request.model_copy(update={"paths_output": PathsOutput.RAW}))
+        final_array = np.array(response.simulations_data)[:, -1]
+
+        accumulator = FinalsAccumulator(
+            total_contributions=request.initial + request.monthly * request.years * 12,
+            initial=request.initial,
+            goal_amount=request.goal_amount,
+        )
+        accumulator.update(final_array)
+        summary = accumulator.summary()
+
+        assert summary["probabilities"] == response.probabilities
+        assert summary["statistics"]["mean"] == pytest.approx(response.statistics["mean"])
+        assert summary["statistics"]["std"] == pytest.approx(response.statistics["std"])
+        for q, value in response.percentiles.items():
+            assert summary["percentiles"][q] == pytest.approx(value, rel=0.02)
+        assert sum(bucket["count"] for bucket in summary["distribution"]) == request.simulations
+
+
+class TestStreamingStatistics:
+    """Тесты потокового режима статистики"""
+
+    def test_large_run(self, montecarlo_service):
+        """Тест: больше 10000 путей без хранения массивов"""
+        request = MonteCarloRequest(
+            initial=100_000,
+            monthly=10_000,
+            years=5,
+            avg_return=8.0,
+            risk=15.0,
+            simulations=200_000,
+            goal_amount=800_000,
+            statistics_mode=StatisticsMode.STREAMING,
+            seed=1,
+        )
+        response = asyncio.run(montecarlo_service.simulate(request))
+
+        assert request.paths_output == PathsOutput.NONE
+        assert response.bands is None
+        assert response.simulations_data is None
+        assert sum(bucket["count"] for bucket in response.distribution) == 200_000
+        assert response.percentiles["5"] < response.statistics["median"] < response.percentiles["95"]
+
+    def test_standard_error_matches_exact(self, montecarlo_request):
+        """Тест: потоковая стандартная ошибка совпадает с точной"""
+        request = montecarlo_request.model_copy(
+            update={"seed": 4, "sampling": SamplingScheme.ANTITHETIC, "paths_output": PathsOutput.NONE},
+        )
+        exact = MonteCarloService._sync_simulate(request)
+        streaming = MonteCarloService._sync_simulate(
+            request.model_copy(update={"statistics_mode": StatisticsMode.STREAMING}),
+        )
+
+        assert streaming.standard_error["mean"] == pytest.approx(exact.standard_error["mean"], rel=1e-9)
+        assert streaming.standard_error["reach_goal"] == pytest.approx(exact.standard_error["reach_goal"], rel=1e-9)
+
+    def test_exact_mode_limit(self):
+        """Тест: точный режим ограничен 10000 путей"""
+        with pytest.raises(ValueError):
+            MonteCarloRequest(
+                initial=1000,
+                monthly=100,
+                years=5,
+                avg_return=8.0,
+                risk=15.0,
+                simulations=20_000,
+            )
+
+    def test_streaming_rejects_paths(self):
+        """Тест: потоковый режим несовместим с выгрузкой путей"""
+        with pytest.raises(ValueError):
+            MonteCarloRequest(
+                initial=1000,
+                monthly=100,
+                years=5,
+                avg_return=8.0,
+                risk=15.0,
+                statistics_mode=StatisticsMode.STREAMING,
+                paths_output=PathsOutput.RAW,
+            )
+
+
+class TestAdaptivePrecision:
+    """Тесты адаптивного режима с целевой точностью"""
+
+    def test_stops_early_when_precise(self, montecarlo_service, montecarlo_request):
+        """Тест: легкий допуск достигается на первой пачке"""
+        request = montecarlo_request.model_copy(
+            update={
+                "seed": 8,
+                "simulations": 10_000,
+                "precision": MonteCarloPrecision(metric=PrecisionMetric.REACH_GOAL, tolerance=5.0),
+            },
+        )
+        response = asyncio.run(montecarlo_service.simulate(request))
+        convergence = response.convergence
+
+        assert convergence["converged"]
+        assert convergence["simulations"] == 512
+        assert convergence["achieved_error"] <= 5.0
+        assert sum(bucket["count"] for bucket in response.distribution) == 512
+
+    def test_matches_fixed_run(self, montecarlo_service, montecarlo_request):
+        """Тест: результат совпадает с обычным запуском на итоговом числе путей"""
+        request = montecarlo_request.model_copy(
+            update={
+                "seed": 8,
+                "simulations": 10_000,
+                "precision": MonteCarloPrecision(metric=PrecisionMetric.MEAN, tolerance=0.8),
+            },
+        )
+        adaptive = asyncio.run(montecarlo_service.simulate(request))
+        simulations = adaptive.convergence["simulations"]
+        fixed = MonteCarloService._sync_simulate(
+            request.model_copy(update={"precision": None, "simulations": simulations}),
+        )
+
+        trace = adaptive.convergence["trace"]
+        assert len(trace) > 1
+        assert [step["simulations"] for step in trace] == sorted(step["simulations"] for step in trace)
+        assert adaptive.statistics == fixed.statistics
+        assert adaptive.bands == fixed.bands
+
+    def test_budget_exhausted(self, montecarlo_service, montecarlo_request):
+        """Тест: недостижимый допуск ограничен бюджетом путей"""
+        request = montecarlo_request.model_copy(
+            update={
+                "seed": 8,
+                "simulations": 3000,
+                "precision": MonteCarloPrecision(metric=PrecisionMetric.MEDIAN, tolerance=0.01),
+            },
+        )
+        convergence = asyncio.run(montecarlo_service.simulate(request)).convergence
+
+        assert not convergence["converged"]
+        assert convergence["simulations"] == 3000
+        assert convergence["achieved_error"] > 0.01
+
+    def test_rare_goal_not_converged_on_first_batch(self, montecarlo_service, montecarlo_request):
+        """Тест: почти недостижимая цель не сходится на первой пачке с нулевой выборочной ошибкой"""
+        request = montecarlo_request.model_copy(
+            update={
+                "seed": 8,
+                "simulations": 10_000,
+                "goal_amount": 6_000_000,
+                "precision": MonteCarloPrecision(metric=PrecisionMetric.REACH_GOAL, tolerance=0.2),
+            },
+        )
+        convergence = asyncio.run(montecarlo_service.simulate(request)).convergence
+        first = convergence["trace"][0]
+
+        assert first["simulations"] == 512
+        assert first["error"] > 0.2
+        assert convergence["simulations"] > 512
+        assert convergence["achieved_error"] > 0
+
+    def test_streaming_statistics(self, montecarlo_service):
+        """Тест: адаптивный режим поверх потоковых сводок"""
+        request = MonteCarloRequest(
+            initial=100_000,
+            monthly=10_000,
+            years=5,
+            avg_return=8.0,
+            risk=15.0,
+            simulations=1_000_000,
+            goal_amount=800_000,
+            statistics_mode=StatisticsMode.STREAMING,
+            precision=MonteCarloPrecision(metric=PrecisionMetric.REACH_GOAL, tolerance=0.5),
+            seed=2,
+        )
+        response = asyncio.run(montecarlo_service.simulate(request))
+
+        assert response.convergence["converged"]
+        assert response.convergence["simulations"] < 1_000_000
+        assert response.standard_error["reach_goal"] <= 0.5
+
+    def test_reach_goal_requires_goal(self):
+        """Тест: точность по reach_goal без целевой суммы отклоняется"""
+        with pytest.raises(ValueError):
+            MonteCarloRequest(
+                initial=1000,
+                monthly=100,
+                years=5,
+                avg_return=8.0,
+                risk=15.0,
+                precision=MonteCarloPrecision(metric=PrecisionMetric.REACH_GOAL, tolerance=1.0),
+            )
+
+
+class TestProgressiveResults:
+    """Тесты прогрессивных промежуточных сводок"""
+
+    @staticmethod
+    async def _collect(service, request, limit=None):
+        events = []
+        stream = service.simulate_progressive(request)
+        async for event in stream:
+            events.append(event)
+            if limit and len(events) >= limit:
+                await stream.aclose()
+                break
+        return events
+
+    def test_events_converge_to_result(self, montecarlo_service, montecarlo_request):
+        """Тест: события растут по числу путей, итог совпадает с обычным запуском"""
+        request = montecarlo_request.model_copy(update={"seed": 12, "simulations": 5000})
+        events = asyncio.run(self._collect(montecarlo_service, request))
+        progress = [event for event in events if event["type"] == "progress"]
+
+        assert progress[0]["simulations"] == 256
+        assert [event["simulations"] for event in progress] == sorted({event["simulations"] for event in progress})
+        assert events[-1]["type"] == "result"
+        assert events[-1]["simulations"] == 5000
+        assert events[-1]["statistics"] == MonteCarloService._sync_simulate(request).statistics
+
+    def test_partial_summary_matches_fixed_run(self, montecarlo_service, montecarlo_request):
+        """Тест: промежуточная сводка из аккумулятора близка к обычному запуску на том же числе путей"""
+        request = montecarlo_request.model_copy(update={"seed": 12, "simulations": 5000})
+        partial = asyncio.run(self._collect(montecarlo_service, request, limit=2))[-1]
+        fixed = MonteCarloService._sync_simulate(request.model_copy(update={"simulations": partial["simulations"]}))
+
+        assert partial["probabilities"] == fixed.probabilities
+        for key in ("mean", "min", "max"):
+            assert partial["statistics"][key] == pytest.approx(fixed.statistics[key], rel=1e-9)
+        assert partial["statistics"]["median"] == pytest.approx(fixed.statistics["median"], rel=0.01)
+
+    def test_precision_stops_stream(self, montecarlo_service, montecarlo_request):
+        """Тест: с целевой точностью поток завершается после достижения допуска"""
+        request = montecarlo_request.model_copy(
+            update={
+                "seed": 12,
+                "simulations": 10_000,
+                "precision": MonteCarloPrecision(metric=PrecisionMetric.REACH_GOAL, tolerance=2.0),
+            },
+        )
+        events = asyncio.run(self._collect(montecarlo_service, request))
+        result = events[-1]
+
+        assert result["convergence"]["converged"]
+        assert result["simulations"] < 10_000
+        assert events[-2]["error"] == result["convergence"]["achieved_error"]
+
+    def test_progressive_sizes(self, montecarlo_service):
+        """Тест: размер чанков удваивается от одного блока"""
+        sizes = montecarlo_service._progressive_sizes(10_000, 120)
+
+        assert sizes[:4] == [256, 512, 1024, 2048]
+        assert sum(sizes) == 10_000
+
+
+class TestMemoryBudget:
+    """Тесты бюджета памяти и компактного хранения траекторий"""
+
+    def test_estimate_ordering(self, raw_request):
+        """Тест: оценка падает с float32 и при отказе от сырых путей"""
+        budget = MemoryBudget(budget_bytes=2**30)
+        raw = budget.estimate(raw_request)
+        raw32 = budget.estimate(raw_request.model_copy(update={"path_dtype": PathDtype.FLOAT32}))
+        bands = budget.estimate(raw_request.model_copy(update={"paths_output": PathsOutput.BANDS}))
+        none = budget.estimate(raw_request.model_copy(update={"paths_output": PathsOutput.NONE}))
+
+        assert raw > raw32
+        assert raw > bands > none
+
+    def test_downgrade_steps(self, raw_request):
+        """Тест: понижения применяются по порядку до попадания в бюджет"""
+        bands = MemoryBudget(budget_bytes=2**30).estimate(
+            raw_request.model_copy(update={"paths_output": PathsOutput.BANDS, "path_dtype": PathDtype.FLOAT32}),
+        )
+        request, downgrades = MemoryBudget(budget_bytes=bands).apply(raw_request)
+
+        assert downgrades == ["path_dtype=float32", "paths_output=bands"]
+        assert request.paths_output == PathsOutput.BANDS
+        assert request.path_dtype == PathDtype.FLOAT32
+
+    def test_reject_policy(self, raw_request):
+        """Тест: в режиме reject запрос сверх бюджета отклоняется"""
+        budget = MemoryBudget(budget_bytes=2**20, policy=MemoryPolicy.REJECT)
+
+        with pytest.raises(MemoryBudgetExceededError):
+            budget.apply(raw_request)
+        assert budget.apply(raw_request.model_copy(update={"years": 1, "simulations": 100}))[1] == []
+
+    def test_service_reports_downgrades(self, raw_request):
+        """Тест: сервис понижает вывод и сообщает об этом в ответе"""
+        executor = MonteCarloExecutor(executor_type=ExecutorType.THREAD, workers=2)
+        budget = MemoryBudget(budget_bytes=2**20, workers=2)
+        budget.budget_bytes = budget.estimate(raw_request.model_copy(update={"paths_output": PathsOutput.NONE}))
+        service = MonteCarloService(executor, budget)
+        response = asyncio.run(service.simulate(raw_request.model_copy(update={"seed": 3})))
+        executor.shutdown()
+
+        assert response.downgrades == ["path_dtype=float32", "paths_output=bands", "paths_output=none, sample_paths=0"]
+        assert response.simulations_data is None
+        assert response.bands is None
+        assert response.statistics == MonteCarloService._sync_simulate(raw_request.model_copy(update={"seed": 3})).statistics
+
+    def test_float32_paths(self, raw_request):
+        """Тест: float32 хранит те же пути с точностью float32"""
+        request = raw_request.model_copy(update={"seed": 3})
+        full = MonteCarloService._run_simulations(
+            MonteCarloService._prepare_parameters(request),
+            request.simulations,
+            PathEngine.spawn_streams(3, request.simulations)[1],
+        )
+        compact = MonteCarloService._run_simulations(
+            MonteCarloService._prepare_parameters(request),
+            request.simulations,
+            PathEngine.spawn_streams(3, request.simulations)[1],
+            "float32",
+        )
+
+        assert compact.dtype == np.float32
+        assert compact.nbytes * 2 == full.nbytes
+        np.testing.assert_allclose(compact, full, rtol=1e-6)
+
+    @staticmethod
+    def _service(budget_bytes, policy=MemoryPolicy.DOWNGRADE):
+        executor = MonteCarloExecutor(executor_type=ExecutorType.THREAD, workers=2)
+        return MonteCarloService(executor, MemoryBudget(budget_bytes=budget_bytes, policy=policy, workers=2))
+
+    @staticmethod
+    async def _collect(events):
+        return [event async for event in events]
+
+    def test_sweep_over_budget(self):
+        """Тест: сетка сверх бюджета отклоняется, понижать в ней нечего"""
+        request = TestSweep._sweep_request()
+        service = self._service(2**30)
+        service.memory_budget.budget_bytes = service.memory_budget.estimate_sweep(request) - 1
+
+        with pytest.raises(MemoryBudgetExceededError):
+            asyncio.run(service.simulate_sweep(request))
+        service.memory_budget.budget_bytes += 1
+        assert len(asyncio.run(service.simulate_sweep(request)).cells) == request.cells
+        service.executor.shutdown()
+
+    def test_runs_over_budget(self, montecarlo_request):
+        """Тест: сохранение и продолжение прогона проверяют бюджет итоговых сумм"""
+        request = montecarlo_request.model_copy(update={"seed": 4})
+        service = self._service(2**30)
+        required = service.memory_budget.estimate_finals(request)
+        service.memory_budget.budget_bytes = required - 1
+
+        with pytest.raises(MemoryBudgetExceededError):
+            asyncio.run(service.create_run(request))
+
+        service.memory_budget.budget_bytes = required
+        run = asyncio.run(service.create_run(request))
+        extension = MonteCarloRunExtension(extra_years=5, extra_simulations=1000)
+        with pytest.raises(MemoryBudgetExceededError):
+            asyncio.run(service.extend_run(run.run_id, extension))
+
+        service.memory_budget.budget_bytes = service.memory_budget.estimate_finals(
+            request.model_copy(update={"years": 15, "simulations": 2000}),
+        )
+        assert asyncio.run(service.extend_run(run.run_id, extension)).simulations == 2000
+        service.executor.shutdown()
+
+    def test_stream_downgrades_raw_paths(self, raw_request):
+        """Тест: поток сверх бюджета понижает вывод и не отдает сырые пути"""
+        request = raw_request.model_copy(update={"seed": 3})
+        service = self._service(2**30)
+        service.memory_budget.budget_bytes = service.memory_budget.estimate_stream(
+            request.model_copy(update={"paths_output": PathsOutput.NONE}),
+        )
+        events = asyncio.run(self._collect(service.simulate_stream(request)))
+
+        assert [event["type"] for event in events] == ["summary"]
+        assert events[0]["downgrades"] == ["path_dtype=float32", "paths_output=bands"]
+
+        service.memory_budget.policy = MemoryPolicy.REJECT
+        with pytest.raises(MemoryBudgetExceededError):
+            asyncio.run(self._collect(service.simulate_stream(request)))
+        service.executor.shutdown()
+
+    def test_progressive_over_budget(self, montecarlo_request):
+        """Тест: прогрессивные сводки сверх бюджета отклоняются до первого чанка"""
+        service = self._service(2**30)
+        service.memory_budget.budget_bytes = service.memory_budget.estimate_finals(montecarlo_request) - 1
+
+        with pytest.raises(MemoryBudgetExceededError):
+            asyncio.run(self._collect(service.simulate_progressive(montecarlo_request)))
+        service.executor.shutdown()
+
+
+class TestSharedPathBuffer:
+    """Тесты разделяемой матрицы путей"""
+
+    def test_workers_fill_rows(self, raw_request):
+        """Тест: чанки, записанные через адрес буфера, совпадают с обычной генерацией"""
+        params = MonteCarloService._prepare_parameters(raw_request)
+        _, streams = PathEngine.spawn_streams(seed=4, simulations=1000)
+
+        with SharedPathBuffer((1000, params.months + 1)) as buffer:
+            MonteCarloService._fill_simulations(params, 512, streams[:2], 0, buffer.target)
+            MonteCarloService._fill_simulations(params, 488, streams[2:], 512, buffer.target)
+            filled = buffer.array.copy()
+
+        np.testing.assert_array_equal(filled, PathEngine.simulate_paths(params, 1000, streams))
+
+    def test_released_after_close(self):
+        """Тест: после выхода из блока разделяемая память удалена"""
+        with SharedPathBuffer((10, 13), "float32") as buffer:
+            assert buffer.array.dtype == np.float32
+            target = buffer.target
+
+        assert buffer.array is None
+        with pytest.raises(FileNotFoundError):
+            with target.attach():
+                pass
+
+
+class TestPortfolio:
+    """Тесты симуляции портфеля из нескольких активов"""
+
+    @staticmethod
+    def _portfolio_request(**update) -> PortfolioMonteCarloRequest:
+        data = {
+            "initial": 100_000,
+            "monthly": 5000,
+            "years": 10,
+            "weights": [0.6, 0.3, 0.1],
+            "expected_returns": [10.0, 5.0, 3.0],
+            "covariance": [[324, 36, 0], [36, 64, 4], [0, 4, 4]],
+            "goal_amount": 1_500_000,
+            "seed": 21,
+        }
+        return PortfolioMonteCarloRequest(**(data | update))
+
+    def test_single_asset_matches_basic(self, montecarlo_request):
+        """Тест: портфель из одного актива совпадает с обычной симуляцией"""
+        request = montecarlo_request.model_copy(update={"seed": 21})
+        portfolio = self._portfolio_request(
+            initial=request.initial,
+            monthly=request.monthly,
+            years=request.years,
+            weights=[1.0],
+            expected_returns=[request.avg_return],
+            covariance=[[request.risk**2]],
+            goal_amount=request.goal_amount,
+        )
+
+        basic = MonteCarloService._sync_simulate(request)
+        combined = MonteCarloService._sync_simulate(portfolio)
+
+        for key, value in basic.statistics.items():
+            assert combined.statistics[key] == pytest.approx(value, rel=1e-9)
+
+    def test_correlated_returns(self):
+        """Тест: выборочная ковариация доходностей совпадает с заданной"""
+        request = self._portfolio_request(years=1)
+        params = MonteCarloService._prepare_parameters(request)
+        _, streams = PathEngine.spawn_streams(seed=3, simulations=40_000)
+        returns = PathEngine.draw_asset_returns(params, streams).reshape(-1, 3)
+
+        expected = np.asarray(request.covariance) / 100**2 / 12
+        np.testing.assert_allclose(np.cov(returns, rowvar=False), expected, atol=2e-5)
+        np.testing.assert_allclose(returns.mean(axis=0), params.monthly_returns, atol=2e-4)
+
+    def test_rebalancing(self):
+        """Тест: без риска ребалансировка дает аналитический результат"""
+        zero = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+        rates = np.array([10.0, 5.0, 3.0]) / 100 / 12
+        weights = np.array([0.6, 0.3, 0.1])
+
+        monthly = self._portfolio_request(covariance=zero, years=2, simulations=10)
+        hold = self._portfolio_request(
+            covariance=zero, years=2, simulations=10, rebalancing=RebalancingFrequency.NONE
+        )
+        monthly_final = MonteCarloService._sync_simulate(monthly).statistics["mean"]
+        hold_final = MonteCarloService._sync_simulate(hold).statistics["mean"]
+
+        expected_monthly = 100_000.0
+        holdings = 100_000 * weights
+        for _ in range(24):
+            expected_monthly = (expected_monthly + 5000) * (1 + weights @ rates)
+            holdings = (holdings + 5000 * weights) * (1 + rates)
+
+        assert monthly_final == pytest.approx(expected_monthly, rel=1e-12)
+        assert hold_final == pytest.approx(holdings.sum(), rel=1e-12)
+        assert hold_final > monthly_final
+
+    def test_service_outputs(self, montecarlo_service):
+        """Тест: портфель отдает те же разделы ответа, в т.ч. через пул"""
+        request = self._portfolio_request(sampling=SamplingScheme.ANTITHETIC)
+        response = asyncio.run(montecarlo_service.simulate(request))
+
+        assert response == MonteCarloService._sync_simulate(request)
+        assert 0 <= response.probabilities["reach_goal"] <= 100
+        assert response.standard_error["mean"] > 0
+        assert len(response.bands["50"]) == 121
+
+    def test_validation(self):
+        """Тест: несогласованные параметры портфеля отклоняются"""
+        with pytest.raises(ValueError):
+            self._portfolio_request(weights=[0.5, 0.3, 0.1])
+        with pytest.raises(ValueError):
+            self._portfolio_request(expected_returns=[10.0, 5.0])
+        with pytest.raises(ValueError):
+            self._portfolio_request(covariance=[[324, 36, 0], [35, 64, 4], [0, 4, 4]])
+        with pytest.raises(ValueError):
+            MonteCarloService._prepare_parameters(
+                self._portfolio_request(covariance=[[1, 2, 0], [2, 1, 0], [0, 0, 1]]),
+            )
+
+    def test_singular_covariance(self):
+        """Тест: вырожденная ковариация (полная корреляция) допустима"""
+        request = self._portfolio_request(covariance=[[100, 100, 0], [100, 100, 0], [0, 0, 4]])
+        factor = MonteCarloService._prepare_parameters(request).cholesky
+
+        np.testing.assert_allclose(factor @ factor.T, np.asarray(request.covariance) / 100**2 / 12, atol=1e-15)
+
+
+class TestBootstrap:
+    """Тесты бутстрэпа исторических доходностей"""
+
+    @pytest.fixture
+    def returns_path(self, tmp_path, monkeypatch):
+        """Файл истории из 120 месяцев, подключенный в настройках сервиса"""
+        path = tmp_path / "returns.bin"
+        np.random.default_rng(0).normal(0.007, 0.04, 120).astype("<f8").tofile(path)
+        service_module = importlib.import_module(MonteCarloService.__module__)
+        monkeypatch.setattr(service_module.settings, "montecarlo_returns_path", path)
+        return path
+
+    @staticmethod
+    def _params(returns_path, mean_block: float = 12.0) -> PathParameters:
+        return PathParameters(
+            initial=100_000,
+            monthly_contribution=10_000,
+            monthly_rate=0.0,
+            monthly_risk=0.0,
+            months=60,
+            returns_path=str(returns_path),
+            mean_block=mean_block,
+        )
+
+    def test_growth_from_history(self, returns_path):
+        """Тест: множители роста берутся только из месяцев истории"""
+        history = np.fromfile(returns_path, dtype="<f8")
+        _, streams = PathEngine.spawn_streams(seed=1, simulations=512)
+
+        growth = PathEngine.draw_growth(self._params(returns_path), streams)
+
+        assert growth.shape == (60, 512)
+        assert np.isin(growth, 1 + history).all()
+
+    def test_long_blocks_follow_history(self, returns_path):
+        """Тест: при очень длинных блоках путь идет подряд по истории по кругу"""
+        history = np.fromfile(returns_path, dtype="<f8")
+        _, streams = PathEngine.spawn_streams(seed=2, simulations=256)
+
+        growth = PathEngine.draw_growth(self._params(returns_path, mean_block=1e12), streams)
+
+        history_growth = 1 + history
+        positions = {value: index for index, value in enumerate(history_growth.tolist())}
+        starts = np.array([positions[value] for value in growth[0].tolist()])
+        expected = history_growth[(starts + np.arange(60)[:, None]) % len(history)]
+        np.testing.assert_array_equal(growth, expected)
+
+    def test_bootstrap_split_invariant(self, returns_path, montecarlo_request):
+        """Тест: результат бутстрэпа не зависит от разбиения на чанки"""
+        request = montecarlo_request.model_copy(
+            update={"return_model": ReturnModel.BOOTSTRAP, "paths_output": PathsOutput.RAW, "seed": 4},
+        )
+        params = MonteCarloService._prepare_parameters(request)
+        _, streams = PathEngine.spawn_streams(request.seed, request.simulations)
+
+        whole = PathEngine.simulate_paths(params, request.simulations, streams)
+        head = PathEngine.simulate_paths(params, 512, streams[:2])
+        tail = PathEngine.simulate_paths(params, request.simulations - 512, streams[2:])
+
+        np.testing.assert_array_equal(whole, np.vstack([head, tail]))
+        assert MonteCarloService._sync_simulate(request).statistics["mean"] > 0
+
+    def test_missing_returns_file(self, montecarlo_request):
+        """Тест: без файла истории бутстрэп отклоняется"""
+        request = montecarlo_request.model_copy(update={"return_model": ReturnModel.BOOTSTRAP})
+        service_module = importlib.import_module(MonteCarloService.__module__)
+
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            monkeypatch.setattr(service_module.settings, "montecarlo_returns_path", None)
+            with pytest.raises(ValueError, match="FINAPI_MONTECARLO_RETURNS_PATH"):
+                MonteCarloService._sync_simulate(request)
+
+    def test_bootstrap_requires_pseudo_sampling(self):
+        """Тест: бутстрэп несовместим с квазислучайной выборкой"""
+        with pytest.raises(ValueError, match="sampling=pseudo"):
+            MonteCarloRequest(
+                initial=0,
+                monthly=1000,
+                years=5,
+                avg_return=0,
+                risk=0,
+                return_model=ReturnModel.BOOTSTRAP,
+                sampling=SamplingScheme.SOBOL,
+            )
+
+
+class TestSweep:
+    """Тесты сетки симуляций на общих случайных числах"""
+
+    @staticmethod
+    def _sweep_request(**update) -> MonteCarloSweepRequest:
+        data = {
+            "initial": 100_000,
+            "monthly": [5000, 10_000],
+            "years": 10,
+            "avg_return": [4.0, 8.0, 12.0],
+            "risk": [5.0, 15.0],
+            "goal_amount": 2_000_000,
+            "seed": 8,
+        }
+        return MonteCarloSweepRequest(**(data | update))
+
+    def test_cell_matches_single_run(self, montecarlo_service, montecarlo_request):
+        """Тест: ячейка сетки совпадает с обычной симуляцией с тем же сидом"""
+        request = self._sweep_request()
+        response = asyncio.run(montecarlo_service.simulate_sweep(request))
+
+        cell = response.cells[2 * 2 + 1 * 2 + 1]
+        assert (cell.avg_return, cell.risk, cell.monthly) == (8.0, 15.0, 10_000)
+        single = MonteCarloService._sync_simulate(montecarlo_request.model_copy(update={"seed": 8}))
+
+        for key, value in single.statistics.items():
+            assert cell.statistics[key] == pytest.approx(value, rel=1e-12)
+        assert cell.percentiles == pytest.approx(single.percentiles, rel=1e-12)
+        assert cell.probabilities == pytest.approx(single.probabilities)
+
+    def test_monotone_in_parameters(self, montecarlo_service):
+        """Тест: на общих случайных числах итог монотонен по доходности и взносу"""
+        response = asyncio.run(montecarlo_service.simulate_sweep(self._sweep_request(simulations=200)))
+
+        means = np.array([cell.statistics["mean"] for cell in response.cells]).reshape(3, 2, 2)
+        medians = np.array([cell.statistics["median"] for cell in response.cells]).reshape(3, 2, 2)
+        assert (np.diff(means, axis=0) > 0).all()
+        assert (np.diff(means, axis=2) > 0).all()
+        assert (np.diff(medians, axis=0) > 0).all()
+
+    def test_grid_size_limit(self):
+        """Тест: слишком большая сетка отклоняется"""
+        with pytest.raises(ValueError, match="ячеек"):
+            self._sweep_request(avg_return=list(range(20)), risk=list(range(5)), monthly=list(range(5)))
+
+
+class TestRuns:
+    """Тесты продолжения сохраненных прогонов"""
+
+    @staticmethod
+    def _fresh(request: MonteCarloRequest, **update) -> dict:
+        fresh = MonteCarloService._sync_simulate(request.model_copy(update={"paths_output": PathsOutput.NONE, **update}))
+        return fresh.model_dump(exclude={"seed"})
+
+    @pytest.mark.parametrize("sampling", [SamplingScheme.PSEUDO, SamplingScheme.ANTITHETIC])
+    @pytest.mark.parametrize(
+        ("extra_years", "extra_simulations"),
+        [(5, 0), (0, 300), (3, 700)],
+    )
+    def test_extension_matches_fresh_run(self, montecarlo_service, montecarlo_request, sampling, extra_years, extra_simulations):
+        """Тест: продолжение совпадает со свежим прогоном с объединенными параметрами"""
+        request = MonteCarloRequest(**(montecarlo_request.model_dump() | {"seed": 12, "sampling": sampling}))
+        run = asyncio.run(montecarlo_service.create_run(request))
+        assert run.result.model_dump(exclude={"seed"}) == self._fresh(request)
+
+        extended = asyncio.run(
+            montecarlo_service.extend_run(
+                run.run_id,
+                MonteCarloRunExtension(extra_years=extra_years, extra_simulations=extra_simulations),
+            ),
+        )
+
+        assert extended.run_id != run.run_id
+        assert (extended.years, extended.simulations) == (10 + extra_years, 1000 + extra_simulations)
+        assert extended.result.model_dump(exclude={"seed"}) == self._fresh(
+            request,
+            years=10 + extra_years,
+            simulations=1000 + extra_simulations,
+        )
+
+    def test_chained_extensions(self, montecarlo_service, montecarlo_request):
+        """Тест: цепочка продолжений совпадает с одним свежим прогоном"""
+        request = montecarlo_request.model_copy(update={"seed": 3})
+        run = asyncio.run(montecarlo_service.create_run(request))
+        for extension in (MonteCarloRunExtension(extra_simulations=100), MonteCarloRunExtension(extra_years=2)):
+            run = asyncio.run(montecarlo_service.extend_run(run.run_id, extension))
+
+        assert run.result.model_dump(exclude={"seed"}) == self._fresh(request, years=12, simulations=1100)
+
+    def test_unknown_run(self, montecarlo_service):
+        """Тест: неизвестный прогон не продолжается"""
+        extension = MonteCarloRunExtension(extra_years=1)
+        assert asyncio.run(montecarlo_service.extend_run("missing", extension)) is None
+
+    def test_sobol_not_resumable(self, montecarlo_service, montecarlo_request):
+        """Тест: прогон с выборкой Sobol не сохраняется для продолжения"""
+        request = montecarlo_request.model_copy(update={"sampling": SamplingScheme.SOBOL})
+        with pytest.raises(ValueError, match="Sobol"):
+            asyncio.run(montecarlo_service.create_run(request))
+
+    def test_store_evicts_oldest(self, montecarlo_request):
+        """Тест: при переполнении хранилища вытесняется самый старый прогон"""
+        store = MonteCarloRunStore(max_runs=2)
+        runs = [store.save(montecarlo_request, 0, np.zeros(1), []) for _ in range(3)]
+
+        assert store.get(runs[0].run_id) is None
+        assert store.get(runs[2].run_id) is runs[2]
+
+    def test_extension_needs_changes(self):
+        """Тест: пустое продолжение отклоняется"""
+        with pytest.raises(ValueError, match="годы или пути"):
+            MonteCarloRunExtension()
+
+
+class TestPathMetrics:
+    """Тесты месяца достижения цели и максимальной просадки"""
+
+    @staticmethod
+    def _brute_force(paths: np.ndarray, goal_amount: float) -> tuple[np.ndarray, np.ndarray]:
+        reached = paths >= goal_amount
+        goal_months = np.where(reached.any(axis=1), reached.argmax(axis=1), -1)
+        peaks = np.maximum.accumulate(paths, axis=1)
+        return goal_months, (1 - paths / peaks).max(axis=1)
+
+    def test_outcomes_match_paths(self, montecarlo_request):
+        """Тест: метрики из одного прохода совпадают с расчетом по матрице путей"""
+        params = MonteCarloService._prepare_parameters(montecarlo_request)
+        _, streams = PathEngine.spawn_streams(seed=6, simulations=3000)
+        paths = PathEngine.simulate_paths(params, 3000, streams)
+
+        finals, goal_months, max_drawdowns = PathEngine.simulate_outcomes(params, 3000, streams, 1_500_000)
+        expected_months, expected_drawdowns = self._brute_force(paths, 1_500_000)
+
+        np.testing.assert_array_equal(finals, paths[:, -1])
+        np.testing.assert_array_equal(goal_months, expected_months)
+        np.testing.assert_allclose(max_drawdowns, expected_drawdowns, atol=1e-15)
+        assert (goal_months >= 0).any()
+        assert (goal_months < 0).any()
+
+    def test_outcomes_write_paths(self, montecarlo_request):
+        """Тест: с out метрики считаются в том же проходе, что и запись путей"""
+        params = MonteCarloService._prepare_parameters(montecarlo_request)
+        _, streams = PathEngine.spawn_streams(seed=6, simulations=600)
+        out = np.empty((600, params.months + 1))
+
+        _, goal_months, _ = PathEngine.simulate_outcomes(params, 600, streams, 1_500_000, out=out)
+
+        np.testing.assert_array_equal(out, PathEngine.simulate_paths(params, 600, streams))
+        np.testing.assert_array_equal(goal_months, self._brute_force(out, 1_500_000)[0])
+
+    def test_time_to_goal_summary(self, montecarlo_service, montecarlo_request):
+        """Тест: перцентили и гистограмма месяца достижения цели по всем путям"""
+        request = montecarlo_request.model_copy(
+            update={"seed": 2, "path_metrics": True, "paths_output": PathsOutput.RAW, "goal_amount": 1_500_000},
+        )
+        response = asyncio.run(montecarlo_service.simulate(request))
+        goal_months, max_drawdowns = self._brute_force(np.array(response.simulations_data), 1_500_000)
+
+        time_to_goal = response.time_to_goal
+        months = np.where(goal_months < 0, np.inf, goal_months)
+        for q, value in time_to_goal["percentiles"].items():
+            expected = np.quantile(months, int(q) / 100, method="lower")
+            assert value == (None if np.isinf(expected) else expected)
+        assert time_to_goal["reached"] == pytest.approx(np.mean(goal_months >= 0) * 100)
+        assert time_to_goal["reached"] >= response.probabilities["reach_goal"]
+        assert len(time_to_goal["distribution"]) == 10
+        assert sum(item["count"] for item in time_to_goal["distribution"]) == np.count_nonzero(goal_months >= 0)
+        assert response.max_drawdown["max"] == pytest.approx(max_drawdowns.max() * 100)
+        assert response.max_drawdown["median"] == pytest.approx(np.median(max_drawdowns) * 100, rel=0.02)
+
+    def test_same_metrics_in_all_modes(self, montecarlo_service, montecarlo_request):
+        """Тест: метрики не зависят от хранения путей и режима статистики"""
+        request = montecarlo_request.model_copy(update={"seed": 2, "path_metrics": True})
+        responses = [
+            asyncio.run(montecarlo_service.simulate(request.model_copy(update=update)))
+            for update in (
+                {"paths_output": PathsOutput.BANDS},
+                {"paths_output": PathsOutput.NONE},
+                {"paths_output": PathsOutput.NONE, "statistics_mode": StatisticsMode.STREAMING},
+            )
+        ]
+
+        for response in responses[1:]:
+            assert response.time_to_goal == responses[0].time_to_goal
+            assert response.max_drawdown == responses[0].max_drawdown
+
+    def test_metrics_without_goal(self, montecarlo_service, montecarlo_request):
+        """Тест: без цели считается только просадка"""
+        request = montecarlo_request.model_copy(update={"goal_amount": None, "path_metrics": True})
+        response = asyncio.run(montecarlo_service.simulate(request))
+
+        assert response.time_to_goal is None
+        assert 0 < response.max_drawdown["mean"] < 100
+
+    def test_metrics_not_with_precision(self, montecarlo_request):
+        """Тест: метрики путей несовместимы с адаптивной точностью"""
+        with pytest.raises(ValueError, match="Метрики путей"):
+            MonteCarloRequest(
+                **montecarlo_request.model_dump(exclude={"precision", "path_metrics"}),
+                path_metrics=True,
+                precision={"metric": "mean", "tolerance": 1},
+            )
+
+
+class TestMonteCarloJobs:
+    """Тесты фоновых задач Монте-Карло"""
+
+    @staticmethod
+    def _large_request() -> MonteCarloRequest:
+        return MonteCarloRequest(
+            initial=100_000,
+            monthly=10_000,
+            years=50,
+            avg_return=8.0,
+            risk=15.0,
+            simulations=2_000_000,
+            statistics_mode=StatisticsMode.STREAMING,
+            seed=1,
+        )
+
+    @staticmethod
+    async def _wait(job, statuses=(JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)):
+        while job.status not in statuses:
+            await asyncio.sleep(0.005)
+
+    def test_job_completes(self, montecarlo_service, montecarlo_request):
+        """Тест: задача выполняется в фоне и дает тот же результат"""
+        request = montecarlo_request.model_copy(update={"seed": 6})
+
+        async def run():
+            jobs = MonteCarloJobManager(montecarlo_service)
+            job = jobs.submit(request)
+            assert job.status == JobStatus.QUEUED
+            await self._wait(job)
+            await jobs.shutdown()
+            return job
+
+        job = asyncio.run(run())
+
+        assert job.status == JobStatus.COMPLETED
+        assert job.progress.chunks_total > 1
+        assert job.progress.chunks_done == job.progress.chunks_total
+        assert job.result == MonteCarloService._sync_simulate(request)
+
+    def test_cancel_running_job(self):
+        """Тест: отмена выполняемой задачи между чанками"""
+        executor = MonteCarloExecutor(executor_type=ExecutorType.THREAD, workers=1, chunk_cells=1_000_000)
+
+        async def run():
+            jobs = MonteCarloJobManager(MonteCarloService(executor))
+            job = jobs.submit(self._large_request())
+            while job.progress.chunks_done == 0:
+                await asyncio.sleep(0.005)
+            jobs.cancel(job.job_id)
+            await self._wait(job)
+            await jobs.shutdown()
+            return job
+
+        job = asyncio.run(run())
+        executor.shutdown()
+
+        assert job.status == JobStatus.CANCELLED
+        assert job.result is None
+        assert job.progress.chunks_done < job.progress.chunks_total
+
+    def test_cancel_queued_job(self, montecarlo_service, montecarlo_request):
+        """Тест: задача из очереди отменяется без запуска"""
+
+        async def run():
+            jobs = MonteCarloJobManager(montecarlo_service, concurrency=1)
+            first = jobs.submit(montecarlo_request)
+            second = jobs.submit(montecarlo_request)
+            jobs.cancel(second.job_id)
+            await self._wait(first)
+            await jobs.shutdown()
+            return second
+
+        job = asyncio.run(run())
+
+        assert job.status == JobStatus.CANCELLED
+        assert job.progress.chunks_total == 0
+
+    def test_failed_job(self, montecarlo_service, montecarlo_request):
+        """Тест: ошибка симуляции сохраняется в задаче"""
+
+        class FailingService(MonteCarloService):
+            async def simulate(self, request, progress=None):
+                raise ValueError("Ошибка симуляции")
+
+        async def run():
+            jobs = MonteCarloJobManager(FailingService(montecarlo_service.executor))
+            job = jobs.submit(montecarlo_request)
+            await self._wait(job)
+            await jobs.shutdown()
+            return job
+
+        job = asyncio.run(run())
+
+        assert job.status == JobStatus.FAILED
+        assert job.error == "Ошибка симуляции"
+
+    def test_ttl_expiry(self, montecarlo_service, montecarlo_request):
+        """Тест: результат удаляется по истечении срока хранения"""
+
+        async def run():
+            jobs = MonteCarloJobManager(montecarlo_service, ttl_seconds=0.05)
+            job = jobs.submit(montecarlo_request)
+            await self._wait(job)
+            assert jobs.get(job.job_id) is job
+            assert jobs.expires_at(job) > job.finished_at
+            await asyncio.sleep(0.06)
+            expired = jobs.get(job.job_id)
+            await jobs.shutdown()
+            return expired
+
+        assert asyncio.run(run()) is None
+
+    def test_max_jobs(self, montecarlo_service, montecarlo_request):
+        """Тест: переполненная очередь отклоняет новые задачи"""
+
+        async def run():
+            jobs = MonteCarloJobManager(montecarlo_service, max_jobs=1)
+            jobs.submit(montecarlo_request)
+            try:
+                with pytest.raises(ValueError):
+                    jobs.submit(montecarlo_request)
+            finally:
+                await jobs.shutdown()
+
+        asyncio.run(run())
+
+
+class TestMonteCarloExecutor:
+    """Тесты планирования чанков"""
+
+    def test_small_job_single_chunk(self):
+        """Тест: малая задача не дробится"""
+        executor = MonteCarloExecutor(workers=4, parallel_threshold=1_000_000)
+
+        assert executor.plan_chunks(simulations=100, months=12) == [100]
+
+    def test_chunks_aligned_to_blocks(self):
+        """Тест: границы чанков совпадают с границами блоков потоков"""
+        executor = MonteCarloExecutor(workers=3, chunk_cells=10**9, parallel_threshold=0)
+        chunks = executor.plan_chunks(simulations=1000, months=120, block_size=256)
+
+        assert chunks == [512, 256, 232]
+
+    def test_chunks_at_least_workers(self):
+        """Тест: крупная задача делится минимум по числу воркеров"""
+        executor = MonteCarloExecutor(workers=4, chunk_cells=10**9, parallel_threshold=0)
+        chunks = executor.plan_chunks(simulations=1001, months=120)
+
+        assert len(chunks) == 4
+        assert sum(chunks) == 1001
+
+    def test_chunks_bounded_by_cells(self):
+        """Тест: размер чанка ограничен объемом «путь × месяц»"""
+        executor = MonteCarloExecutor(workers=2, chunk_cells=60_000, parallel_threshold=0)
+        chunks = executor.plan_chunks(simulations=10_000, months=600)
+
+        assert len(chunks) == 100
+        assert max(chunks) * 600 <= 60_000
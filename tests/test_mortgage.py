@@ -1,11 +1,94 @@
 from __future__ import annotations
 
+import math
+
+import numpy as np
 import pytest
 
 from src.models.schemas import MortgageRequest
 from src.models.schemas import MortgageResponse
 from src.models.schemas import PaymentType
 from src.services.v1.financial_calculator import FinancialCalculator
+from src.services.v1.schedule_engine import ScheduleEngine
+
+
+def _row_by_row_schedule(loan_amount, monthly_rate, months, payment_type, monthly_payment):
+    """Построчный расчет графика, с которым должен совпадать векторизованный"""
+    rows = []
+    balance = loan_amount
+    for month in range(1, months + 1):
+        interest = balance * monthly_rate
+        principal = monthly_payment - interest
+        if payment_type == PaymentType.DIFFERENTIATED:
+            principal = loan_amount / months
+            interest = balance * monthly_rate
+            monthly_payment = principal + interest
+        balance -= principal
+        rows.append(
+            {
+                "month": month,
+                "payment": round(monthly_payment, 2),
+                "principal": round(principal, 2),
+                "interest": round(interest, 2),
+                "balance": round(max(balance, 0), 2),
+            },
+        )
+    return rows
+
+
+def _row_by_row_with_early_payments(request):
+    """Построчный расчет графика с досрочными погашениями, с которым сверяется расчет по отрезкам"""
+    loan_amount = request.price - request.down_payment
+    monthly_rate = request.rate / 100 / 12
+    months = request.years * 12
+    differentiated = request.payment_type == PaymentType.DIFFERENTIATED
+    level = loan_amount / months
+    if not differentiated:
+        level = FinancialCalculator._calculate_mortgage_monthly_payment(
+            loan_amount=loan_amount,
+            monthly_rate=monthly_rate,
+            months=months,
+            payment_type=request.payment_type,
+        )
+
+    events = {}
+    for early_payment in request.early_payments:
+        events.setdefault(early_payment.month, []).append(early_payment)
+
+    rows = []
+    balance = loan_amount
+    end = months
+    month = 1
+    while month <= end:
+        interest = balance * monthly_rate
+        principal = level if differentiated else level - interest
+        if month == end:
+            principal = balance
+        balance -= principal
+
+        extra = 0.0
+        for early_payment in events.get(month, []):
+            paid = min(early_payment.amount, balance)
+            balance -= paid
+            extra += paid
+            remaining = end - month
+            if balance <= 0 or remaining == 0:
+                continue
+            if early_payment.type == "reduce_payment":
+                level = balance / remaining
+                if not differentiated:
+                    level = balance * monthly_rate / (1 - (1 + monthly_rate) ** -remaining)
+            else:
+                term = balance / level
+                if not differentiated:
+                    term = -math.log(1 - balance * monthly_rate / level) / math.log(1 + monthly_rate)
+                end = month + min(remaining, max(math.ceil(term - 1e-9), 1))
+
+        rows.append((month, principal + extra + interest, principal + extra, interest, max(balance, 0)))
+        if balance <= 0:
+            break
+        month += 1
+    return rows
 
 
 class TestMortgage:
@@ -109,6 +192,293 @@ class TestMortgage:
         principals = [p.principal for p in response.payment_schedule]
         assert principals[0] < principals[-1]
 
+    @pytest.mark.parametrize("payment_type", [PaymentType.ANNUITY, PaymentType.DIFFERENTIATED])
+    def test_schedule_matches_row_by_row(self, payment_type):
+        """Тест: векторизованный график совпадает с построчным до копейки"""
+        rng = np.random.default_rng(1)
+        for _ in range(200):
+            request = MortgageRequest(
+                price=round(float(rng.uniform(1e5, 5e7)), 2),
+                down_payment=round(float(rng.uniform(0, 9e4)), 2),
+                years=int(rng.integers(1, 51)),
+                rate=round(float(rng.uniform(0.1, 30)), 3),
+                payment_type=payment_type,
+            )
+            response = FinancialCalculator.calculate_mortgage(request)
+
+            expected = _row_by_row_schedule(
+                loan_amount=request.price - request.down_payment,
+                monthly_rate=request.rate / 100 / 12,
+                months=request.years * 12,
+                payment_type=payment_type,
+                monthly_payment=FinancialCalculator._calculate_mortgage_monthly_payment(
+                    loan_amount=request.price - request.down_payment,
+                    monthly_rate=request.rate / 100 / 12,
+                    months=request.years * 12,
+                    payment_type=payment_type,
+                ),
+            )
+            assert [row.model_dump() for row in response.payment_schedule] == expected
+
+    def test_round_money_matches_round(self):
+        """Тест: векторное округление совпадает с round(value, 2), включая половины копейки"""
+        rng = np.random.default_rng(2)
+        values = np.concatenate(
+            [
+                rng.uniform(-1e8, 1e8, 100_000),
+                (np.arange(100_000) + 0.5) / 100,
+                rng.integers(0, 10**9, 100_000) / 1000,
+            ],
+        )
+
+        rounded = ScheduleEngine.round_money(values)
+
+        assert rounded.tolist() == [round(value, 2) for value in values.tolist()]
+
+    def test_columns_format_matches_rows(self, mortgage_request):
+        """Тест: столбцовый график содержит те же значения, что и построчный"""
+        rows = FinancialCalculator.calculate_mortgage(mortgage_request)
+        columns = FinancialCalculator.calculate_mortgage(
+            MortgageRequest(**(mortgage_request.model_dump() | {"schedule_format": "columns"})),
+        )
+
+        assert columns.monthly_payment == rows.monthly_payment
+        assert len(columns.payment_schedule.month) == mortgage_request.years * 12
+        for field in ("month", "payment", "principal", "interest", "balance"):
+            assert getattr(columns.payment_schedule, field) == [getattr(row, field) for row in rows.payment_schedule]
+
+    @pytest.mark.parametrize("payment_type", [PaymentType.ANNUITY, PaymentType.DIFFERENTIATED])
+    def test_schedule_window_matches_full(self, payment_type):
+        """Тест: окно графика совпадает с соответствующими строками полного графика до копейки"""
+        rng = np.random.default_rng(4)
+        for _ in range(100):
+            params = {
+                "price": round(float(rng.uniform(1e5, 5e7)), 2),
+                "down_payment": round(float(rng.uniform(0, 9e4)), 2),
+                "years": int(rng.integers(1, 51)),
+                "rate": round(float(rng.uniform(0.1, 15)), 3),
+                "payment_type": payment_type,
+            }
+            months = params["years"] * 12
+            from_month = int(rng.integers(1, months + 1))
+            to_month = min(from_month + 11, months)
+            full = FinancialCalculator.calculate_mortgage(MortgageRequest(**params)).payment_schedule
+            window = FinancialCalculator.calculate_mortgage(
+                MortgageRequest(**params, from_month=from_month, to_month=to_month),
+            ).payment_schedule
+
+            assert [row.month for row in window] == list(range(from_month, to_month + 1))
+            for row, expected in zip(window, full[from_month - 1 : to_month]):
+                for field in ("payment", "principal", "interest", "balance"):
+                    assert getattr(row, field) == pytest.approx(getattr(expected, field), abs=0.011)
+
+    def test_schedule_window_skips_earlier_months(self, monkeypatch):
+        """Тест: окно в конце графика считается без прохода по предыдущим месяцам"""
+
+        def fail(*args, **kwargs):
+            raise AssertionError("полный график не должен считаться")
+
+        monkeypatch.setattr(ScheduleEngine, "_annuity_balances", fail)
+        request = MortgageRequest(price=10_000_000, down_payment=2_000_000, years=50, rate=9.0, from_month=589)
+
+        response = FinancialCalculator.calculate_mortgage(request)
+
+        assert [row.month for row in response.payment_schedule] == list(range(589, 601))
+        assert response.payment_schedule[-1].balance == 0
+        assert response.payment_schedule[-1].principal == pytest.approx(response.payment_schedule[-2].balance, abs=0.02)
+
+    def test_schedule_window_stable_at_extreme_rate(self):
+        """Тест: на высокой ставке и длинном сроке окно гасит долг к последнему месяцу"""
+        request = MortgageRequest(price=30_000_000, down_payment=1_000_000, years=50, rate=95.0, to_month=600)
+
+        schedule = FinancialCalculator.calculate_mortgage(request.model_copy(update={"from_month": 590}))
+
+        assert schedule.payment_schedule[-1].balance == 0
+        assert all(row.balance >= 0 for row in schedule.payment_schedule)
+
+    @pytest.mark.parametrize("window", [{"from_month": 13, "to_month": 12}, {"to_month": 241}, {"from_month": 0}])
+    def test_invalid_schedule_window(self, window):
+        """Тест: окно вне срока или с началом позже конца отклоняется"""
+        with pytest.raises(ValueError):
+            MortgageRequest(price=5_000_000, down_payment=1_000_000, years=20, rate=12.0, **window)
+
+    def test_summary_detail_skips_schedule(self, mortgage_request, monkeypatch):
+        """Тест: detail=summary возвращает те же итоги без построения графика"""
+        full = FinancialCalculator.calculate_mortgage(mortgage_request)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("график не должен строиться")
+
+        monkeypatch.setattr(ScheduleEngine, "amortize", fail)
+        summary = FinancialCalculator.calculate_mortgage(
+            MortgageRequest(**(mortgage_request.model_dump() | {"detail": "summary"})),
+        )
+
+        assert summary.payment_schedule is None
+        assert summary.model_dump(exclude={"payment_schedule"}) == full.model_dump(exclude={"payment_schedule"})
+
+    def test_differentiated_total_payment_matches_schedule(self):
+        """Тест: итог дифференцированного графика равен сумме убывающих платежей"""
+        request = MortgageRequest(
+            price=8_000_000,
+            down_payment=2_000_000,
+            years=25,
+            rate=11.0,
+            payment_type=PaymentType.DIFFERENTIATED,
+        )
+
+        response = FinancialCalculator.calculate_mortgage(request)
+        schedule_total = sum(row.payment for row in response.payment_schedule)
+
+        assert response.total_payment < response.monthly_payment * request.years * 12
+        assert response.total_payment == pytest.approx(schedule_total, abs=len(response.payment_schedule) * 0.005)
+        assert response.total_interest == pytest.approx(response.total_payment - response.loan_amount)
+
+    @pytest.mark.parametrize("payment_type", [PaymentType.ANNUITY, PaymentType.DIFFERENTIATED])
+    def test_period_totals_match_schedule_sums(self, payment_type):
+        """Тест: итоги периода по формулам совпадают с суммами по строкам графика"""
+        rng = np.random.default_rng(5)
+        for _ in range(100):
+            loan_amount = round(float(rng.uniform(1e5, 5e7)), 2)
+            monthly_rate = round(float(rng.uniform(0.1, 30)), 3) / 100 / 12
+            months = int(rng.integers(1, 51)) * 12
+            first_month = int(rng.integers(1, months + 1))
+            last_month = int(rng.integers(first_month, months + 1))
+            monthly_payment = FinancialCalculator._calculate_mortgage_monthly_payment(
+                loan_amount=loan_amount,
+                monthly_rate=monthly_rate,
+                months=months,
+                payment_type=payment_type,
+            )
+            schedule = ScheduleEngine.amortize(loan_amount, monthly_rate, months, payment_type, monthly_payment)
+
+            principal, interest = ScheduleEngine.period_totals(
+                loan_amount, monthly_rate, months, payment_type, monthly_payment, first_month, last_month
+            )
+
+            window = slice(first_month - 1, last_month)
+            assert principal == pytest.approx(schedule.principal[window].sum(), rel=1e-9, abs=1e-4)
+            assert interest == pytest.approx(schedule.interest[window].sum(), rel=1e-9, abs=1e-4)
+
+    def test_period_totals_in_summary_response(self):
+        """Тест: итоги окна возвращаются и без графика"""
+        request = MortgageRequest(
+            price=5_000_000,
+            down_payment=1_000_000,
+            years=20,
+            rate=12.0,
+            from_month=13,
+            to_month=24,
+            detail="summary",
+        )
+
+        response = FinancialCalculator.calculate_mortgage(request)
+        rows = FinancialCalculator.calculate_mortgage(
+            MortgageRequest(**(request.model_dump() | {"detail": "full"})),
+        ).payment_schedule
+
+        assert response.payment_schedule is None
+        assert response.period_totals.from_month == 13
+        assert response.period_totals.to_month == 24
+        assert response.period_totals.interest == pytest.approx(sum(row.interest for row in rows), abs=0.06)
+        assert response.period_totals.principal == pytest.approx(sum(row.principal for row in rows), abs=0.06)
+        assert response.period_totals.payment == pytest.approx(response.monthly_payment * 12, abs=0.06)
+
+    @pytest.mark.parametrize("payment_type", [PaymentType.ANNUITY, PaymentType.DIFFERENTIATED])
+    def test_early_payments_match_row_by_row(self, payment_type):
+        """Тест: график по отрезкам совпадает с построчным пересчетом после каждого погашения"""
+        rng = np.random.default_rng(6)
+        for _ in range(100):
+            years = int(rng.integers(1, 31))
+            request = MortgageRequest(
+                price=round(float(rng.uniform(2e6, 2e7)), 2),
+                down_payment=round(float(rng.uniform(0, 1e6)), 2),
+                years=years,
+                rate=round(float(rng.uniform(0.1, 25)), 3),
+                payment_type=payment_type,
+                early_payments=[
+                    {
+                        "month": int(rng.integers(1, years * 12 + 1)),
+                        "amount": round(float(rng.uniform(1e4, 2e6)), 2),
+                        "type": str(rng.choice(["reduce_term", "reduce_payment"])),
+                    }
+                    for _ in range(int(rng.integers(1, 6)))
+                ],
+            )
+
+            response = FinancialCalculator.calculate_mortgage(request)
+            expected = _row_by_row_with_early_payments(request)
+
+            assert response.term_months == len(expected)
+            assert [row.month for row in response.payment_schedule] == [row[0] for row in expected]
+            for row, (_, payment, principal, interest, balance) in zip(response.payment_schedule, expected):
+                assert row.payment == pytest.approx(payment, abs=0.011)
+                assert row.principal == pytest.approx(principal, abs=0.011)
+                assert row.interest == pytest.approx(interest, abs=0.011)
+                assert row.balance == pytest.approx(balance, abs=0.011)
+            assert response.total_payment == pytest.approx(sum(row[1] for row in expected), abs=0.05)
+
+    def test_early_payment_reduce_term_and_payment(self, mortgage_request):
+        """Тест: погашение с уменьшением срока сокращает срок, с уменьшением платежа — платеж"""
+        params = mortgage_request.model_dump()
+        base = FinancialCalculator.calculate_mortgage(mortgage_request)
+        early_payment = {"month": 24, "amount": 1_000_000}
+        shorter = FinancialCalculator.calculate_mortgage(
+            MortgageRequest(**(params | {"early_payments": [early_payment | {"type": "reduce_term"}]})),
+        )
+        cheaper = FinancialCalculator.calculate_mortgage(
+            MortgageRequest(**(params | {"early_payments": [early_payment | {"type": "reduce_payment"}]})),
+        )
+
+        assert shorter.term_months < base.term_months == 240
+        assert shorter.payment_schedule[30].payment == base.payment_schedule[30].payment
+        assert cheaper.term_months == 240
+        assert cheaper.payment_schedule[30].payment < base.payment_schedule[30].payment
+        assert shorter.total_interest < cheaper.total_interest < base.total_interest
+        assert shorter.payment_schedule[23].payment == pytest.approx(base.payment_schedule[23].payment + 1_000_000)
+
+    def test_early_payment_closes_loan(self, mortgage_request):
+        """Тест: погашение больше остатка закрывает кредит в своем месяце"""
+        request = MortgageRequest(
+            **(mortgage_request.model_dump() | {"early_payments": [{"month": 60, "amount": 10_000_000}]}),
+        )
+
+        response = FinancialCalculator.calculate_mortgage(request)
+
+        assert response.term_months == 60
+        assert len(response.payment_schedule) == 60
+        assert response.payment_schedule[-1].balance == 0
+        assert sum(row.principal for row in response.payment_schedule) == pytest.approx(response.loan_amount, abs=1)
+
+    def test_early_payments_window_and_period_totals(self, mortgage_request):
+        """Тест: окно и итоги периода с досрочными погашениями совпадают с полным графиком"""
+        params = mortgage_request.model_dump() | {
+            "early_payments": [
+                {"month": 12, "amount": 300_000, "type": "reduce_payment"},
+                {"month": 36, "amount": 500_000},
+            ],
+        }
+        full = FinancialCalculator.calculate_mortgage(MortgageRequest(**params)).payment_schedule
+        window = FinancialCalculator.calculate_mortgage(MortgageRequest(**(params | {"from_month": 30, "to_month": 45})))
+        rows = full[29:45]
+
+        assert [row.model_dump() for row in window.payment_schedule] == [row.model_dump() for row in rows]
+        totals = window.period_totals
+        assert totals.principal == pytest.approx(sum(row.principal for row in rows), abs=0.1)
+        assert totals.interest == pytest.approx(sum(row.interest for row in rows), abs=0.1)
+        assert totals.payment == pytest.approx(sum(row.payment for row in rows), abs=0.1)
+
+    def test_invalid_early_payment_month(self):
+        """Тест: досрочное погашение за пределами срока отклоняется"""
+        with pytest.raises(ValueError):
+            MortgageRequest(
+                price=5_000_000,
+                down_payment=1_000_000,
+                years=1,
+                rate=12.0,
+                early_payments=[{"month": 13, "amount": 100_000}],
+            )
+
     def test_invalid_down_payment_equal_price(self):
         """Тест: первоначальный взнос равен стоимости"""
         with pytest.raises(ValueError) as exc_info:
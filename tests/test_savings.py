@@ -137,6 +137,16 @@ class TestSavings:
         assert first_year.contributions > 0
         assert first_year.interest > 0
 
+    def test_summary_detail_skips_breakdown(self, savings_request):
+        """Тест: detail=summary возвращает те же итоги без годового отчета"""
+        full = FinancialCalculator.calculate_savings(savings_request)
+        summary = FinancialCalculator.calculate_savings(
+            SavingsRequest(**(savings_request.model_dump() | {"detail": "summary"})),
+        )
+
+        assert summary.yearly_breakdown is None
+        assert summary.model_dump(exclude={"yearly_breakdown"}) == full.model_dump(exclude={"yearly_breakdown"})
+
     def test_max_years(self):
         """Тест с максимальным сроком"""
         request = SavingsRequest(